@@ -0,0 +1,59 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models import user, document, learning_material, chat  # noqa: F401  (register the tables)
+from app.core.migrations import include_object
+
+config = context.config
+
+# Programmatic upgrades (app.core.migrations) keep the application's logging
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+
+target_metadata = Base.metadata
+
+def configure(**kw) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite can't ALTER most constraints: let autogenerate emit batch operations
+        render_as_batch=True,
+        **kw
+    )
+
+def run_migrations_offline() -> None:
+    """Emit the SQL to stdout instead of running it (alembic upgrade --sql)"""
+    configure(url=config.get_main_option("sqlalchemy.url"), literal_binds=True,
+              dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,96 @@
+"""page offsets, material versions, chat sessions and document chunks
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:10:00
+
+The version columns of the materials (ETags) and documents.page_offsets
+were added to the models while the schema was still built by create_all,
+so databases are stamped at 0001 with or without them. Databases created
+with create_all may already have some of these tables and columns: they
+are only added when missing, and existing materials start at version 1.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ("summaries", "quizzes", "flashcard_sets")
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    def has_column(table: str, column: str) -> bool:
+        return any(c["name"] == column for c in inspector.get_columns(table))
+
+    if not has_column("documents", "page_offsets"):
+        op.add_column("documents", sa.Column("page_offsets", sa.JSON(), nullable=True))
+    for table in VERSIONED_TABLES:
+        if not has_column(table, "version"):
+            op.add_column(table, sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+    if "chat_sessions" not in tables:
+        op.create_table(
+            "chat_sessions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("document_id", sa.Integer(), nullable=False),
+            sa.Column("title", sa.String(length=255), nullable=False),
+            sa.Column("summary", sa.Text(), nullable=False),
+            sa.Column("summarized_until_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(["document_id"], ["documents.id"], ondelete="CASCADE"),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_chat_sessions_id"), "chat_sessions", ["id"], unique=False)
+        op.create_index(op.f("ix_chat_sessions_user_id"), "chat_sessions", ["user_id"], unique=False)
+
+    if "chat_messages" not in tables:
+        op.create_table(
+            "chat_messages",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("session_id", sa.Integer(), nullable=False),
+            sa.Column("role", sa.String(length=20), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+            sa.ForeignKeyConstraint(["session_id"], ["chat_sessions.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_chat_messages_id"), "chat_messages", ["id"], unique=False)
+        op.create_index(op.f("ix_chat_messages_session_id"), "chat_messages", ["session_id"], unique=False)
+
+    if "document_chunks" not in tables:
+        op.create_table(
+            "document_chunks",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("document_id", sa.Integer(), nullable=False),
+            sa.Column("chunk_index", sa.Integer(), nullable=False),
+            sa.Column("start_offset", sa.Integer(), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.ForeignKeyConstraint(["document_id"], ["documents.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(op.f("ix_document_chunks_id"), "document_chunks", ["id"], unique=False)
+        op.create_index(op.f("ix_document_chunks_document_id"), "document_chunks", ["document_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table("document_chunks")
+    op.drop_table("chat_messages")
+    op.drop_table("chat_sessions")
+    for table in VERSIONED_TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("version")
+    with op.batch_alter_table("documents") as batch_op:
+        batch_op.drop_column("page_offsets")
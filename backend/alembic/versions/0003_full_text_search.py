@@ -0,0 +1,73 @@
+"""FTS5 full-text search over documents and learning materials
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:20:00
+
+External-content tables kept in sync by triggers, as created by
+app.services.full_text_search for create_all databases. The DDL is copied
+here so that this migration doesn't change if that module does.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FTS_TABLES = {
+    "documents_fts": ("documents", ["title", "content"]),
+    "summaries_fts": ("summaries", ["content"]),
+    "quiz_questions_fts": ("quiz_questions", ["question"]),
+    "flashcards_fts": ("flashcards", ["front", "back"]),
+}
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    existing = {
+        row[0] for row in bind.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_fts'"
+        )
+    }
+    for fts_table, (source, columns) in FTS_TABLES.items():
+        cols = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+            f"{cols}, content='{source}', content_rowid='id', tokenize='{TOKENIZER}')"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+            f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+        )
+        if fts_table not in existing:
+            # Index the rows that were there before the table existed
+            op.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for fts_table in FTS_TABLES:
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {fts_table}")
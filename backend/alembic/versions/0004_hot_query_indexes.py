@@ -0,0 +1,43 @@
+"""indexes for per-user listings and per-document material lookups
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:30:00
+
+Without them, listing a user's documents, finding the existing summary,
+quiz or flashcard set of a document, and loading questions, cards or due
+cards are full table scans. The query plans are checked in
+tests/test_query_plans.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column): index named ix_<table>_<column>, as index=True does
+INDEXES = [
+    ("documents", "user_id"),
+    ("summaries", "document_id"),
+    ("quizzes", "document_id"),
+    ("quiz_questions", "quiz_id"),
+    ("flashcard_sets", "document_id"),
+    ("flashcards", "flashcard_set_id"),
+    ("flashcards", "next_review"),
+    ("chat_sessions", "document_id"),
+]
+
+
+def upgrade() -> None:
+    for table, column in INDEXES:
+        op.create_index(op.f(f"ix_{table}_{column}"), table, [column], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for table, column in reversed(INDEXES):
+        op.drop_index(op.f(f"ix_{table}_{column}"), table_name=table, if_exists=True)
@@ -0,0 +1,82 @@
+"""document versions, chunk hashes and the source chunk of questions and cards
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 11:00:00
+
+Existing documents get their first version and existing chunks their
+content hash here. Existing questions and cards get their source chunk the
+first time their document is re-uploaded.
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SOURCED_TABLES = ("quiz_questions", "flashcards")
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    def has_column(table: str, column: str) -> bool:
+        return any(c["name"] == column for c in inspector.get_columns(table))
+
+    # Databases created with create_all may already have the columns
+    if not has_column("documents", "version"):
+        op.add_column("documents", sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+    if not has_column("documents", "file_sha256"):
+        op.add_column("documents", sa.Column("file_sha256", sa.String(length=64), nullable=True))
+    if not has_column("document_chunks", "content_hash"):
+        op.add_column("document_chunks", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    for table in SOURCED_TABLES:
+        if not has_column(table, "source_chunk_hash"):
+            op.add_column(table, sa.Column("source_chunk_hash", sa.String(length=64), nullable=True))
+
+    op.create_table(
+        "document_versions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("document_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("file_sha256", sa.String(length=64), nullable=True),
+        sa.Column("content_length", sa.Integer(), nullable=False),
+        sa.Column("chunks_kept", sa.Integer(), nullable=False),
+        sa.Column("chunks_added", sa.Integer(), nullable=False),
+        sa.Column("chunks_removed", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.ForeignKeyConstraint(["document_id"], ["documents.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_document_versions_id"), "document_versions", ["id"], unique=False)
+    op.create_index(op.f("ix_document_versions_document_id"), "document_versions", ["document_id"], unique=False)
+
+    connection = op.get_bind()
+    connection.execute(sa.text(
+        "INSERT INTO document_versions (document_id, version, filename, content_length, chunks_kept, chunks_added, chunks_removed, created_at) "
+        "SELECT id, 1, filename, coalesce(length(content), 0), 0, 0, 0, created_at FROM documents"
+    ))
+    chunks = sa.table("document_chunks", sa.column("id", sa.Integer), sa.column("content", sa.Text), sa.column("content_hash", sa.String))
+    for chunk_id, content in connection.execute(sa.select(chunks.c.id, chunks.c.content)).all():
+        digest = hashlib.sha256(content.encode("utf-8", "surrogatepass")).hexdigest()
+        connection.execute(chunks.update().where(chunks.c.id == chunk_id).values(content_hash=digest))
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_document_versions_document_id"), table_name="document_versions")
+    op.drop_index(op.f("ix_document_versions_id"), table_name="document_versions")
+    op.drop_table("document_versions")
+    # Plain ALTER TABLE DROP COLUMN (SQLite 3.35+): a batch copy would drop the FTS triggers
+    for table in SOURCED_TABLES:
+        op.drop_column(table, "source_chunk_hash")
+    op.drop_column("document_chunks", "content_hash")
+    op.drop_column("documents", "file_sha256")
+    op.drop_column("documents", "version")
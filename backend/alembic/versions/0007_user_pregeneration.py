@@ -0,0 +1,27 @@
+"""per-user opt-in to background pre-generation
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 12:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created with create_all may already have the column
+    if not any(c["name"] == "pregenerate" for c in sa.inspect(op.get_bind()).get_columns("users")):
+        op.add_column("users", sa.Column("pregenerate", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("users", "pregenerate")
@@ -0,0 +1,35 @@
+"""prompt version and model each summary, quiz and flashcard set was generated with
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 13:00:00
+
+Existing materials are left without one: generate_materials.py --outdated
+treats them as outdated.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MATERIAL_TABLES = ("summaries", "quizzes", "flashcard_sets")
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table in MATERIAL_TABLES:
+        # Databases created with create_all may already have the column
+        if not any(c["name"] == "generator" for c in inspector.get_columns(table)):
+            op.add_column(table, sa.Column("generator", sa.String(length=100), nullable=True))
+
+
+def downgrade() -> None:
+    for table in MATERIAL_TABLES:
+        op.drop_column(table, "generator")
@@ -0,0 +1,47 @@
+"""per-user question stats, to sample quizzes from a document's question bank
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 14:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created with create_all may already have the table
+    if "question_stats" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "question_stats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("question_id", sa.Integer(), nullable=False),
+        sa.Column("times_served", sa.Integer(), nullable=False),
+        sa.Column("times_correct", sa.Integer(), nullable=False),
+        sa.Column("times_wrong", sa.Integer(), nullable=False),
+        sa.Column("last_answer_correct", sa.Boolean(), nullable=True),
+        sa.Column("last_served_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["question_id"], ["quiz_questions.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_question_stats_id"), "question_stats", ["id"], unique=False)
+    op.create_index(op.f("ix_question_stats_question_id"), "question_stats", ["question_id"], unique=False)
+    op.create_index("ix_question_stats_user_id_question_id", "question_stats", ["user_id", "question_id"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_question_stats_user_id_question_id", table_name="question_stats")
+    op.drop_index(op.f("ix_question_stats_question_id"), table_name="question_stats")
+    op.drop_index(op.f("ix_question_stats_id"), table_name="question_stats")
+    op.drop_table("question_stats")
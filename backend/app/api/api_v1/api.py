@@ -1,9 +1,12 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import documents, learning_materials, chat, auth
+from app.api.api_v1.endpoints import documents, uploads, learning_materials, chat, auth, admin, search
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
 api_router.include_router(learning_materials.router, prefix="/learning-materials", tags=["learning-materials"])
-api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
\ No newline at end of file
+api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
\ No newline at end of file
@@ -0,0 +1,57 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+from app.core.profiling import request_profiler
+from app.models.user import User
+from app.services.llm_metrics import llm_metrics
+from app.services.llm_routing import get_task_routes
+from app.services.llm_scheduler import llm_scheduler
+from app.api.api_v1.endpoints.auth import get_current_superuser
+
+router = APIRouter()
+
+@router.get("/llm-metrics", response_model=dict)
+async def get_llm_metrics(current_user: User = Depends(get_current_superuser)):
+    """Get latency, token and cost statistics per LLM task and model"""
+    return {
+        "routes": {task: vars(route) for task, route in get_task_routes().items()},
+        "metrics": llm_metrics.snapshot(),
+        "scheduler": llm_scheduler.snapshot()
+    }
+
+@router.delete("/llm-metrics")
+async def reset_llm_metrics(current_user: User = Depends(get_current_superuser)):
+    """Reset LLM statistics, e.g. before comparing a new routing table"""
+    llm_metrics.reset()
+    return {"message": "LLM metrics reset"}
+
+class ProfilingRequest(BaseModel):
+    sample_rate: float = Field(1.0, gt=0, le=1)
+    path_prefix: Optional[str] = None  # e.g. /api/v1/learning-materials/quizzes
+    max_profiles: int = Field(1, ge=1, le=100)
+
+@router.get("/profiling", response_model=dict)
+async def get_profiling(current_user: User = Depends(get_current_superuser)):
+    """Get the profiler settings and the saved profiles"""
+    return {**request_profiler.status(), "profiles": request_profiler.list_profiles()}
+
+@router.put("/profiling", response_model=dict)
+async def start_profiling(request: ProfilingRequest, current_user: User = Depends(get_current_superuser)):
+    """Profile a sample of the requests, optionally only under a path prefix"""
+    request_profiler.configure(request.sample_rate, request.path_prefix, request.max_profiles)
+    return request_profiler.status()
+
+@router.delete("/profiling")
+async def stop_profiling(current_user: User = Depends(get_current_superuser)):
+    """Stop profiling requests"""
+    request_profiler.disable()
+    return {"message": "Profiling disabled"}
+
+@router.get("/profiling/profiles/{name}")
+async def download_profile(name: str, current_user: User = Depends(get_current_superuser)):
+    """Download a saved profile (pyinstrument HTML report)"""
+    path = request_profiler.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/html", filename=name)
@@ -1,13 +1,17 @@
 from datetime import timedelta
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.config import settings
 from app.core.security import create_access_token, verify_token
+from app.core.timing import stage
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, Token, UserLogin
 from app.services.user_service import UserService
+from app.services.pregeneration import PREGENERATED_MATERIALS
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -23,12 +27,13 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    username = verify_token(token)
-    if username is None:
-        raise credentials_exception
+    with stage("auth"):
+        username = verify_token(token)
+        if username is None:
+            raise credentials_exception
 
-    user_service = UserService(db)
-    user = user_service.get_user_by_username(username)
+        user_service = UserService(db)
+        user = user_service.get_user_by_username(username)
     if user is None:
         raise credentials_exception
     return user
@@ -39,6 +44,12 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def get_current_superuser(current_user: User = Depends(get_current_active_user)) -> User:
+    """Get current user, requiring admin rights"""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough privileges")
+    return current_user
+
 @router.post("/register", response_model=UserResponse)
 async def register(user_create: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
@@ -122,5 +133,26 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
         email=current_user.email,
         full_name=current_user.full_name,
         is_active=current_user.is_active,
-        created_at=current_user.created_at.isoformat()
-    )
\ No newline at end of file
+        created_at=current_user.created_at.isoformat(),
+        pregenerate=current_user.pregenerate or []
+    )
+
+class PregenerationSettings(BaseModel):
+    materials: List[str] = []  # Any of "summary", "quiz", "flashcards"; empty to opt out
+
+@router.put("/me/pregeneration", response_model=UserResponse)
+async def set_pregeneration(
+    request: PregenerationSettings,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Choose the materials generated in the background after each upload"""
+    unknown = set(request.materials) - set(PREGENERATED_MATERIALS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown materials: {', '.join(sorted(unknown))} (expected {', '.join(PREGENERATED_MATERIALS)})"
+        )
+    current_user.pregenerate = [material for material in PREGENERATED_MATERIALS if material in request.materials] or None
+    db.commit()
+    return await get_current_user_info(current_user)
@@ -1,23 +1,50 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.core.database import get_db
+from app.core.llm_errors import llm_http_exception
+from app.models.chat import ChatSession, ChatMessage
 from app.models.document import Document
 from app.models.user import User
-from app.services.llm_service import LLMService
+from app.services.chat_memory import ChatMemory
+from app.services.learning_materials import llm_service
 from app.api.api_v1.endpoints.auth import get_current_active_user
 
 router = APIRouter()
-llm_service = LLMService()
 
 class QuestionRequest(BaseModel):
     question: str
     document_id: int
+    session_id: Optional[int] = None  # Continue a chat session (see POST /chat/sessions)
 
 class QuestionResponse(BaseModel):
     question: str
     answer: str
     document_title: str
+    session_id: Optional[int] = None
+
+class SessionCreate(BaseModel):
+    document_id: int
+    title: Optional[str] = None
+
+def session_to_dict(session: ChatSession) -> dict:
+    return {
+        "id": session.id,
+        "document_id": session.document_id,
+        "title": session.title,
+        "created_at": session.created_at,
+        "updated_at": session.updated_at
+    }
+
+def get_user_session(db: Session, session_id: int, user_id: int) -> ChatSession:
+    session = db.query(ChatSession).filter(
+        ChatSession.id == session_id,
+        ChatSession.user_id == user_id
+    ).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return session
 
 @router.post("/ask", response_model=QuestionResponse)
 async def ask_question(
@@ -25,7 +52,7 @@ async def ask_question(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Ask a question about a specific document"""
+    """Ask a question about a specific document, optionally as part of a chat session"""
 
     # Verify document ownership
     document = db.query(Document).filter(
@@ -35,21 +62,109 @@ async def ask_question(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
+    session = None
+    if request.session_id is not None:
+        session = get_user_session(db, request.session_id, current_user.id)
+        if session.document_id != document.id:
+            raise HTTPException(status_code=400, detail="Chat session belongs to another document")
+
     try:
+        history = []
+        if session:
+            history = await ChatMemory(llm_service).load(db, session, user_id=current_user.id)
+
         # Get answer from LLM
         answer = await llm_service.answer_question(
             question=request.question,
             document_content=document.content,
-            document_title=document.title
-        )
-
-        return QuestionResponse(
-            question=request.question,
-            answer=answer,
-            document_title=document.title
+            document_title=document.title,
+            user_id=current_user.id,
+            history=history,
+            memory=session.summary if session else ""
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to answer question: {str(e)}")
+        raise llm_http_exception(e, "Failed to answer question")
+
+    if session:
+        db.add(ChatMessage(session_id=session.id, role="user", content=request.question))
+        db.add(ChatMessage(session_id=session.id, role="assistant", content=answer))
+        db.commit()
+
+    return QuestionResponse(
+        question=request.question,
+        answer=answer,
+        document_title=document.title,
+        session_id=session.id if session else None
+    )
+
+@router.post("/sessions", response_model=dict)
+async def create_session(
+    request: SessionCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Start a chat session about a document"""
+    document = db.query(Document).filter(
+        Document.id == request.document_id,
+        Document.user_id == current_user.id
+    ).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    session = ChatSession(
+        user_id=current_user.id,
+        document_id=document.id,
+        title=request.title or f"Chat about {document.title}"
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session_to_dict(session)
+
+@router.get("/sessions", response_model=list)
+async def get_sessions(
+    document_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the user's chat sessions, optionally for one document"""
+    query = db.query(ChatSession).filter(ChatSession.user_id == current_user.id)
+    if document_id is not None:
+        query = query.filter(ChatSession.document_id == document_id)
+    return [session_to_dict(session) for session in query.order_by(ChatSession.id.desc()).all()]
+
+@router.get("/sessions/{session_id}", response_model=dict)
+async def get_session(
+    session_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get a chat session with its full transcript"""
+    session = get_user_session(db, session_id, current_user.id)
+    return {
+        **session_to_dict(session),
+        "messages": [
+            {
+                "id": message.id,
+                "role": message.role,
+                "content": message.content,
+                "created_at": message.created_at
+            }
+            for message in session.messages
+        ]
+    }
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(
+    session_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Delete a chat session and its messages"""
+    session = get_user_session(db, session_id, current_user.id)
+    db.delete(session)
+    db.commit()
+    return {"message": "Chat session deleted successfully"}
 
 @router.get("/documents", response_model=list)
 async def get_available_documents(
@@ -1,19 +1,119 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
+import asyncio
+import logging
 import os
 import shutil
 from app.core.database import get_db
 from app.core.config import settings
-from app.models.document import Document, DocumentType
+from app.models.document import Document, DocumentChunk, DocumentType, DocumentVersion
+from app.models.learning_material import Summary, Quiz, FlashcardSet
 from app.models.user import User
+from app.schemas.document import (
+    DocumentUploadResponse, DocumentListItem, DocumentDetail, DocumentContentSlice, MessageResponse,
+    BulkUploadItem, BulkUploadResponse, DocumentVersionItem, DocumentVersionResponse
+)
+from app.services.chunking import chunk_text, content_hash
 from app.services.document_processor import DocumentProcessor
+from app.services.document_versions import (
+    ChunkAttributor, diff_chunks, file_sha256, flashcard_text, question_text
+)
+from app.services.bulk_ingestion import BulkStager, BulkLimitError, extraction_pool, unique_path
+from app.services.question_bank import DuplicateFilter
+from app.services.text_store import text_store
+from app.services.learning_materials import (
+    is_valid_flashcard, is_valid_question, llm_service, make_flashcard, make_question, pregenerator, touch
+)
+from app.services.vector_index import get_document_chunks, vector_index
 from app.api.api_v1.endpoints.auth import get_current_active_user
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 document_processor = DocumentProcessor()
 
-@router.post("/upload", response_model=dict)
+async def extract_file(file_path: str, document_type: DocumentType) -> Tuple[str, Optional[List[int]]]:
+    """Extract the text of a saved upload in the extraction pool, off the event loop"""
+    try:
+        content, page_offsets, duration = await extraction_pool.extract(file_path, document_type)
+    except Exception as e:
+        document_processor.record_extraction(file_path, document_type, None, failed=True)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise HTTPException(status_code=500, detail=f"Failed to process document: {str(e)}")
+    document_processor.record_extraction(file_path, document_type, duration)
+    return content, page_offsets
+
+def save_document(
+    db: Session,
+    current_user: User,
+    file_path: str,
+    filename: str,
+    document_type: DocumentType,
+    content: str,
+    page_offsets: Optional[List[int]]
+) -> DocumentUploadResponse:
+    """Store the extracted text of a saved upload as a document of the user"""
+    # Save to database
+    try:
+        digest = file_sha256(file_path)
+        db_document = Document(
+            title=os.path.splitext(filename)[0],
+            filename=filename,
+            file_path=file_path,
+            document_type=document_type,
+            content=content,
+            page_offsets=page_offsets,
+            file_sha256=digest,
+            user_id=current_user.id
+        )
+        db_document.versions.append(DocumentVersion(
+            version=1, filename=filename, file_sha256=digest, content_length=len(content)
+        ))
+        db.add(db_document)
+        db.commit()
+        db.refresh(db_document)
+    except Exception as e:
+        db.rollback()
+        # Clean up file if database save fails
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise HTTPException(status_code=500, detail=f"Failed to save to database: {str(e)}")
+
+    # Secondary copies: a failure here must not fail the upload, both are
+    # rebuilt from the database when they are next needed
+    try:
+        text_store.write(db_document.id, content)
+    except Exception as e:
+        logger.warning("text_store document=%s write failed: %s", db_document.id, e)
+    try:
+        vector_index.index_document(db, db_document)
+    except Exception as e:
+        logger.warning("vector_index document=%s indexing failed: %s", db_document.id, e)
+    pregenerator.schedule(db_document.id, current_user.id, current_user.pregenerate)
+
+    return DocumentUploadResponse(
+        message="Document uploaded and processed successfully",
+        document_id=db_document.id,
+        title=db_document.title,
+        document_type=document_type.value,
+        content_length=len(content)
+    )
+
+async def ingest_file(
+    db: Session,
+    current_user: User,
+    file_path: str,
+    filename: str,
+    document_type: DocumentType
+) -> DocumentUploadResponse:
+    """Extract the text of a saved upload and store it as a document of the user"""
+    content, page_offsets = await extract_file(file_path, document_type)
+    return save_document(db, current_user, file_path, filename, document_type, content, page_offsets)
+
+@router.post("/upload", response_model=DocumentUploadResponse)
 async def upload_document(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
@@ -32,70 +132,110 @@ async def upload_document(
     # Create upload directory if it doesn't exist
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
-    # Save file
-    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
+    # Save file: each document has its own, since re-upload and delete remove it
+    filename = os.path.basename(file.filename)
+    file_path = unique_path(settings.UPLOAD_DIR, filename)
     try:
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
-
-    # Extract text content
-    try:
-        content = document_processor.process_document(file_path, document_type)
-    except Exception as e:
-        # Clean up file if processing fails
         if os.path.exists(file_path):
             os.remove(file_path)
-        raise HTTPException(status_code=500, detail=f"Failed to process document: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
 
-    # Save to database
+    return await ingest_file(db, current_user, file_path, filename, document_type)
+
+@router.post("/bulk", response_model=BulkUploadResponse)
+async def bulk_upload_documents(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Upload several documents and/or ZIP archives, extracted in parallel"""
+    stager = BulkStager(settings.UPLOAD_DIR, document_processor, settings.BULK_MAX_FILES, settings.BULK_MAX_TOTAL_SIZE)
     try:
-        db_document = Document(
-            title=os.path.splitext(file.filename)[0],
-            filename=file.filename,
-            file_path=file_path,
-            document_type=document_type,
-            content=content,
-            user_id=current_user.id
-        )
-        db.add(db_document)
-        db.commit()
-        db.refresh(db_document)
+        for file in files:
+            stager.add_upload(file.file, file.filename or "")
+    except BulkLimitError as e:
+        stager.discard()
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        # Clean up file if database save fails
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise HTTPException(status_code=500, detail=f"Failed to save to database: {str(e)}")
+        stager.discard()
+        raise HTTPException(status_code=500, detail=f"Failed to save files: {str(e)}")
+
+    staged = [item for item in stager.files if item.path]
+    extracted = await asyncio.gather(
+        *(extraction_pool.extract(item.path, item.document_type) for item in staged),
+        return_exceptions=True
+    )
+    results = dict(zip((id(item) for item in staged), extracted))
+
+    # Saved one at a time, in upload order: the session isn't shared across tasks
+    items = []
+    for item in stager.files:
+        if not item.path:
+            items.append(BulkUploadItem(filename=item.filename, source=item.source, status="skipped", error=item.error))
+            continue
+        result = results[id(item)]
+        if isinstance(result, Exception):
+            document_processor.record_extraction(item.path, item.document_type, None, failed=True)
+            if os.path.exists(item.path):
+                os.remove(item.path)
+            items.append(BulkUploadItem(
+                filename=item.filename, source=item.source, status="failed",
+                error=f"Failed to process document: {str(result)}"
+            ))
+            continue
+        content, page_offsets, duration = result
+        document_processor.record_extraction(item.path, item.document_type, duration)
+        try:
+            saved = save_document(db, current_user, item.path, item.filename, item.document_type, content, page_offsets)
+        except HTTPException as e:
+            items.append(BulkUploadItem(filename=item.filename, source=item.source, status="failed", error=e.detail))
+            continue
+        items.append(BulkUploadItem(
+            filename=item.filename,
+            source=item.source,
+            status="processed",
+            document_id=saved.document_id,
+            title=saved.title,
+            document_type=saved.document_type,
+            content_length=saved.content_length
+        ))
 
-    return {
-        "message": "Document uploaded and processed successfully",
-        "document_id": db_document.id,
-        "title": db_document.title,
-        "document_type": document_type.value,
-        "content_length": len(content)
-    }
+    return BulkUploadResponse(
+        total=len(items),
+        processed=sum(1 for item in items if item.status == "processed"),
+        failed=sum(1 for item in items if item.status == "failed"),
+        skipped=sum(1 for item in items if item.status == "skipped"),
+        items=items
+    )
 
-@router.get("/", response_model=List[dict])
+@router.get("/", response_model=List[DocumentListItem])
 async def get_documents(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get user's documents"""
-    documents = db.query(Document).filter(Document.user_id == current_user.id).all()
+    # The length is computed by SQLite: listing doesn't load the documents' text
+    documents = db.query(
+        Document.id, Document.title, Document.filename, Document.document_type, Document.created_at,
+        Document.version, func.coalesce(func.length(Document.content), 0).label("content_length")
+    ).filter(Document.user_id == current_user.id).all()
     return [
-        {
-            "id": doc.id,
-            "title": doc.title,
-            "filename": doc.filename,
-            "document_type": doc.document_type.value,
-            "created_at": doc.created_at,
-            "content_length": len(doc.content) if doc.content else 0
-        }
+        DocumentListItem(
+            id=doc.id,
+            title=doc.title,
+            filename=doc.filename,
+            document_type=doc.document_type.value,
+            created_at=doc.created_at,
+            content_length=doc.content_length,
+            version=doc.version
+        )
         for doc in documents
     ]
 
-@router.get("/{document_id}", response_model=dict)
+@router.get("/{document_id}", response_model=DocumentDetail)
 async def get_document(
     document_id: int,
     current_user: User = Depends(get_current_active_user),
@@ -109,16 +249,320 @@ async def get_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    return {
-        "id": document.id,
-        "title": document.title,
-        "filename": document.filename,
-        "document_type": document.document_type.value,
-        "content": document.content,
-        "created_at": document.created_at
-    }
+    return DocumentDetail(
+        id=document.id,
+        title=document.title,
+        filename=document.filename,
+        document_type=document.document_type.value,
+        content=document.content,
+        created_at=document.created_at,
+        version=document.version
+    )
+
+@router.get("/{document_id}/content", response_model=DocumentContentSlice)
+async def get_document_content(
+    document_id: int,
+    offset: int = Query(0, ge=0),
+    length: Optional[int] = Query(None, ge=1),
+    page_start: Optional[int] = Query(None, ge=1, description="First page (PDF), 1-based"),
+    page_end: Optional[int] = Query(None, ge=1, description="Last page (PDF), inclusive"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get part of a document's text, by character offset or by page range"""
+    row = db.query(Document.id, Document.page_offsets).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    if not text_store.exists(document_id):
+        # Documents uploaded before the text store existed: store them once
+        content = db.query(Document.content).filter(Document.id == document_id).scalar()
+        text_store.write(document_id, content or "")
+    total_length = text_store.length(document_id)
+    page_offsets = row.page_offsets
+
+    if page_start is not None or page_end is not None:
+        if not page_offsets:
+            raise HTTPException(status_code=400, detail="This document has no pages")
+        page_start = page_start or 1
+        page_end = min(page_end or page_start, len(page_offsets))
+        if page_start > len(page_offsets) or page_end < page_start:
+            raise HTTPException(status_code=416, detail=f"Pages out of range (1-{len(page_offsets)})")
+        offset = page_offsets[page_start - 1]
+        end = page_offsets[page_end] if page_end < len(page_offsets) else total_length
+        length = end - offset
+        if length > settings.CONTENT_SLICE_MAX_CHARS:
+            raise HTTPException(status_code=400, detail="Page range too large, request fewer pages")
+    else:
+        if offset > total_length:
+            raise HTTPException(status_code=416, detail=f"Offset beyond end of text ({total_length})")
+        length = min(length or settings.CONTENT_SLICE_MAX_CHARS, settings.CONTENT_SLICE_MAX_CHARS)
+
+    content = text_store.read(document_id, offset, length)
+    return DocumentContentSlice(
+        document_id=document_id,
+        offset=offset,
+        length=len(content),
+        total_length=total_length,
+        page_count=len(page_offsets) if page_offsets else None,
+        page_start=page_start,
+        page_end=page_end,
+        has_more=offset + len(content) < total_length,
+        content=content
+    )
+
+async def replace_questions(
+    quiz: Quiz,
+    stale: set,
+    added_text: str,
+    attributor: ChunkAttributor,
+    document: Document,
+    user_id: int,
+    errors: List[str]
+) -> Tuple[int, int, int]:
+    """Replace the questions of a quiz written from removed chunks: (kept, removed, added)"""
+    questions = sorted(quiz.questions, key=lambda q: q.order_index or 0)
+    kept = [q for q in questions if q.source_chunk_hash not in stale]
+    removed = len(questions) - len(kept)
+    new_questions = []
+    if removed and added_text:
+        try:
+            known = [q.question for q in kept]
+            generated = await llm_service.generate_quiz(added_text, document.title, removed, user_id=user_id, avoid=known)
+            duplicates = DuplicateFilter(known)
+            new_questions = [
+                make_question(data, attributor) for data in generated
+                if is_valid_question(data) and duplicates.is_new(data["question"])
+            ][:removed]
+        except Exception as e:
+            errors.append(f"Failed to generate quiz questions: {str(e)}")
+    if removed or new_questions:
+        quiz.questions = kept + new_questions
+        for i, question in enumerate(quiz.questions):
+            question.order_index = i
+        touch(quiz)
+    return len(kept), removed, len(new_questions)
 
-@router.delete("/{document_id}")
+async def replace_flashcards(
+    flashcard_set: FlashcardSet,
+    stale: set,
+    added_text: str,
+    attributor: ChunkAttributor,
+    document: Document,
+    user_id: int,
+    errors: List[str]
+) -> Tuple[int, int, int]:
+    """Replace the flashcards of a set written from removed chunks: (kept, removed, added)"""
+    cards = sorted(flashcard_set.flashcards, key=lambda c: c.order_index or 0)
+    kept = [c for c in cards if c.source_chunk_hash not in stale]
+    removed = len(cards) - len(kept)
+    new_cards = []
+    if removed and added_text:
+        try:
+            generated = await llm_service.generate_flashcards(added_text, document.title, removed, user_id=user_id)
+            new_cards = [make_flashcard(data, attributor) for data in generated if is_valid_flashcard(data)][:removed]
+        except Exception as e:
+            errors.append(f"Failed to generate flashcards: {str(e)}")
+    if removed or new_cards:
+        flashcard_set.flashcards = kept + new_cards
+        for i, card in enumerate(flashcard_set.flashcards):
+            card.order_index = i
+        touch(flashcard_set)
+    return len(kept), removed, len(new_cards)
+
+@router.put("/{document_id}/file", response_model=DocumentVersionResponse)
+async def reupload_document(
+    document_id: int,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Upload a new version of a document; only the chunks that changed are reprocessed.
+
+    Questions and flashcards written from unchanged chunks are kept, review
+    history included. Those written from removed chunks are replaced by new
+    ones generated from the added text only, and the summary is revised from
+    the removed and added passages instead of being written again.
+    """
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    document_type = document_processor.get_document_type_from_extension(file.filename)
+    if not document_type:
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported file type. Please upload PDF, DOCX, or Markdown files."
+        )
+
+    # Saved next to the current version, which is removed once the new one is stored
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    file_path = unique_path(settings.UPLOAD_DIR, os.path.basename(file.filename))
+    try:
+        with open(file_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+        digest = file_sha256(file_path)
+    except Exception as e:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+
+    previous_digest = document.file_sha256
+    if previous_digest is None and os.path.exists(document.file_path):
+        previous_digest = file_sha256(document.file_path)  # Uploaded before digests were stored
+    if digest == previous_digest:
+        os.remove(file_path)
+        return DocumentVersionResponse(document_id=document.id, version=document.version, unchanged=True)
+
+    content, page_offsets = await extract_file(file_path, document_type)
+
+    # Jobs started on the previous version would write material for the old text
+    pregenerator.cancel(document.id)
+    old_chunks = get_document_chunks(db, document)
+    quizzes = db.query(Quiz).filter(Quiz.document_id == document.id).all()
+    flashcard_sets = db.query(FlashcardSet).filter(FlashcardSet.document_id == document.id).all()
+    summaries = db.query(Summary).filter(Summary.document_id == document.id).all()
+
+    # Material generated before sources were recorded: attribute it to the previous version
+    old_attributor = ChunkAttributor(old_chunks)
+    for quiz in quizzes:
+        for question in quiz.questions:
+            if question.source_chunk_hash is None:
+                question.source_chunk_hash = old_attributor.source(
+                    question_text(question.question, question.options, question.explanation)
+                )
+    for flashcard_set in flashcard_sets:
+        for card in flashcard_set.flashcards:
+            if card.source_chunk_hash is None:
+                card.source_chunk_hash = old_attributor.source(flashcard_text(card.front, card.back))
+
+    diff = diff_chunks(old_chunks, chunk_text(content, settings.CHUNK_MAX_CHARS))
+    stale = diff.stale_hashes()
+    removed_ids = [row.id for row in diff.removed]
+    removed_text = "\n\n".join(row.content for row in diff.removed)
+    added_text = "\n\n".join(chunk.text for chunk in diff.added)
+
+    for row in diff.removed:
+        db.delete(row)
+    for row, chunk in diff.kept:
+        row.chunk_index = chunk.index
+        row.start_offset = chunk.start
+    added = [
+        DocumentChunk(
+            document_id=document.id, chunk_index=chunk.index, start_offset=chunk.start,
+            content=chunk.text, content_hash=content_hash(chunk.text)
+        )
+        for chunk in diff.added
+    ]
+    db.add_all(added)
+
+    old_file_path = document.file_path
+    document.filename = file.filename
+    document.file_path = file_path
+    document.document_type = document_type
+    document.content = content
+    document.page_offsets = page_offsets
+    document.file_sha256 = digest
+    document.version += 1
+    document.versions.append(DocumentVersion(
+        version=document.version,
+        filename=file.filename,
+        file_sha256=digest,
+        content_length=len(content),
+        chunks_kept=len(diff.kept),
+        chunks_added=len(diff.added),
+        chunks_removed=len(diff.removed)
+    ))
+
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise HTTPException(status_code=500, detail=f"Failed to save to database: {str(e)}")
+
+    if old_file_path != file_path and os.path.exists(old_file_path):
+        os.remove(old_file_path)
+    try:
+        text_store.write(document.id, content)
+    except Exception as e:
+        logger.warning("text_store document=%s write failed: %s", document.id, e)
+        # Don't serve the previous version: without an entry it is rebuilt from the database
+        try:
+            text_store.delete(document.id)
+        except OSError as e:
+            logger.warning("text_store document=%s delete failed: %s", document.id, e)
+    try:
+        vector_index.update_chunks(db, document, removed_ids, added)
+    except Exception as e:
+        logger.warning("vector_index document=%s update failed: %s", document.id, e)
+
+    response = DocumentVersionResponse(
+        document_id=document.id,
+        version=document.version,
+        chunks_kept=len(diff.kept),
+        chunks_added=len(diff.added),
+        chunks_removed=len(diff.removed)
+    )
+
+    # The new version is saved: the LLM work below is limited to what changed,
+    # committed item by item so no write lock is held while waiting for the model.
+    # A failure leaves the material smaller, it doesn't fail the upload.
+    new_attributor = ChunkAttributor(added)
+    for quiz in quizzes:
+        kept, removed, replaced = await replace_questions(
+            quiz, stale, added_text, new_attributor, document, current_user.id, response.errors
+        )
+        db.commit()
+        response.questions_kept += kept
+        response.questions_removed += removed
+        response.questions_added += replaced
+    for flashcard_set in flashcard_sets:
+        kept, removed, replaced = await replace_flashcards(
+            flashcard_set, stale, added_text, new_attributor, document, current_user.id, response.errors
+        )
+        db.commit()
+        response.flashcards_kept += kept
+        response.flashcards_removed += removed
+        response.flashcards_added += replaced
+    if diff.added or diff.removed:
+        for summary in summaries:
+            try:
+                summary.content = await llm_service.update_summary(
+                    summary.content, removed_text, added_text, document.title, user_id=current_user.id
+                )
+                touch(summary)
+                db.commit()
+                response.summary_updated = True
+            except Exception as e:
+                response.errors.append(f"Failed to update summary: {str(e)}")
+    pregenerator.schedule(document.id, current_user.id, current_user.pregenerate)
+
+    return response
+
+@router.get("/{document_id}/versions", response_model=List[DocumentVersionItem])
+async def get_document_versions(
+    document_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the upload history of a document, oldest first"""
+    document = db.query(Document).filter(
+        Document.id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return [DocumentVersionItem.model_validate(version) for version in document.versions]
+
+@router.delete("/{document_id}", response_model=MessageResponse)
 async def delete_document(
     document_id: int,
     current_user: User = Depends(get_current_active_user),
@@ -132,6 +576,8 @@ async def delete_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
+    pregenerator.cancel(document_id)
+
     # Delete file from filesystem
     if os.path.exists(document.file_path):
         os.remove(document.file_path)
@@ -139,5 +585,7 @@ async def delete_document(
     # Delete from database
     db.delete(document)
     db.commit()
+    text_store.delete(document_id)
+    vector_index.remove_document(db, current_user.id, document_id)
 
     return {"message": "Document deleted successfully"}
\ No newline at end of file
@@ -1,15 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-from app.core.database import get_db
+from typing import List, Dict, Any, Optional
+import json
+import logging
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
+from app.core.http_cache import make_etag, last_modified_of, cache_headers, is_not_modified
+from app.core.llm_errors import llm_error_event, llm_http_exception
+from app.core.metrics import QUESTION_BANK_QUIZZES
 from app.models.document import Document
 from app.models.user import User
 from app.models.learning_material import Summary, Quiz, QuizQuestion, FlashcardSet, Flashcard
-from app.services.llm_service import LLMService
+from app.schemas.learning_material import (
+    SummaryResponse, QuizResponse, QuizQuestionResponse, QuizAnswerResult, QuizResultResponse,
+    FlashcardResponse, FlashcardSetResponse, FlashcardReviewResponse
+)
+from app.services.document_versions import ChunkAttributor
+from app.services.learning_materials import (
+    DEFAULT_NUM_CARDS, create_flashcard_set, create_summary, grow_question_bank, is_valid_flashcard, is_valid_question,
+    llm_service, make_flashcard, make_question, pregenerator, touch
+)
+from app.services.question_bank import DuplicateFilter, load_bank, record_answers, record_served, sample_questions
+from app.services.vector_index import get_document_chunks
 from app.api.api_v1.endpoints.auth import get_current_active_user
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
-llm_service = LLMService()
+
+class QuizAnswers(BaseModel):
+    answers: Dict[int, str]  # Question id -> chosen letter
 
 def verify_document_ownership(document_id: int, user_id: int, db: Session) -> Document:
     """Verify that user owns the document and return it"""
@@ -21,8 +44,40 @@ def verify_document_ownership(document_id: int, user_id: int, db: Session) -> Do
         raise HTTPException(status_code=404, detail="Document not found")
     return document
 
+def conditional_response(request: Request, response: Response, kind: str, document_id: int,
+                         rows) -> Optional[Response]:
+    """Set ETag/Last-Modified from (id, version, created_at, updated_at) rows; 304 if the client is up to date"""
+    # SQLite reuses the ids of deleted rows: created_at tells a new material
+    # from a deleted one, the kind and document keep ETags unique across endpoints
+    etag = make_etag((kind, document_id, *((row.id, row.version, row.created_at, row.updated_at) for row in rows)))
+    last_modified = last_modified_of(*(row.updated_at or row.created_at for row in rows))
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def question_payload(question: QuizQuestion) -> Dict[str, Any]:
+    """SSE payload of a quiz question"""
+    return {
+        "id": question.id,
+        "question": question.question,
+        "correct_answer": question.correct_answer,
+        "options": question.options,
+        "explanation": question.explanation
+    }
+
+def sse_event(event: str, data: Any) -> str:
+    """Format a Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"  # Stop nginx from buffering the event stream
+}
+
 # Summary endpoints
-@router.post("/summaries/{document_id}", response_model=dict)
+@router.post("/summaries/{document_id}", response_model=SummaryResponse)
 async def generate_summary(
     document_id: int,
     current_user: User = Depends(get_current_active_user),
@@ -34,174 +89,246 @@ async def generate_summary(
     document = verify_document_ownership(document_id, current_user.id, db)
 
     # Check if summary already exists
+    await pregenerator.claim(document_id, "summary")
     existing_summary = db.query(Summary).filter(Summary.document_id == document_id).first()
     if existing_summary:
-        return {
-            "id": existing_summary.id,
-            "title": existing_summary.title,
-            "content": existing_summary.content,
-            "created_at": existing_summary.created_at
-        }
+        return SummaryResponse.model_validate(existing_summary)
 
     try:
-        # Generate summary using LLM
-        summary_content = await llm_service.generate_summary(document.content, document.title)
-
-        # Save to database
-        summary = Summary(
-            document_id=document_id,
-            title=f"Summary of {document.title}",
-            content=summary_content
-        )
-        db.add(summary)
-        db.commit()
-        db.refresh(summary)
-
-        return {
-            "id": summary.id,
-            "title": summary.title,
-            "content": summary.content,
-            "created_at": summary.created_at
-        }
+        summary = await create_summary(db, document, current_user.id)
+        return SummaryResponse.model_validate(summary)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate summary: {str(e)}")
+        raise llm_http_exception(e, "Failed to generate summary")
 
-@router.get("/summaries/{document_id}", response_model=dict)
+@router.get("/summaries/{document_id}", response_model=SummaryResponse)
 async def get_summary(
     document_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get summary for a document"""
-    # Verify document ownership first
-    verify_document_ownership(document_id, current_user.id, db)
-
-    summary = db.query(Summary).filter(Summary.document_id == document_id).first()
-    if not summary:
+    """Get summary for a document (supports If-None-Match / If-Modified-Since)"""
+    # Ownership and version in one query, without loading the content
+    version = db.query(Summary.id, Summary.version, Summary.created_at, Summary.updated_at).join(Document).filter(
+        Summary.document_id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    if not version:
+        verify_document_ownership(document_id, current_user.id, db)
         raise HTTPException(status_code=404, detail="Summary not found")
 
-    return {
-        "id": summary.id,
-        "title": summary.title,
-        "content": summary.content,
-        "created_at": summary.created_at
-    }
+    not_modified = conditional_response(request, response, "summary", document_id, [version])
+    if not_modified:
+        return not_modified
 
-# Quiz endpoints
-@router.post("/quizzes/{document_id}", response_model=dict)
+    summary = db.query(Summary).filter(Summary.id == version.id).first()
+    return SummaryResponse.model_validate(summary)
+
+# Quiz endpoints: quizzes are sampled from the document's question bank (app/services/question_bank.py)
+def needs_new_questions(fresh: int, bank_size: int, num_questions: int) -> bool:
+    """Call the LLM only when the user is short of unseen or weak questions and the bank has room"""
+    return fresh < num_questions and bank_size < settings.QUESTION_BANK_MAX_QUESTIONS
+
+@router.post("/quizzes/{document_id}", response_model=QuizResponse)
 async def generate_quiz(
     document_id: int,
-    num_questions: int = 5,
+    num_questions: int = Query(5, ge=1, le=50),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Generate a quiz for a document"""
+    """Start a quiz: questions of the document's bank the user hasn't seen or got wrong first.
+
+    New questions are generated, and kept in the bank, only when there aren't enough of those.
+    """
 
     # Verify document ownership
     document = verify_document_ownership(document_id, current_user.id, db)
 
-    # Check if quiz already exists
-    existing_quiz = db.query(Quiz).filter(Quiz.document_id == document_id).first()
-    if existing_quiz:
-        # Return existing quiz with questions
-        questions_data = []
-        for question in existing_quiz.questions:
-            questions_data.append({
-                "id": question.id,
-                "question": question.question,
-                "correct_answer": question.correct_answer,
-                "options": question.options,
-                "explanation": question.explanation
-            })
-
-        return {
-            "id": existing_quiz.id,
-            "title": existing_quiz.title,
-            "questions": questions_data,
-            "created_at": existing_quiz.created_at
-        }
-
-    try:
-        # Generate quiz using LLM
-        quiz_questions = await llm_service.generate_quiz(document.content, document.title, num_questions)
-
-        # Create quiz
-        quiz = Quiz(
-            document_id=document_id,
-            title=f"Quiz for {document.title}",
-            num_questions=num_questions
-        )
-        db.add(quiz)
-        db.commit()
-        db.refresh(quiz)
-
-        # Create quiz questions
-        questions_data = []
-        for i, question_data in enumerate(quiz_questions):
-            quiz_question = QuizQuestion(
-                quiz_id=quiz.id,
-                question=question_data["question"],
-                correct_answer=question_data["correct_answer"],
-                options=question_data["options"],
-                explanation=question_data.get("explanation", ""),
-                order_index=i
+    await pregenerator.claim(document_id, "quiz")
+    rows = load_bank(db, document_id, current_user.id)
+    sample = sample_questions(rows, num_questions)
+    source = "bank"
+    if needs_new_questions(sample.fresh, len(rows), num_questions):
+        try:
+            added = await grow_question_bank(
+                db, document, [question for question, _ in rows],
+                max(num_questions, settings.QUESTION_BANK_BATCH_SIZE), current_user.id
             )
-            db.add(quiz_question)
-            questions_data.append({
-                "question": quiz_question.question,
-                "correct_answer": quiz_question.correct_answer,
-                "options": quiz_question.options,
-                "explanation": quiz_question.explanation
-            })
-
-        db.commit()
-
-        return {
-            "id": quiz.id,
-            "title": quiz.title,
-            "questions": questions_data,
-            "created_at": quiz.created_at
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate quiz: {str(e)}")
+            source = "generated"
+        except Exception as e:
+            if not rows:
+                raise llm_http_exception(e, "Failed to generate quiz")
+            # Questions seen before are better than no quiz
+            logger.info("question_bank document=%s generation failed, serving the bank: %s", document_id, e)
+            db.rollback()
+            added = []
+            source = "fallback"
+        rows += [(question, None) for question in added]
+        sample = sample_questions(rows, num_questions)
+    if not sample.questions:
+        raise HTTPException(status_code=500, detail="Failed to generate quiz: no valid question in the model's answer")
+    QUESTION_BANK_QUIZZES.labels(source).inc()
+
+    quiz = rows[0][0].quiz
+    response = QuizResponse(
+        id=quiz.id,
+        title=quiz.title,
+        questions=[QuizQuestionResponse.model_validate(question) for question in sample.questions],
+        created_at=quiz.created_at
+    )
+    record_served(db, current_user.id, [question.id for question in sample.questions])
+    db.commit()
+    return response
 
-@router.get("/quizzes/{document_id}", response_model=List[dict])
+@router.post("/quizzes/{document_id}/stream")
+async def stream_quiz(
+    document_id: int,
+    num_questions: int = Query(5, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Start a quiz like POST /quizzes/{document_id}, streaming each question as Server-Sent Events.
+
+    Questions from the bank come first. New ones are saved as soon as the
+    model finishes writing each, so a broken stream still leaves the valid
+    prefix in the database.
+    """
+    document = verify_document_ownership(document_id, current_user.id, db)
+    await pregenerator.claim(document_id, "quiz")
+    rows = load_bank(db, document_id, current_user.id)
+    sample = sample_questions(rows, num_questions)
+    generate = needs_new_questions(sample.fresh, len(rows), num_questions)
+    # The fresh questions of the sample (all of it when nothing is generated), then the new
+    # ones, topped up with the rest of the sample if the model comes short
+    first = [question_payload(q) for q in (sample.questions[:sample.fresh] if generate else sample.questions)]
+    top_up = [question_payload(q) for q in sample.questions[sample.fresh:]] if generate else []
+    known = [question.question for question, _ in rows]
+    quiz_id = rows[0][0].quiz_id if rows else None
+    attributor = ChunkAttributor(get_document_chunks(db, document)) if generate else None
+    document_content = document.content
+    document_title = document.title
+    user_id = current_user.id
+
+    async def event_stream():
+        # The request session may be closed before streaming ends: use our own
+        stream_db = SessionLocal()
+        quiz = None
+        created = False
+        saved = 0
+        served: List[int] = []
+        try:
+            if quiz_id:
+                quiz = stream_db.get(Quiz, quiz_id)
+            else:
+                quiz = stream_db.query(Quiz).filter(Quiz.document_id == document_id).order_by(Quiz.id).first()
+            if quiz is None:
+                quiz = Quiz(
+                    document_id=document_id,
+                    title=f"Quiz for {document_title}",
+                    num_questions=num_questions,
+                    generator=llm_service.generator("quiz")
+                )
+                stream_db.add(quiz)
+                stream_db.commit()
+                stream_db.refresh(quiz)
+                created = True
+            yield sse_event("quiz", {"id": quiz.id, "title": quiz.title, "created_at": quiz.created_at})
+            for payload in first:
+                served.append(payload["id"])
+                yield sse_event("question", payload)
+
+            if generate:
+                duplicates = DuplicateFilter(known)
+                room = settings.QUESTION_BANK_MAX_QUESTIONS - len(known)
+                order_index = len(quiz.questions)
+                # A whole batch like POST /quizzes: the questions past num_questions go to the bank only
+                batch = max(num_questions - len(served), settings.QUESTION_BANK_BATCH_SIZE)
+                try:
+                    async for question_data in llm_service.stream_quiz(
+                        document_content, document_title, batch, user_id=user_id, avoid=known
+                    ):
+                        if saved >= room or not is_valid_question(question_data) or not duplicates.is_new(question_data["question"]):
+                            continue
+                        quiz_question = make_question(question_data, attributor, order_index + saved)
+                        quiz.questions.append(quiz_question)
+                        touch(quiz)
+                        stream_db.commit()
+                        stream_db.refresh(quiz_question)
+                        saved += 1
+                        if len(served) < num_questions:
+                            served.append(quiz_question.id)
+                            yield sse_event("question", question_payload(quiz_question))
+                except Exception as e:
+                    yield sse_event("error", llm_error_event(e, saved))
+                for payload in top_up[:max(0, num_questions - len(served))]:
+                    served.append(payload["id"])
+                    yield sse_event("question", payload)
+
+            if served:
+                record_served(stream_db, user_id, served)
+                stream_db.commit()
+            yield sse_event("done", {"id": quiz.id if served else None, "count": len(served)})
+        finally:
+            # Don't leave an empty quiz behind: it would be served as the bank
+            if created and saved == 0:
+                stream_db.delete(quiz)
+                stream_db.commit()
+            stream_db.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/quizzes/{document_id}", response_model=List[QuizResponse])
 async def get_quizzes(
     document_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get all quizzes for a document"""
+    """Get all quizzes for a document, i.e. its whole question bank (supports If-None-Match / If-Modified-Since)"""
     # Verify document ownership first
     verify_document_ownership(document_id, current_user.id, db)
 
+    versions = db.query(Quiz.id, Quiz.version, Quiz.created_at, Quiz.updated_at).filter(
+        Quiz.document_id == document_id
+    ).order_by(Quiz.id).all()
+    not_modified = conditional_response(request, response, "quizzes", document_id, versions)
+    if not_modified:
+        return not_modified
+
     quizzes = db.query(Quiz).filter(Quiz.document_id == document_id).all()
-    result = []
-    for quiz in quizzes:
-        questions_data = []
-        for question in quiz.questions:
-            questions_data.append({
-                "id": question.id,
-                "question": question.question,
-                "correct_answer": question.correct_answer,
-                "options": question.options,
-                "explanation": question.explanation
-            })
-
-        result.append({
-            "id": quiz.id,
-            "title": quiz.title,
-            "questions": questions_data,
-            "created_at": quiz.created_at
-        })
-
-    return result
+    return [QuizResponse.model_validate(quiz) for quiz in quizzes]
+
+@router.post("/quizzes/{document_id}/answers", response_model=QuizResultResponse)
+async def submit_quiz_answers(
+    document_id: int,
+    quiz_answers: QuizAnswers,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Grade a quiz; the questions answered wrong come back in the next quizzes"""
+    verify_document_ownership(document_id, current_user.id, db)
+
+    graded = record_answers(db, current_user.id, document_id, quiz_answers.answers)
+    results = [
+        QuizAnswerResult(
+            question_id=question.id,
+            correct=correct,
+            correct_answer=question.correct_answer,
+            explanation=question.explanation
+        )
+        for question, correct in graded
+    ]
+    db.commit()
+
+    return QuizResultResponse(correct=sum(result.correct for result in results), total=len(results), results=results)
 
 # Flashcard endpoints
-@router.post("/flashcards/{document_id}", response_model=dict)
+@router.post("/flashcards/{document_id}", response_model=FlashcardSetResponse)
 async def generate_flashcards(
     document_id: int,
-    num_cards: int = 10,
+    num_cards: int = DEFAULT_NUM_CARDS,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -211,96 +338,139 @@ async def generate_flashcards(
     document = verify_document_ownership(document_id, current_user.id, db)
 
     # Check if flashcard set already exists
+    await pregenerator.claim(document_id, "flashcards")
     existing_set = db.query(FlashcardSet).filter(FlashcardSet.document_id == document_id).first()
     if existing_set:
         # Return existing flashcard set
-        flashcards_data = []
-        for flashcard in existing_set.flashcards:
-            flashcards_data.append({
-                "id": flashcard.id,
-                "front": flashcard.front,
-                "back": flashcard.back,
-                "difficulty": flashcard.difficulty,
-                "next_review": flashcard.next_review
-            })
-
-        return {
-            "id": existing_set.id,
-            "title": existing_set.title,
-            "message": f"Found {len(flashcards_data)} existing flashcards",
-            "flashcards": flashcards_data
-        }
+        flashcards = [FlashcardResponse.model_validate(flashcard) for flashcard in existing_set.flashcards]
+        return FlashcardSetResponse(
+            id=existing_set.id,
+            title=existing_set.title,
+            message=f"Found {len(flashcards)} existing flashcards",
+            flashcards=flashcards
+        )
 
     try:
-        # Generate flashcards using LLM
-        flashcard_data = await llm_service.generate_flashcards(document.content, document.title, num_cards)
-
-        # Create flashcard set
-        flashcard_set = FlashcardSet(
-            document_id=document_id,
-            title=f"Flashcards for {document.title}",
-            num_cards=num_cards
+        flashcard_set = await create_flashcard_set(db, document, num_cards, current_user.id)
+        flashcards = [FlashcardResponse.model_validate(flashcard) for flashcard in flashcard_set.flashcards]
+        return FlashcardSetResponse(
+            id=flashcard_set.id,
+            title=flashcard_set.title,
+            message=f"Generated {len(flashcards)} flashcards",
+            flashcards=flashcards
         )
-        db.add(flashcard_set)
-        db.commit()
-        db.refresh(flashcard_set)
-
-        # Create flashcards
-        flashcards_data = []
-        for i, card_data in enumerate(flashcard_data):
-            flashcard = Flashcard(
-                flashcard_set_id=flashcard_set.id,
-                front=card_data["front"],
-                back=card_data["back"],
-                order_index=i
-            )
-            db.add(flashcard)
-            flashcards_data.append({
-                "front": flashcard.front,
-                "back": flashcard.back,
-                "difficulty": flashcard.difficulty,
-                "next_review": flashcard.next_review
-            })
-
-        db.commit()
-
-        return {
-            "id": flashcard_set.id,
-            "title": flashcard_set.title,
-            "message": f"Generated {len(flashcards_data)} flashcards",
-            "flashcards": flashcards_data
-        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate flashcards: {str(e)}")
+        raise llm_http_exception(e, "Failed to generate flashcards")
 
-@router.get("/flashcards/{document_id}", response_model=List[dict])
-async def get_flashcards(
+@router.post("/flashcards/{document_id}/stream")
+async def stream_flashcards(
     document_id: int,
+    num_cards: int = DEFAULT_NUM_CARDS,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get all flashcards for a document"""
-    # Verify document ownership first
-    verify_document_ownership(document_id, current_user.id, db)
+    """Generate flashcards and stream each card as Server-Sent Events.
 
-    flashcard_set = db.query(FlashcardSet).filter(FlashcardSet.document_id == document_id).first()
-    if not flashcard_set:
+    Every card is saved as soon as the model finishes writing it, so a
+    broken stream still leaves the valid prefix in the database.
+    """
+    document = verify_document_ownership(document_id, current_user.id, db)
+    await pregenerator.claim(document_id, "flashcards")
+    existing_set = db.query(FlashcardSet).filter(FlashcardSet.document_id == document_id).first()
+    existing_set_id = existing_set.id if existing_set else None
+    attributor = None if existing_set_id else ChunkAttributor(get_document_chunks(db, document))
+    document_content = document.content
+    document_title = document.title
+    user_id = current_user.id
+
+    async def event_stream():
+        # The request session may be closed before streaming ends: use our own
+        stream_db = SessionLocal()
+        flashcard_set = None
+        saved = 0
+        try:
+            if existing_set_id:
+                flashcard_set = stream_db.query(FlashcardSet).filter(FlashcardSet.id == existing_set_id).first()
+                yield sse_event("flashcard_set", {"id": flashcard_set.id, "title": flashcard_set.title})
+                for flashcard in flashcard_set.flashcards:
+                    saved += 1
+                    yield sse_event("flashcard", {
+                        "id": flashcard.id,
+                        "front": flashcard.front,
+                        "back": flashcard.back,
+                        "difficulty": flashcard.difficulty,
+                        "next_review": flashcard.next_review
+                    })
+                yield sse_event("done", {"id": flashcard_set.id, "count": saved})
+                return
+
+            flashcard_set = FlashcardSet(
+                document_id=document_id,
+                title=f"Flashcards for {document_title}",
+                num_cards=num_cards,
+                generator=llm_service.generator("flashcards")
+            )
+            stream_db.add(flashcard_set)
+            stream_db.commit()
+            stream_db.refresh(flashcard_set)
+            yield sse_event("flashcard_set", {"id": flashcard_set.id, "title": flashcard_set.title})
+
+            try:
+                async for card_data in llm_service.stream_flashcards(document_content, document_title, num_cards, user_id=user_id):
+                    if not is_valid_flashcard(card_data):
+                        continue
+                    flashcard = make_flashcard(card_data, attributor, saved)
+                    flashcard_set.flashcards.append(flashcard)
+                    touch(flashcard_set)
+                    stream_db.commit()
+                    stream_db.refresh(flashcard)
+                    saved += 1
+                    yield sse_event("flashcard", {
+                        "id": flashcard.id,
+                        "front": flashcard.front,
+                        "back": flashcard.back,
+                        "difficulty": flashcard.difficulty,
+                        "next_review": flashcard.next_review
+                    })
+            except Exception as e:
+                yield sse_event("error", llm_error_event(e, saved))
+
+            yield sse_event("done", {"id": flashcard_set.id if saved else None, "count": saved})
+        finally:
+            # Don't leave an empty set behind: it would be served as "existing"
+            if flashcard_set is not None and not existing_set_id and saved == 0:
+                stream_db.delete(flashcard_set)
+                stream_db.commit()
+            stream_db.close()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/flashcards/{document_id}", response_model=List[FlashcardResponse])
+async def get_flashcards(
+    document_id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get all flashcards for a document (supports If-None-Match / If-Modified-Since)"""
+    # Ownership and version in one query, without loading the cards
+    version = db.query(FlashcardSet.id, FlashcardSet.version, FlashcardSet.created_at, FlashcardSet.updated_at).join(Document).filter(
+        FlashcardSet.document_id == document_id,
+        Document.user_id == current_user.id
+    ).first()
+    if not version:
+        verify_document_ownership(document_id, current_user.id, db)
         return []
 
-    flashcards = flashcard_set.flashcards
-    return [
-        {
-            "id": card.id,
-            "front": card.front,
-            "back": card.back,
-            "difficulty": card.difficulty,
-            "next_review": card.next_review,
-            "created_at": card.created_at
-        }
-        for card in flashcards
-    ]
+    not_modified = conditional_response(request, response, "flashcards", document_id, [version])
+    if not_modified:
+        return not_modified
+
+    flashcard_set = db.query(FlashcardSet).filter(FlashcardSet.id == version.id).first()
+    return [FlashcardResponse.model_validate(card) for card in flashcard_set.flashcards]
 
-@router.put("/flashcards/{flashcard_id}/review")
+@router.put("/flashcards/{flashcard_id}/review", response_model=FlashcardReviewResponse)
 async def review_flashcard(
     flashcard_id: int,
     difficulty: int,  # 0 = easy, 1 = normal, 2 = hard
@@ -331,7 +501,8 @@ async def review_flashcard(
 
     flashcard.difficulty = difficulty_str
     flashcard.next_review = datetime.utcnow() + timedelta(days=next_review_days)
+    touch(flashcard_set)
 
     db.commit()
 
-    return {"message": "Flashcard review updated", "next_review": flashcard.next_review}
\ No newline at end of file
+    return FlashcardReviewResponse(message="Flashcard review updated", next_review=flashcard.next_review)
@@ -0,0 +1,74 @@
+from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.models.document import Document, DocumentChunk
+from app.models.user import User
+from app.services.vector_index import vector_index
+from app.services import full_text_search
+from app.api.api_v1.endpoints.auth import get_current_active_user
+
+router = APIRouter()
+
+@router.get("/text", response_model=dict)
+async def text_search(
+    q: str = Query(..., min_length=1),
+    types: Optional[List[str]] = Query(None, description="document, summary, quiz_question, flashcard"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Full-text search with highlighted snippets across documents and learning materials"""
+    unknown = set(types or []) - set(full_text_search.SEARCH_QUERIES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(sorted(unknown))}")
+    try:
+        results = full_text_search.search(db, current_user.id, q, kinds=types, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+    return {"query": q, "results": results}
+
+@router.get("/semantic", response_model=dict)
+async def semantic_search(
+    q: str = Query(..., min_length=1),
+    k: int = Query(10, ge=1, le=100),
+    document_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Find the passages closest to the query across all the user's documents"""
+    try:
+        hits = vector_index.search(db, current_user.id, q, k=k, document_id=document_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+    chunk_ids = [chunk_id for chunk_id, _, _ in hits]
+    rows = db.query(DocumentChunk, Document.title).join(Document).filter(
+        DocumentChunk.id.in_(chunk_ids),
+        Document.user_id == current_user.id
+    ).all() if chunk_ids else []
+    chunks = {chunk.id: (chunk, title) for chunk, title in rows}
+
+    results = []
+    for chunk_id, hit_document_id, score in hits:
+        if chunk_id not in chunks:
+            continue
+        chunk, title = chunks[chunk_id]
+        results.append({
+            "document_id": hit_document_id,
+            "document_title": title,
+            "chunk_index": chunk.chunk_index,
+            "start_offset": chunk.start_offset,
+            "score": round(score, 4),
+            "text": chunk.content
+        })
+    return {"query": q, "results": results}
+
+@router.post("/semantic/reindex")
+async def reindex(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Rebuild the user's semantic index, e.g. after changing the index settings"""
+    index = vector_index.rebuild(db, current_user.id)
+    return {"message": "Index rebuilt", "chunks": len(index)}
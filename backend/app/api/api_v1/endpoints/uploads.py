@@ -0,0 +1,275 @@
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Set, Tuple
+import base64
+import binascii
+import logging
+import os
+import re
+import uuid
+from app.core.database import get_db
+from app.core.config import settings
+from app.models.document import Document, UploadSession
+from app.models.user import User
+from app.schemas.document import DocumentUploadResponse, MessageResponse, UploadSessionResponse
+from app.services.bulk_ingestion import unique_path
+from app.services.upload_store import upload_store, ChunkTooLargeError, ChecksumMismatchError
+from app.api.api_v1.endpoints.auth import get_current_active_user
+from app.api.api_v1.endpoints.documents import document_processor, extract_file, save_document
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Algorithms accepted in the Upload-Checksum header ("<algorithm> <base64 digest>")
+CHECKSUM_ALGORITHMS = {"md5", "sha1", "sha256"}
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Uploads with a chunk being written or being completed, in this process
+_busy: Set[str] = set()
+
+class UploadCreate(BaseModel):
+    filename: str
+    size: int
+    sha256: Optional[str] = None  # Hex digest of the whole file, checked on completion
+
+def upload_to_response(upload: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        upload_id=upload.id,
+        filename=upload.filename,
+        size=upload.size,
+        offset=upload.received_size,
+        chunk_size=settings.UPLOAD_CHUNK_MAX_SIZE,
+        completed=upload.document_id is not None,
+        document_id=upload.document_id,
+        created_at=upload.created_at
+    )
+
+def get_user_upload(db: Session, upload_id: str, user_id: int) -> UploadSession:
+    upload = db.query(UploadSession).filter(
+        UploadSession.id == upload_id,
+        UploadSession.user_id == user_id
+    ).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+def parse_checksum(header: Optional[str]) -> Optional[Tuple[str, bytes]]:
+    """Parse an Upload-Checksum header into (algorithm, digest)"""
+    if not header:
+        return None
+    algorithm, _, encoded = header.strip().partition(" ")
+    algorithm = algorithm.lower()
+    if algorithm not in CHECKSUM_ALGORITHMS:
+        raise HTTPException(status_code=400, detail=f"Unsupported checksum algorithm: {algorithm}")
+    try:
+        return algorithm, base64.b64decode(encoded.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Upload-Checksum digest must be base64")
+
+def purge_expired_uploads(db: Session) -> None:
+    """Remove the sessions (and partial files) idle for longer than the TTL"""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    expired = db.query(UploadSession).filter(
+        func.coalesce(UploadSession.updated_at, UploadSession.created_at) < cutoff
+    ).all()
+    for upload in expired:
+        upload_store.discard(upload.id)
+        db.delete(upload)
+    if expired:
+        db.commit()
+
+@router.post("/", response_model=UploadSessionResponse)
+async def create_upload(
+    request: UploadCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Start a resumable upload, then send the file with PATCH /uploads/{upload_id}"""
+    if not document_processor.get_document_type_from_extension(request.filename):
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported file type. Please upload PDF, DOCX, or Markdown files."
+        )
+    if request.size <= 0:
+        raise HTTPException(status_code=400, detail="size must be positive")
+    if request.size > settings.RESUMABLE_MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail=f"Files are limited to {settings.RESUMABLE_MAX_FILE_SIZE} bytes")
+    sha256 = request.sha256.lower() if request.sha256 else None
+    if sha256 and not SHA256_PATTERN.match(sha256):
+        raise HTTPException(status_code=400, detail="sha256 must be a hex digest")
+
+    purge_expired_uploads(db)
+
+    upload = UploadSession(
+        id=uuid.uuid4().hex,
+        user_id=current_user.id,
+        # Only the name: the client must not choose where the file is written
+        filename=os.path.basename(request.filename),
+        size=request.size,
+        received_size=0,
+        sha256=sha256
+    )
+    try:
+        upload_store.create(upload.id)
+        db.add(upload)
+        db.commit()
+        db.refresh(upload)
+    except Exception as e:
+        upload_store.discard(upload.id)
+        raise HTTPException(status_code=500, detail=f"Failed to create upload: {str(e)}")
+    return upload_to_response(upload)
+
+@router.get("/", response_model=List[UploadSessionResponse])
+async def get_uploads(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the user's unfinished uploads, to resume them"""
+    uploads = db.query(UploadSession).filter(
+        UploadSession.user_id == current_user.id,
+        UploadSession.document_id.is_(None)
+    ).order_by(UploadSession.created_at.desc()).all()
+    return [upload_to_response(upload) for upload in uploads]
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the progress of an upload: the next chunk starts at offset"""
+    return upload_to_response(get_user_upload(db, upload_id, current_user.id))
+
+@router.patch("/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Write the request body at Upload-Offset, which must be the current offset"""
+    upload = get_user_upload(db, upload_id, current_user.id)
+    if upload.document_id is not None:
+        raise HTTPException(status_code=409, detail="Upload already completed")
+    if upload_offset != upload.received_size:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload-Offset {upload_offset} doesn't match the current offset {upload.received_size}"
+        )
+    checksum = parse_checksum(upload_checksum)
+    if upload_id in _busy:
+        raise HTTPException(status_code=409, detail="Another request is writing this upload")
+
+    _busy.add(upload_id)
+    try:
+        limit = min(settings.UPLOAD_CHUNK_MAX_SIZE, upload.size - upload_offset)
+        result = await upload_store.write_chunk(upload_id, upload_offset, request.stream(), limit, checksum)
+    except ChunkTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ChecksumMismatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Upload data is gone, start a new upload")
+    finally:
+        _busy.discard(upload_id)
+
+    # Only moves forward from the offset this chunk was written at (other workers)
+    updated = db.query(UploadSession).filter(
+        UploadSession.id == upload_id,
+        UploadSession.received_size == upload_offset
+    ).update({
+        UploadSession.received_size: upload_offset + result.written,
+        UploadSession.updated_at: func.now()
+    }, synchronize_session=False)
+    db.commit()
+    if not updated:
+        raise HTTPException(status_code=409, detail="Upload was modified concurrently")
+    if result.interrupted:
+        logger.info("upload id=%s interrupted at offset=%s", upload_id, upload_offset + result.written)
+        raise HTTPException(status_code=400, detail="Chunk interrupted, resume from the current offset")
+
+    db.refresh(upload)
+    return upload_to_response(upload)
+
+@router.post("/{upload_id}/complete", response_model=DocumentUploadResponse)
+async def complete_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Check the received file and process it as an uploaded document"""
+    upload = get_user_upload(db, upload_id, current_user.id)
+    if upload.document_id is not None:
+        # Already completed: the client may be retrying after losing the response
+        document = db.query(Document).filter(Document.id == upload.document_id).first()
+        if not document:
+            raise HTTPException(status_code=410, detail="The uploaded document was deleted")
+        return DocumentUploadResponse(
+            message="Document uploaded and processed successfully",
+            document_id=document.id,
+            title=document.title,
+            document_type=document.document_type.value,
+            content_length=len(document.content or "")
+        )
+    if upload.received_size < upload.size:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: {upload.received_size} of {upload.size} bytes received"
+        )
+    if upload_id in _busy:
+        raise HTTPException(status_code=409, detail="Another request is writing this upload")
+
+    _busy.add(upload_id)
+    try:
+        if upload.sha256:
+            digest = await run_in_threadpool(upload_store.sha256, upload_id)
+            if digest != upload.sha256:
+                # Start over: there's no telling which chunk is wrong
+                upload_store.reset(upload_id)
+                upload.received_size = 0
+                db.commit()
+                raise HTTPException(status_code=400, detail="File doesn't match its sha256, upload it again")
+
+        document_type = document_processor.get_document_type_from_extension(upload.filename)
+        # Never overwrite a file already uploaded under the same name
+        file_path = unique_path(settings.UPLOAD_DIR, os.path.basename(upload.filename))
+        try:
+            upload_store.move(upload_id, file_path)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+
+        try:
+            content, page_offsets = await extract_file(file_path, document_type)
+            response = save_document(db, current_user, file_path, upload.filename, document_type, content, page_offsets)
+        except HTTPException:
+            # The file was removed with the failed document: the session can't be resumed
+            db.rollback()
+            db.delete(upload)
+            db.commit()
+            raise
+
+        upload.document_id = response.document_id
+        db.commit()
+        return response
+    finally:
+        _busy.discard(upload_id)
+
+@router.delete("/{upload_id}", response_model=MessageResponse)
+async def cancel_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Cancel an upload and delete the data received so far"""
+    upload = get_user_upload(db, upload_id, current_user.id)
+    upload_store.discard(upload_id)
+    db.delete(upload)
+    db.commit()
+    return {"message": "Upload cancelled"}
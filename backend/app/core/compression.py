@@ -0,0 +1,86 @@
+import gzip
+from typing import List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: fall back to gzip only
+    brotli = None
+
+# Already compressed, or streamed to the client as it is produced (SSE must
+# not be buffered by the compressor)
+SKIPPED_CONTENT_TYPES = ("text/event-stream", "image/", "application/zip", "application/pdf")
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred encoding among the ones the client accepts (brotli, then gzip)"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+class CompressionMiddleware:
+    """Compress complete response bodies above minimum_size with brotli or gzip.
+
+    Streamed responses (more than one body message) are passed through
+    untouched, so event streams and file downloads are never buffered.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 5, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: List[Message] = []
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start.append(message)
+                return
+
+            headers = MutableHeaders(raw=start[0]["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or headers.get("content-type", "").startswith(SKIPPED_CONTENT_TYPES)
+            ):
+                passthrough = True
+                await send(start[0])
+                await send(message)
+                return
+
+            if encoding == "br":
+                body = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                body = gzip.compress(body, compresslevel=self.gzip_level)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start[0])
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict, Any
 import os
 
 class Settings(BaseSettings):
@@ -17,11 +17,90 @@ class Settings(BaseSettings):
     # LLM APIs
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
+    LLM_PROVIDERS: str = "openai,anthropic"  # Order of preference, comma separated ("fake" for offline use)
+    OPENAI_MODEL: str = "gpt-4o-mini"
+    OPENAI_BASE_URL: Optional[str] = None  # OpenAI-compatible server, e.g. benchmarks/fake_llm_server.py
+    ANTHROPIC_MODEL: str = "claude-instant-1.2"
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_STREAM_IDLE_SECONDS: float = 30.0  # Longest silence between two chunks of a stream
+    LLM_HEDGE_ENABLED: bool = False  # Race the next provider when the first one is slow
+    LLM_HEDGE_PERCENTILE: float = 95.0  # Hedge after this percentile of recent latencies
+    LLM_HEDGE_DEFAULT_DELAY: float = 10.0  # Seconds, used until enough latencies are recorded
+    LLM_MAX_RETRIES: int = 2  # Retries per provider on transient errors (timeouts, 429, 5xx)
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5  # Jittered exponential backoff between retries
+    LLM_BACKOFF_MAX_SECONDS: float = 8.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures before a provider is skipped
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # Time before a probe request is let through
+    LLM_MAX_CONCURRENCY: int = 8  # LLM calls in flight across all users
+    LLM_BATCH_MAX_CONCURRENCY: int = 6  # Slots generation may use, the rest is kept for chat
+    LLM_MAX_QUEUE_DEPTH: int = 50  # Waiting calls per lane before shedding with 503
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 30.0
+    LLM_USER_TOKENS_PER_MINUTE: int = 200000  # Per-user quota (0 disables it), 429 when exceeded
+    LLM_USER_TOKEN_BURST: int = 400000
+    LLM_BACKGROUND_MAX_CONCURRENCY: int = 1  # Slots speculative pre-generation may use, only when nothing else waits
+    LLM_BACKGROUND_QUEUE_TIMEOUT_SECONDS: float = 600.0
+    FAKE_LLM_LATENCY_MS: int = 200
+    FAKE_LLM_FAILURE_RATE: float = 0.0
+
+    # Per-task routing overrides (see llm_routing.DEFAULT_TASK_ROUTES): token limits,
+    # temperature, timeout (seconds) and model per provider, e.g.
+    # {"chat": {"max_tokens": 600, "models": {"openai": "gpt-4o-mini"}}}
+    LLM_TASK_ROUTES: Dict[str, Dict[str, Any]] = {}
+    # USD per million tokens, used to estimate the cost of each task
+    LLM_MODEL_PRICES: Dict[str, Dict[str, float]] = {
+        "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+        "gpt-4o": {"input": 2.50, "output": 10.00},
+        "claude-instant-1.2": {"input": 0.80, "output": 2.40},
+    }
+
+    # Chat memory: turns kept verbatim (up to twice as many before older ones are summarized)
+    CHAT_MEMORY_TURNS: int = 4
+    CHAT_MEMORY_MESSAGE_CHARS: int = 2000  # Longer past messages are truncated in the prompt
+
+    # Semantic search: documents are split in chunks, embedded by feature hashing
+    # and stored per user as one (int8-quantized) matrix
+    CHUNK_MAX_CHARS: int = 1000
+    VECTOR_INDEX_DIR: str = "vector_index"
+    VECTOR_INDEX_DIM: int = 512
+    VECTOR_INDEX_QUANTIZE: bool = True
+    VECTOR_INDEX_CACHE_USERS: int = 100  # Indexes kept in memory
+
+    # Profiling (enabled at runtime from /api/v1/admin/profiling)
+    PROFILE_DIR: str = "profiles"
+    PROFILE_INTERVAL_SECONDS: float = 0.001
+
+    # Responses larger than this are compressed (brotli or gzip)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    # Extracted text, stored per document for ranged reads (GET /documents/{id}/content)
+    TEXT_STORE_DIR: str = "text_store"
+    CONTENT_SLICE_MAX_CHARS: int = 100000
 
     # File upload settings
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
 
+    # Resumable uploads (/api/v1/uploads): chunks are appended to a partial file
+    UPLOAD_PARTIAL_DIR: str = "uploads/partial"
+    RESUMABLE_MAX_FILE_SIZE: int = 1024 * 1024 * 1024  # 1GB
+    UPLOAD_CHUNK_MAX_SIZE: int = 64 * 1024 * 1024  # Largest body of one PATCH
+    UPLOAD_SESSION_TTL_HOURS: int = 24  # Idle sessions are removed after this
+
+    # Bulk uploads (POST /documents/bulk): files and ZIP archives, extracted by worker processes
+    BULK_INGEST_WORKERS: int = 4
+    BULK_MAX_FILES: int = 100  # Documents per bulk upload, archive members included
+    BULK_MAX_TOTAL_SIZE: int = 1024 * 1024 * 1024  # Bytes written, after decompression
+
+    # Pre-generation of the materials a user opted in to (PUT /auth/me/pregeneration)
+    # after each upload, in the LLM scheduler's background lane
+    PREGENERATION_ENABLED: bool = True
+
+    # Question bank: quizzes are sampled from the questions generated so far for a document,
+    # the LLM is only called when the user has no unseen or weak question left and the bank has room
+    QUESTION_BANK_MAX_QUESTIONS: int = 100
+    QUESTION_BANK_BATCH_SIZE: int = 10  # Questions asked per LLM call (the document is the bulk of the prompt)
+    QUESTION_BANK_DUPLICATE_SIMILARITY: float = 0.85  # Cosine of question texts above which a new one is a duplicate
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,47 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Dict
+from fastapi import Request
+
+# Responses depend on the user: only the client may cache them, and it must
+# revalidate each time (a 304 costs one small query)
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(parts: Iterable) -> str:
+    """Weak ETag of the row versions a response is built from"""
+    digest = hashlib.sha1(repr(tuple(parts)).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes in UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def last_modified_of(*timestamps: Optional[datetime]) -> Optional[datetime]:
+    values = [_as_utc(value) for value in timestamps if value is not None]
+    return max(values) if values else None
+
+def cache_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(microsecond=0), usegmt=True)
+    return headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when there is no If-None-Match"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison: W/"x" matches "x"
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
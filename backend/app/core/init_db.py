@@ -1,10 +1,12 @@
 from app.core.database import engine, Base
 from app.models.document import Document, DocumentType
 from app.models.learning_material import Summary, Quiz, Flashcard
+from app.models.chat import ChatSession, ChatMessage
+from app.core.migrations import upgrade_database
 
 def create_tables():
-    """Create all database tables"""
-    Base.metadata.create_all(bind=engine)
+    """Create or migrate all database tables (alembic upgrade head)"""
+    upgrade_database(engine)
     print("Database tables created successfully!")
 
 if __name__ == "__main__":
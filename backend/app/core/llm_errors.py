@@ -0,0 +1,32 @@
+import math
+from typing import Any, Dict
+from fastapi import HTTPException
+from app.services.llm_providers import LLMTimeoutError, LLMUnavailableError
+from app.services.llm_scheduler import AdmissionError
+
+def llm_http_exception(error: Exception, message: str) -> HTTPException:
+    """Map an LLM failure to an HTTP error clients can act on"""
+    if isinstance(error, AdmissionError):
+        # Quota exceeded (429) or queue full (503): shed load right away
+        return HTTPException(
+            status_code=error.status_code,
+            detail=f"{message}: {str(error)}",
+            headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+        )
+    if isinstance(error, LLMUnavailableError):
+        # Providers are failing: tell clients when to come back instead of retrying now
+        return HTTPException(
+            status_code=503,
+            detail=f"{message}: {str(error)}",
+            headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+        )
+    if isinstance(error, LLMTimeoutError):
+        return HTTPException(status_code=504, detail=f"{message}: {str(error)}")
+    return HTTPException(status_code=500, detail=f"{message}: {str(error)}")
+
+def llm_error_event(error: Exception, saved: int) -> Dict[str, Any]:
+    """Payload of the SSE error event sent when generation stops"""
+    data = {"detail": str(error), "saved": saved}
+    if isinstance(error, (LLMUnavailableError, AdmissionError)):
+        data["retry_after"] = max(1, math.ceil(error.retry_after))
+    return data
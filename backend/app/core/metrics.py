@@ -0,0 +1,131 @@
+import asyncio
+import os
+import time
+from fastapi import Request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from sqlalchemy import event
+from app.core.timing import record_stage
+
+# HTTP
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served")
+
+# LLM
+LLM_REQUESTS = Counter(
+    "llm_requests_total", "LLM calls", ["task", "provider", "model", "outcome"]
+)
+LLM_REQUEST_DURATION = Histogram(
+    "llm_request_duration_seconds", "LLM call latency", ["task", "provider", "model"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "LLM tokens", ["task", "provider", "model", "kind"]
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total", "LLM calls that failed on every provider", ["task", "error"]
+)
+PREGENERATION_JOBS = Counter(
+    "pregeneration_jobs_total", "Background generation jobs run after an upload", ["material", "outcome"]
+)
+QUESTION_BANK_QUIZZES = Counter(
+    "question_bank_quizzes_total", "Quizzes served from the question bank, by whether the LLM was called", ["source"]
+)
+
+# Document ingestion
+EXTRACTION_DURATION = Histogram(
+    "document_extraction_duration_seconds", "Text extraction time", ["document_type"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+EXTRACTION_BYTES = Histogram(
+    "document_extraction_input_bytes", "Size of the files extracted", ["document_type"],
+    buckets=(10e3, 100e3, 500e3, 1e6, 5e6, 10e6, 50e6, 100e6)
+)
+EXTRACTION_ERRORS = Counter(
+    "document_extraction_errors_total", "Failed text extractions", ["document_type"]
+)
+EXTRACTION_PDF_PAGES = Counter(
+    "document_extraction_pdf_pages_total", "PDF pages extracted, by extractor and why it was used", ["extractor", "reason"]
+)
+
+# Database
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ["operation"])
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "SQL statement latency", ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+
+# Event loop: a high lag means something is blocking the loop
+EVENT_LOOP_LAG = Gauge("event_loop_lag_seconds", "Latest event loop scheduling delay")
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    "event_loop_lag_distribution_seconds", "Event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+
+def route_label(request: Request) -> str:
+    """Route template (/documents/{document_id}) so label cardinality stays bounded"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+async def metrics_middleware(request: Request, call_next):
+    """Count requests and time them per route"""
+    start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        route = route_label(request)
+        HTTP_REQUEST_DURATION.labels(request.method, route).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(request.method, route, str(status)).inc()
+
+def instrument_engine(engine) -> None:
+    """Count and time every SQL statement run by the engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start_time"].pop()
+        duration = time.perf_counter() - start
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERIES.labels(operation).inc()
+        DB_QUERY_DURATION.labels(operation).observe(duration)
+        record_stage("db", duration)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        starts = exception_context.connection.info.get("query_start_time") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Measure how late the loop wakes us up; runs until cancelled"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - expected)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
+
+def metrics_response() -> Response:
+    """Prometheus exposition, aggregated across workers in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
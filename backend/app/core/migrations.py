@@ -0,0 +1,41 @@
+import os
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from app.core.database import engine as default_engine
+from app.services.full_text_search import FTS_TABLES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Schema as created by create_all before migrations existed
+BASELINE_REVISION = "0001"
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Leave the FTS5 tables (and their shadow tables) out of autogenerate"""
+    if type_ == "table" and any(name == fts or name.startswith(f"{fts}_") for fts in FTS_TABLES):
+        return False
+    return True
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.attributes["configure_logger"] = False
+    return config
+
+def upgrade_database(engine: Optional[Engine] = None, revision: str = "head") -> None:
+    """Migrate the database to the given revision (the latest by default).
+
+    Databases created with create_all have no alembic_version table: they are
+    stamped at the baseline first, and the following migrations skip the
+    tables and columns that already exist.
+    """
+    engine = engine or default_engine
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "users" in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
@@ -0,0 +1,100 @@
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from fastapi import Request
+from app.core.config import settings
+
+class RequestProfiler:
+    """Profile sampled requests with pyinstrument and keep the HTML reports on disk"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.sample_rate = 0.0
+        self.path_prefix: Optional[str] = None
+        self.remaining = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.remaining > 0 and self.sample_rate > 0
+
+    def configure(self, sample_rate: float, path_prefix: Optional[str] = None, max_profiles: int = 1) -> None:
+        """Profile this fraction of the requests under path_prefix, until max_profiles are saved"""
+        with self._lock:
+            self.sample_rate = sample_rate
+            self.path_prefix = path_prefix
+            self.remaining = max_profiles
+
+    def disable(self) -> None:
+        with self._lock:
+            self.sample_rate = 0.0
+            self.remaining = 0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "path_prefix": self.path_prefix,
+            "remaining": self.remaining
+        }
+
+    def should_profile(self, path: str) -> bool:
+        if not self.enabled:
+            return False
+        if self.path_prefix and not path.startswith(self.path_prefix):
+            return False
+        if random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+        return True
+
+    def save(self, html: str, method: str, path: str, duration: float) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{method}_{slug}_{duration * 1000:.0f}ms.html"
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        return name
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith(".html"):
+                path = os.path.join(self.directory, name)
+                profiles.append({"name": name, "size_bytes": os.path.getsize(path)})
+        return profiles
+
+    def profile_path(self, name: str) -> Optional[str]:
+        """Path of a saved profile, None for unknown names (and path traversal attempts)"""
+        if os.path.basename(name) != name or not name.endswith(".html"):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+request_profiler = RequestProfiler(settings.PROFILE_DIR)
+
+async def profiling_middleware(request: Request, call_next):
+    """Run the sampling profiler around the requests selected by request_profiler"""
+    if not request_profiler.should_profile(request.url.path):
+        return await call_next(request)
+
+    from pyinstrument import Profiler
+    profiler = Profiler(interval=settings.PROFILE_INTERVAL_SECONDS, async_mode="enabled")
+    start = time.perf_counter()
+    profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.stop()
+    name = request_profiler.save(profiler.output_html(), request.method, request.url.path, time.perf_counter() - start)
+    response.headers["X-Profile-Name"] = name
+    return response
@@ -0,0 +1,89 @@
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from fastapi import Request
+
+logger = logging.getLogger("app.timing")
+
+class RequestTimer:
+    """Time spent per stage (auth, db, extract, llm...) while serving one request"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def add(self, name: str, duration: float) -> None:
+        self.stages[name] += duration
+        self.counts[name] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        metrics = [
+            f'{name};dur={duration * 1000:.1f};desc="{self.counts[name]}x"'
+            for name, duration in self.stages.items()
+        ]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+_current_timer: ContextVar[Optional[RequestTimer]] = ContextVar("request_timer", default=None)
+# Time recorded by the stages nested in the innermost open stage
+_nested_time: ContextVar[Optional[List[float]]] = ContextVar("nested_stage_time", default=None)
+
+def current_timer() -> Optional[RequestTimer]:
+    return _current_timer.get()
+
+def record_stage(name: str, duration: float) -> None:
+    """Add a duration to the current request, if any (no-op in scripts and background tasks)"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, duration)
+        nested = _nested_time.get()
+        if nested is not None:
+            nested[0] += duration
+
+@contextmanager
+def stage(name: str):
+    """Time a block of code as a stage of the current request.
+
+    Only its own time is recorded: the stages inside it (db queries...)
+    are left out, so that the stages of a request add up to at most its total.
+    """
+    nested = [0.0]
+    token = _nested_time.set(nested)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        _nested_time.reset(token)
+        record_stage(name, max(0.0, duration - nested[0]))
+
+async def timing_middleware(request: Request, call_next):
+    """Expose stage timings as a Server-Timing header and a structured log line"""
+    timer = RequestTimer()
+    token = _current_timer.set(timer)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_timer.reset(token)
+    # Streamed bodies (SSE) are still being produced here: the timings cover
+    # the work done before the first byte
+    total = timer.elapsed()
+    response.headers["Server-Timing"] = timer.server_timing(total)
+    route = request.scope.get("route")
+    logger.info(
+        "request method=%s route=%s status=%d total_ms=%.1f %s",
+        request.method,
+        getattr(route, "path", request.url.path),
+        response.status_code,
+        total * 1000,
+        " ".join(f"{name}_ms={duration * 1000:.1f}" for name, duration in timer.stages.items())
+    )
+    return response
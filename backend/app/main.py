@@ -2,17 +2,28 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import metrics_middleware, metrics_response, monitor_event_loop_lag
+from app.core.timing import timing_middleware
+from app.core.profiling import profiling_middleware
 from app.api.api_v1.api import api_router
+from app.services.bulk_ingestion import extraction_pool
+from app.services.learning_materials import pregenerator
 
 app = FastAPI(
     title="AI Knowledge Tutor",
     description="Platform for transforming course documents into learning materials",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Allow all origins for development (mobile app support)
@@ -21,8 +32,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.middleware("http")(profiling_middleware)
+app.middleware("http")(timing_middleware)
+app.middleware("http")(metrics_middleware)
+
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def start_event_loop_monitor():
+    app.state.loop_lag_task = asyncio.create_task(monitor_event_loop_lag())
+
+@app.on_event("shutdown")
+async def stop_event_loop_monitor():
+    app.state.loop_lag_task.cancel()
+
+@app.on_event("shutdown")
+async def stop_extraction_workers():
+    extraction_pool.shutdown()
+
+@app.on_event("shutdown")
+async def stop_pregeneration():
+    pregenerator.shutdown()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (not proxied by nginx: scrape the backend port directly)"""
+    return metrics_response()
+
 @app.get("/")
 async def root():
     return {"message": "AI Knowledge Tutor API"}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, JSON, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -18,7 +18,10 @@ class Document(Base):
     file_path = Column(String(500), nullable=False)
     document_type = Column(SQLEnum(DocumentType), nullable=False)
     content = Column(Text, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    page_offsets = Column(JSON, nullable=True)  # Start of each page in content (PDF only)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped by each re-upload
+    file_sha256 = Column(String(64), nullable=True)  # Digest of the uploaded file: re-uploading it again is a no-op
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -26,4 +29,50 @@ class Document(Base):
     owner = relationship("User", back_populates="documents")
     summaries = relationship("Summary", back_populates="document", cascade="all, delete-orphan")
     quizzes = relationship("Quiz", back_populates="document", cascade="all, delete-orphan")
-    flashcard_sets = relationship("FlashcardSet", back_populates="document", cascade="all, delete-orphan")
\ No newline at end of file
+    flashcard_sets = relationship("FlashcardSet", back_populates="document", cascade="all, delete-orphan")
+    chat_sessions = relationship("ChatSession", back_populates="document", cascade="all, delete-orphan")
+    chunks = relationship("DocumentChunk", back_populates="document", cascade="all, delete-orphan", order_by="DocumentChunk.chunk_index")
+    versions = relationship("DocumentVersion", back_populates="document", cascade="all, delete-orphan", order_by="DocumentVersion.version")
+
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    chunk_index = Column(Integer, nullable=False)
+    start_offset = Column(Integer, nullable=False)  # Position in documents.content
+    content = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=True)  # sha256 of content: matches chunks across versions
+
+    document = relationship("Document", back_populates="chunks")
+
+class DocumentVersion(Base):
+    """One upload of a document, with how much of the previous version it kept"""
+    __tablename__ = "document_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    version = Column(Integer, nullable=False)
+    filename = Column(String(255), nullable=False)
+    file_sha256 = Column(String(64), nullable=True)
+    content_length = Column(Integer, nullable=False, default=0)
+    chunks_kept = Column(Integer, nullable=False, default=0)
+    chunks_added = Column(Integer, nullable=False, default=0)
+    chunks_removed = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    document = relationship("Document", back_populates="versions")
+
+class UploadSession(Base):
+    """Resumable upload: the bytes received so far are in settings.UPLOAD_PARTIAL_DIR"""
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)  # Random hex, also names the partial file
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    received_size = Column(BigInteger, nullable=False, default=0)
+    sha256 = Column(String(64), nullable=True)  # Expected digest of the whole file, checked on completion
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)  # Set once completed
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -13,9 +13,11 @@ class Summary(Base):
     __tablename__ = "summaries"
 
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped whenever the material or its items change (ETags)
+    generator = Column(String(100), nullable=True)  # Prompt version and model it was generated with (LLMService.generator)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -25,9 +27,11 @@ class Quiz(Base):
     __tablename__ = "quizzes"
 
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
     title = Column(String(255), nullable=False)
     num_questions = Column(Integer, default=5)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    generator = Column(String(100), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -38,22 +42,42 @@ class QuizQuestion(Base):
     __tablename__ = "quiz_questions"
 
     id = Column(Integer, primary_key=True, index=True)
-    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
     question = Column(Text, nullable=False)
     correct_answer = Column(String(1), nullable=False)  # A, B, C, or D
     options = Column(JSON, nullable=False)  # {"A": "option1", "B": "option2", ...}
     explanation = Column(Text)
     order_index = Column(Integer, default=0)
+    source_chunk_hash = Column(String(64), nullable=True)  # content_hash of the chunk the question was written from
 
     quiz = relationship("Quiz", back_populates="questions")
+    stats = relationship("QuestionStat", back_populates="question", cascade="all, delete-orphan")
+
+class QuestionStat(Base):
+    """How often a question of the bank was served to a user, and how they last answered it"""
+    __tablename__ = "question_stats"
+    __table_args__ = (Index("ix_question_stats_user_id_question_id", "user_id", "question_id", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    question_id = Column(Integer, ForeignKey("quiz_questions.id", ondelete="CASCADE"), nullable=False, index=True)
+    times_served = Column(Integer, nullable=False, default=0)
+    times_correct = Column(Integer, nullable=False, default=0)
+    times_wrong = Column(Integer, nullable=False, default=0)
+    last_answer_correct = Column(Boolean, nullable=True)  # None until answered
+    last_served_at = Column(DateTime(timezone=True), nullable=True)
+
+    question = relationship("QuizQuestion", back_populates="stats")
 
 class FlashcardSet(Base):
     __tablename__ = "flashcard_sets"
 
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
     title = Column(String(255), nullable=False)
     num_cards = Column(Integer, default=10)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    generator = Column(String(100), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -64,12 +88,13 @@ class Flashcard(Base):
     __tablename__ = "flashcards"
 
     id = Column(Integer, primary_key=True, index=True)
-    flashcard_set_id = Column(Integer, ForeignKey("flashcard_sets.id", ondelete="CASCADE"), nullable=False)
+    flashcard_set_id = Column(Integer, ForeignKey("flashcard_sets.id", ondelete="CASCADE"), nullable=False, index=True)
     front = Column(Text, nullable=False)
     back = Column(Text, nullable=False)
     difficulty = Column(String(20), default="medium")  # easy, medium, hard
     order_index = Column(Integer, default=0)
-    next_review = Column(DateTime(timezone=True), server_default=func.now())
+    source_chunk_hash = Column(String(64), nullable=True)  # content_hash of the chunk the card was written from
+    next_review = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     flashcard_set = relationship("FlashcardSet", back_populates="flashcards")
\ No newline at end of file
@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+class DocumentUploadResponse(BaseModel):
+    message: str
+    document_id: int
+    title: str
+    document_type: str
+    content_length: int
+
+class DocumentListItem(BaseModel):
+    id: int
+    title: str
+    filename: str
+    document_type: str
+    created_at: Optional[datetime] = None
+    content_length: int
+    version: int = 1
+
+class DocumentDetail(BaseModel):
+    id: int
+    title: str
+    filename: str
+    document_type: str
+    content: Optional[str] = None
+    created_at: Optional[datetime] = None
+    version: int = 1
+
+class MessageResponse(BaseModel):
+    message: str
+
+class DocumentContentSlice(BaseModel):
+    document_id: int
+    offset: int
+    length: int
+    total_length: int
+    page_count: Optional[int] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    has_more: bool
+    content: str
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    filename: str
+    size: int
+    offset: int  # Bytes received so far: the next chunk starts here
+    chunk_size: int  # Largest chunk accepted by PATCH
+    completed: bool
+    document_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class BulkUploadItem(BaseModel):
+    filename: str
+    source: Optional[str] = None  # ZIP archive the file came from
+    status: str  # processed, failed or skipped
+    document_id: Optional[int] = None
+    title: Optional[str] = None
+    document_type: Optional[str] = None
+    content_length: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkUploadResponse(BaseModel):
+    total: int
+    processed: int
+    failed: int
+    skipped: int
+    items: List[BulkUploadItem]
+
+class DocumentVersionItem(BaseModel):
+    version: int
+    filename: str
+    content_length: int
+    chunks_kept: int
+    chunks_added: int
+    chunks_removed: int
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class DocumentVersionResponse(BaseModel):
+    document_id: int
+    version: int
+    unchanged: bool = False  # Same file as the current version: nothing was reprocessed
+    chunks_kept: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    questions_kept: int = 0
+    questions_removed: int = 0
+    questions_added: int = 0
+    flashcards_kept: int = 0
+    flashcards_removed: int = 0
+    flashcards_added: int = 0
+    summary_updated: bool = False
+    errors: List[str] = []  # LLM failures: the new version is saved, the affected material is left smaller
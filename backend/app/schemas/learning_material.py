@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional, List, Dict, Union
+from pydantic import BaseModel
+
+class SummaryResponse(BaseModel):
+    id: int
+    title: str
+    content: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class QuizQuestionResponse(BaseModel):
+    id: Optional[int] = None
+    question: str
+    correct_answer: str
+    options: Union[List[str], Dict[str, str]]
+    explanation: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class QuizResponse(BaseModel):
+    id: int
+    title: str
+    questions: List[QuizQuestionResponse]
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class QuizAnswerResult(BaseModel):
+    question_id: int
+    correct: bool
+    correct_answer: str
+    explanation: Optional[str] = None
+
+class QuizResultResponse(BaseModel):
+    correct: int
+    total: int
+    results: List[QuizAnswerResult]
+
+class FlashcardResponse(BaseModel):
+    id: Optional[int] = None
+    front: str
+    back: str
+    difficulty: Optional[str] = None
+    next_review: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class FlashcardSetResponse(BaseModel):
+    id: int
+    title: str
+    message: str
+    flashcards: List[FlashcardResponse]
+
+class FlashcardReviewResponse(BaseModel):
+    message: str
+    next_review: datetime
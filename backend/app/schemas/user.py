@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 
 class UserBase(BaseModel):
@@ -17,6 +17,7 @@ class UserResponse(UserBase):
     id: int
     is_active: bool
     created_at: str
+    pregenerate: List[str] = []  # Materials generated in the background after each upload
 
     class Config:
         from_attributes = True
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import BinaryIO, List, Optional, Tuple
+from app.core.config import settings
+from app.models.document import DocumentType
+from app.services.document_processor import DocumentProcessor
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+class BulkLimitError(Exception):
+    """Raised when a bulk upload goes past BULK_MAX_FILES or BULK_MAX_TOTAL_SIZE"""
+
+@dataclass
+class StagedFile:
+    """A file of a bulk upload, saved to disk and waiting for extraction"""
+    filename: str
+    source: Optional[str] = None  # Archive the file came from
+    path: Optional[str] = None
+    document_type: Optional[DocumentType] = None
+    error: Optional[str] = None  # Set when the file is skipped
+
+def _extract(file_path: str, document_type: str) -> Tuple[str, Optional[List[int]], float]:
+    """Runs in a worker process: text, page offsets and extraction time"""
+    start = time.perf_counter()
+    text, page_offsets = DocumentProcessor().extract_document_pages(file_path, DocumentType(document_type))
+    return text, page_offsets, time.perf_counter() - start
+
+class ExtractionPool:
+    """Worker processes extracting documents in parallel.
+
+    Extraction is CPU bound pure Python (pdfplumber, pdfminer), so threads
+    would serialize on the GIL. Workers are spawned on first use and shared
+    by all requests.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process running the event loop and threads isn't safe
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+            return self._pool
+
+    async def extract(self, file_path: str, document_type: DocumentType) -> Tuple[str, Optional[List[int]], float]:
+        """Text, page offsets and extraction time (excluding the wait for a worker)"""
+        pool = self._get_pool()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, _extract, file_path, document_type.value)
+        except BrokenProcessPool:
+            # A worker died (crash, out of memory): start a new pool for the next files
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+def unique_path(directory: str, filename: str) -> str:
+    """Path for filename in directory, suffixed with -1, -2... if it is taken"""
+    stem, ext = os.path.splitext(filename)
+    path = os.path.join(directory, filename)
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{stem}-{counter}{ext}")
+        counter += 1
+    return path
+
+class BulkStager:
+    """Save the files of a bulk upload to disk, expanding ZIP archives.
+
+    Archive members are streamed one at a time from the (disk-spooled)
+    upload, so memory use doesn't depend on the archive size. Limits are
+    enforced on the bytes actually written, not on sizes declared in the
+    archive.
+    """
+
+    def __init__(self, directory: str, processor: DocumentProcessor,
+                 max_files: int, max_total_size: int):
+        self.directory = directory
+        self.processor = processor
+        self.max_files = max_files
+        self.max_total_size = max_total_size
+        self.files: List[StagedFile] = []
+        self.total_size = 0
+
+    def _copy(self, source: BinaryIO, filename: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = unique_path(self.directory, filename)
+        try:
+            with open(path, "wb") as out:
+                while True:
+                    block = source.read(COPY_BUFFER_SIZE)
+                    if not block:
+                        break
+                    self.total_size += len(block)
+                    if self.total_size > self.max_total_size:
+                        raise BulkLimitError(f"Bulk uploads are limited to {self.max_total_size} bytes")
+                    out.write(block)
+        except Exception:
+            # Limit reached, or a corrupt archive member (bad CRC...)
+            os.remove(path)
+            raise
+        return path
+
+    def _add(self, source: BinaryIO, filename: str, archive: Optional[str]) -> None:
+        filename = os.path.basename(filename)
+        document_type = self.processor.get_document_type_from_extension(filename)
+        if document_type is None:
+            self.files.append(StagedFile(filename, archive, error="Unsupported file type"))
+            return
+        if sum(1 for staged in self.files if staged.path) >= self.max_files:
+            raise BulkLimitError(f"Bulk uploads are limited to {self.max_files} documents")
+        path = self._copy(source, filename)
+        self.files.append(StagedFile(filename, archive, path, document_type))
+
+    def add_upload(self, file: BinaryIO, filename: str) -> None:
+        """Save an uploaded file, or the supported members of a ZIP archive"""
+        if not filename.lower().endswith(".zip"):
+            self._add(file, filename, None)
+            return
+        archive = os.path.basename(filename)
+        try:
+            with zipfile.ZipFile(file) as zf:
+                for member in zf.infolist():
+                    name = os.path.basename(member.filename)
+                    # Folders and macOS resource forks / hidden files
+                    if member.is_dir() or not name or name.startswith(".") or "__MACOSX/" in member.filename:
+                        continue
+                    if member.flag_bits & 0x1:
+                        self.files.append(StagedFile(name, archive, error="Encrypted archive member"))
+                        continue
+                    try:
+                        with zf.open(member) as source:
+                            self._add(source, name, archive)
+                    except zipfile.BadZipFile as e:
+                        self.files.append(StagedFile(name, archive, error=f"Corrupt archive member: {str(e)}"))
+        except zipfile.BadZipFile as e:
+            self.files.append(StagedFile(archive, error=f"Invalid ZIP archive: {str(e)}"))
+
+    def discard(self) -> None:
+        """Remove the files saved so far (the bulk upload was rejected)"""
+        for staged in self.files:
+            if staged.path and os.path.exists(staged.path):
+                os.remove(staged.path)
+
+extraction_pool = ExtractionPool(settings.BULK_INGEST_WORKERS)
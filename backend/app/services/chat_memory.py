@@ -0,0 +1,56 @@
+import logging
+from typing import List, Dict, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.chat import ChatSession, ChatMessage
+
+logger = logging.getLogger(__name__)
+
+class ChatMemory:
+    """Rolling memory of a chat session: recent turns verbatim, older turns folded into a summary.
+
+    Between turns and 2 * turns exchanges are kept verbatim. Once the
+    unsummarized part reaches 2 * turns, the oldest ones are folded into the
+    session summary in a single LLM call, so the prompt size stays bounded
+    and the extra call only happens every `turns` exchanges.
+    """
+
+    def __init__(self, llm_service, turns: Optional[int] = None, message_chars: Optional[int] = None):
+        self.llm_service = llm_service
+        self.turns = turns or settings.CHAT_MEMORY_TURNS
+        self.message_chars = message_chars or settings.CHAT_MEMORY_MESSAGE_CHARS
+
+    def _as_message(self, message: ChatMessage) -> Dict[str, str]:
+        content = message.content
+        if len(content) > self.message_chars:
+            content = content[:self.message_chars] + " [...]"
+        return {"role": message.role, "content": content}
+
+    async def load(self, db: Session, session: ChatSession, user_id: Optional[int] = None) -> List[Dict[str, str]]:
+        """Return the verbatim history to send, folding older turns into session.summary if needed.
+
+        A new summary is committed right away: it cost an LLM call and must
+        not be lost if answering the question fails.
+        """
+        pending = db.query(ChatMessage).filter(
+            ChatMessage.session_id == session.id,
+            ChatMessage.id > session.summarized_until_id
+        ).order_by(ChatMessage.id).all()
+
+        window = 2 * self.turns  # messages: one question and one answer per turn
+        if len(pending) >= 2 * window:
+            folded = pending[:-window]
+            try:
+                session.summary = await self.llm_service.summarize_conversation(
+                    session.summary,
+                    [self._as_message(message) for message in folded],
+                    user_id=user_id
+                )
+                session.summarized_until_id = folded[-1].id
+                db.commit()
+            except Exception as e:
+                # Answer anyway with the recent turns only, folding is retried next turn
+                logger.warning("chat_memory session=%s summarization failed: %s", session.id, e)
+            pending = pending[-window:]
+
+        return [self._as_message(message) for message in pending]
@@ -0,0 +1,73 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import List
+
+@dataclass
+class TextChunk:
+    index: int
+    start: int  # Character offset in the document content
+    text: str
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+HEADING = re.compile(r"#{1,6} ")  # Heading lines written by the Markdown and DOCX extractors
+
+def content_hash(text: str) -> str:
+    """sha256 of a chunk's text, to recognize it in another version of the document"""
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+def _split_long(paragraph: str, start: int, max_chars: int) -> List[tuple]:
+    """Cut a paragraph longer than max_chars at whitespace"""
+    pieces = []
+    while len(paragraph) > max_chars:
+        cut = paragraph.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append((start, paragraph[:cut]))
+        rest = paragraph[cut:]
+        stripped = rest.lstrip()
+        start += cut + len(rest) - len(stripped)
+        paragraph = stripped
+    if paragraph:
+        pieces.append((start, paragraph))
+    return pieces
+
+def chunk_text(text: str, max_chars: int = 1000) -> List[TextChunk]:
+    """Split text into chunks of whole paragraphs of at most max_chars.
+
+    Chunks don't overlap and only depend on their own paragraphs, so an edit
+    in one place of a document leaves the other chunks unchanged. A heading
+    always starts a new chunk, so a chunk doesn't straddle two sections.
+    """
+    if not text:
+        return []
+
+    paragraphs = []
+    position = 0
+    for match in PARAGRAPH_BREAK.finditer(text):
+        paragraphs.append((position, text[position:match.start()]))
+        position = match.end()
+    paragraphs.append((position, text[position:]))
+
+    chunks: List[TextChunk] = []
+    current_start, current = None, []
+    current_length = 0
+    for start, paragraph in paragraphs:
+        stripped = paragraph.strip()
+        if not stripped:
+            continue
+        start += paragraph.index(stripped[0])
+        if current and HEADING.match(stripped):
+            chunks.append(TextChunk(len(chunks), current_start, "\n\n".join(current)))
+            current_start, current, current_length = None, [], 0
+        for piece_start, piece in _split_long(stripped, start, max_chars):
+            if current and current_length + len(piece) + 2 > max_chars:
+                chunks.append(TextChunk(len(chunks), current_start, "\n\n".join(current)))
+                current_start, current, current_length = None, [], 0
+            if current_start is None:
+                current_start = piece_start
+            current.append(piece)
+            current_length += len(piece) + 2
+    if current:
+        chunks.append(TextChunk(len(chunks), current_start, "\n\n".join(current)))
+    return chunks
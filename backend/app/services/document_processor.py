@@ -1,78 +1,233 @@
+import logging
 import os
-import PyPDF2
-import pdfplumber
-from docx import Document as DocxDocument
-import markdown
-from typing import Optional
+import re
+import time
+from typing import Optional, List, Tuple
 from app.models.document import DocumentType
+from app.core.metrics import EXTRACTION_DURATION, EXTRACTION_BYTES, EXTRACTION_ERRORS, EXTRACTION_PDF_PAGES
+from app.core.timing import record_stage
+from app.services.text_extractors import docx_to_text, markdown_to_text
+
+logger = logging.getLogger(__name__)
+
+# The extractor backends (PyPDF2, pdfplumber and its pdfminer/PIL stack,
+# lxml, python-docx, markdown) are imported on first use: they are slow to import
+# and most processes (workers, health checks, CLI scripts) never extract a file
+
+# Adaptive PDF extraction: PyPDF2 reads every page, and the pages where its
+# output looks wrong are read again with pdfplumber (layout-aware, ~40x slower)
+PDF_MAX_BAD_CHARS = 0.05  # Share of replacement/control characters: undecodable font
+PDF_MAX_WORD_LENGTH = 25  # Mean word length: the spaces between words were lost
+PDF_MAX_UPWARD_JUMPS = 3  # Text going back up the page (columns, header...): more is out of order
+PDF_LINE_TOLERANCE = 15  # Points a text run may go up without counting as a jump
+PDF_TABLE_MIN_SHAPES = 12  # Rectangles and line segments drawn on a page with a ruled table
+RECTANGLE_OPERATOR = re.compile(rb"(?:-?[\d.]+\s+){4}re\b")
+LINE_OPERATOR = re.compile(rb"(?:-?[\d.]+\s+){2}l\b")
 
 class DocumentProcessor:
     def __init__(self):
         pass
 
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file using pdfplumber for better text extraction"""
+    def extract_pdf_pages_pdfplumber(self, file_path: str) -> List[str]:
+        """Extract the text of each PDF page with pdfplumber (layout-aware, slower)"""
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            return [page.extract_text() or "" for page in pdf.pages]
+
+    def extract_pdf_pages_pypdf2(self, file_path: str) -> List[str]:
+        """Extract the text of each PDF page with PyPDF2 (fast, no layout analysis)"""
+        import PyPDF2
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            return [page.extract_text() or "" for page in pdf_reader.pages]
+
+    def join_pages(self, pages: List[str]) -> Tuple[str, List[int]]:
+        """Join page texts and return the offset where each page starts in the result"""
+        parts, offsets = [], []
+        position = 0
+        for page_text in pages:
+            if page_text:
+                if parts:
+                    position += 1  # Newline separator
+                parts.append(page_text)
+            offsets.append(position)
+            position += len(page_text)
+        text = "\n".join(parts)
+        stripped = text.strip()
+        lead = len(text) - len(text.lstrip())
+        return stripped, [min(max(0, offset - lead), len(stripped)) for offset in offsets]
+
+    def extract_text_from_pdf_pdfplumber(self, file_path: str) -> str:
+        """Extract text from PDF file with pdfplumber (layout-aware, slower)"""
+        return self.join_pages(self.extract_pdf_pages_pdfplumber(file_path))[0]
+
+    def extract_text_from_pdf_pypdf2(self, file_path: str) -> str:
+        """Extract text from PDF file with PyPDF2 (fast, no layout analysis)"""
+        return self.join_pages(self.extract_pdf_pages_pypdf2(file_path))[0]
+
+    def pdf_page_problem(self, page) -> Tuple[str, Optional[str]]:
+        """Extract a PyPDF2 page, with the reason its text needs pdfplumber (None if it doesn't)"""
+        heights = []
+
+        def visit(text, cm, tm, font, size):
+            if text.strip():
+                heights.append(tm[5] * cm[3] + cm[5])
+
+        text = page.extract_text(visitor_text=visit) or ""
+        words = text.split()
+        if not words:
+            return text, "empty"
+        bad = sum(1 for char in text if char == "\ufffd" or (char < " " and char not in "\n\r\t"))
+        if bad > len(text) * PDF_MAX_BAD_CHARS or sum(map(len, words)) / len(words) > PDF_MAX_WORD_LENGTH:
+            return text, "garbled"
+        jumps = sum(1 for before, after in zip(heights, heights[1:]) if after > before + PDF_LINE_TOLERANCE)
+        if jumps > PDF_MAX_UPWARD_JUMPS:
+            return text, "order"
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+        if len(RECTANGLE_OPERATOR.findall(data)) + len(LINE_OPERATOR.findall(data)) >= PDF_TABLE_MIN_SHAPES:
+            return text, "table"
+        return text, None
+
+    def extract_pdf_pages_adaptive(self, file_path: str) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """Extract each PDF page with PyPDF2, then with pdfplumber where the text looks wrong.
+
+        Returns the page texts and, for each page, the extractor that produced
+        it and why: ("pypdf2", "ok") or ("pdfplumber", "empty" | "garbled" |
+        "order" | "table" | "error").
+        """
+        import PyPDF2
+        pages, reasons = [], []
+        with open(file_path, 'rb') as file:
+            for page in PyPDF2.PdfReader(file).pages:
+                try:
+                    text, reason = self.pdf_page_problem(page)
+                except Exception:
+                    text, reason = "", "error"
+                pages.append(text)
+                reasons.append(reason)
+
+        routes = [("pypdf2", "ok") if reason is None else ("pdfplumber", reason) for reason in reasons]
+        slow = [index for index, reason in enumerate(reasons) if reason]
+        if not slow:
+            return pages, routes
         try:
-            text = ""
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            return text.strip()
-        except Exception as e:
-            # Fallback to PyPDF2
+            import pdfplumber
+            with pdfplumber.open(file_path, pages=[index + 1 for index in slow]) as pdf:
+                for index, page in zip(slow, pdf.pages):
+                    try:
+                        text = page.extract_text() or ""
+                    except Exception:
+                        text = ""
+                    if text.strip() or not pages[index].strip():
+                        pages[index] = text
+                    else:
+                        routes[index] = ("pypdf2", reasons[index])
+        except Exception:
+            # pdfplumber can't open the file: keep what PyPDF2 read
+            routes = [("pypdf2", reason or "ok") for reason in reasons]
+        return pages, routes
+
+    def extract_pdf_pages(self, file_path: str) -> List[str]:
+        """Extract the text of each PDF page: PyPDF2 first, pdfplumber for the pages that need it"""
+        try:
+            pages, routes = self.extract_pdf_pages_adaptive(file_path)
+        except Exception:
+            # PyPDF2 can't read the file: let pdfplumber try all of it
             try:
-                text = ""
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-                return text.strip()
+                pages = self.extract_pdf_pages_pdfplumber(file_path)
             except Exception as fallback_error:
                 raise Exception(f"Failed to extract text from PDF: {str(fallback_error)}")
+            routes = [("pdfplumber", "error")] * len(pages)
+
+        for route in routes:
+            EXTRACTION_PDF_PAGES.labels(*route).inc()
+        slow = [f"{number}:{reason}" for number, (extractor, reason) in enumerate(routes, start=1) if extractor == "pdfplumber"]
+        if slow:
+            logger.info("pdf_extraction file=%s pages=%d pdfplumber=%s",
+                        os.path.basename(file_path), len(pages), ",".join(slow))
+        return pages
+
+    def extract_text_from_pdf_with_pages(self, file_path: str) -> Tuple[str, List[int]]:
+        """Extract text from PDF file, with the offset where each page starts"""
+        return self.join_pages(self.extract_pdf_pages(file_path))
+
+    def extract_text_from_pdf(self, file_path: str) -> str:
+        """Extract text from PDF file, with pdfplumber only for the pages that need it"""
+        return self.extract_text_from_pdf_with_pages(file_path)[0]
 
     def extract_text_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX file"""
+        """Extract text from DOCX file: paragraphs and tables in document order, with headings"""
         try:
-            doc = DocxDocument(file_path)
-            text = []
-            for paragraph in doc.paragraphs:
-                text.append(paragraph.text)
-            return "\n".join(text).strip()
+            return docx_to_text(file_path)
         except Exception as e:
             raise Exception(f"Failed to extract text from DOCX: {str(e)}")
 
+    def extract_text_from_docx_paragraphs(self, file_path: str) -> str:
+        """Extract the paragraphs of a DOCX file with python-docx (drops tables, kept for benchmarks)"""
+        from docx import Document as DocxDocument
+        doc = DocxDocument(file_path)
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
+
     def extract_text_from_markdown(self, file_path: str) -> str:
-        """Extract text from Markdown file"""
+        """Extract text from Markdown file in one pass, keeping headings, lists, tables and code"""
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-
-            # Convert markdown to HTML then extract text
-            html = markdown.markdown(content)
-
-            # Simple HTML tag removal (for basic text extraction)
-            import re
-            text = re.sub('<[^<]+?>', '', html)
-            return text.strip()
+                return markdown_to_text(file)
         except Exception as e:
             raise Exception(f"Failed to extract text from Markdown: {str(e)}")
 
+    def extract_text_from_markdown_html(self, file_path: str) -> str:
+        """Extract text from Markdown by rendering HTML and stripping tags (kept for benchmarks)"""
+        import markdown
+        import re
+        with open(file_path, 'r', encoding='utf-8') as file:
+            html = markdown.markdown(file.read())
+        return re.sub('<[^<]+?>', '', html).strip()
+
     def process_document(self, file_path: str, document_type: DocumentType) -> str:
         """Process document based on type and extract text"""
+        return self.process_document_pages(file_path, document_type)[0]
+
+    def extract_document_pages(self, file_path: str, document_type: DocumentType) -> Tuple[str, Optional[List[int]]]:
+        """Extract text and page offsets, without timing it (also runs in worker processes)"""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
 
         if document_type == DocumentType.PDF:
-            return self.extract_text_from_pdf(file_path)
+            extract = self.extract_text_from_pdf_with_pages
         elif document_type == DocumentType.DOCX:
-            return self.extract_text_from_docx(file_path)
+            extract = self.extract_text_from_docx
         elif document_type == DocumentType.MARKDOWN:
-            return self.extract_text_from_markdown(file_path)
+            extract = self.extract_text_from_markdown
         else:
             raise ValueError(f"Unsupported document type: {document_type}")
 
+        result = extract(file_path)
+        return result if isinstance(result, tuple) else (result, None)
+
+    def record_extraction(self, file_path: str, document_type: DocumentType, duration: Optional[float], failed: bool = False) -> None:
+        """Record the metrics of one extraction (duration is None if unknown)"""
+        type_label = document_type.value
+        if os.path.exists(file_path):
+            EXTRACTION_BYTES.labels(type_label).observe(os.path.getsize(file_path))
+        if failed:
+            EXTRACTION_ERRORS.labels(type_label).inc()
+        if duration is not None:
+            EXTRACTION_DURATION.labels(type_label).observe(duration)
+            record_stage("extract", duration)
+
+    def process_document_pages(self, file_path: str, document_type: DocumentType) -> Tuple[str, Optional[List[int]]]:
+        """Extract text, with the offset of each page for paginated formats (PDF)"""
+        start = time.perf_counter()
+        try:
+            result = self.extract_document_pages(file_path, document_type)
+        except Exception:
+            self.record_extraction(file_path, document_type, time.perf_counter() - start, failed=True)
+            raise
+        self.record_extraction(file_path, document_type, time.perf_counter() - start)
+        return result
+
     def get_document_type_from_extension(self, filename: str) -> Optional[DocumentType]:
         """Determine document type from file extension"""
         ext = os.path.splitext(filename)[1].lower()
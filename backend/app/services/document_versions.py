@@ -0,0 +1,89 @@
+"""Match the chunks of two versions of a document, and the questions and
+flashcards to the chunk they were written from.
+
+A re-upload keeps every chunk whose text is unchanged (same content hash),
+and with it the questions and flashcards written from it, review history
+included; only what was written from a removed chunk is generated again.
+"""
+import hashlib
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.models.document import DocumentChunk
+from app.services.chunking import TextChunk, content_hash
+from app.services.vector_index import vector_index
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+def file_sha256(file_path: str) -> str:
+    """sha256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_hash(chunk: DocumentChunk) -> str:
+    return chunk.content_hash or content_hash(chunk.content)
+
+@dataclass
+class ChunkDiff:
+    """Chunks of the previous version against the chunks of the new text"""
+    kept: List[Tuple[DocumentChunk, TextChunk]] = field(default_factory=list)
+    added: List[TextChunk] = field(default_factory=list)
+    removed: List[DocumentChunk] = field(default_factory=list)
+
+    def stale_hashes(self) -> set:
+        """Hashes of the chunks that are gone from the new version (a repeated chunk may survive)"""
+        remaining = {chunk_hash(row) for row, _ in self.kept} | {content_hash(chunk.text) for chunk in self.added}
+        return {chunk_hash(row) for row in self.removed} - remaining
+
+def diff_chunks(old: List[DocumentChunk], new: List[TextChunk]) -> ChunkDiff:
+    """Match new chunks to old ones with the same text, in document order"""
+    by_hash: Dict[str, Deque[DocumentChunk]] = defaultdict(deque)
+    for row in old:
+        by_hash[chunk_hash(row)].append(row)
+    diff = ChunkDiff()
+    for chunk in new:
+        rows = by_hash.get(content_hash(chunk.text))
+        if rows:
+            diff.kept.append((rows.popleft(), chunk))
+        else:
+            diff.added.append(chunk)
+    diff.removed = [row for rows in by_hash.values() for row in rows]
+    return diff
+
+def _options_text(options: Any) -> str:
+    if isinstance(options, dict):
+        options = options.values()
+    return " ".join(str(option) for option in options or [])
+
+def question_text(question: str, options: Any = None, explanation: Optional[str] = None) -> str:
+    """Text a quiz question is matched to its source chunk with"""
+    return " ".join(part for part in (question, _options_text(options), explanation or "") if part)
+
+def flashcard_text(front: str, back: str) -> str:
+    """Text a flashcard is matched to its source chunk with"""
+    return f"{front} {back}"
+
+class ChunkAttributor:
+    """Finds the chunk a generated question or flashcard was written from.
+
+    The model isn't asked for its source: the chunk most similar to the
+    item's text (same embedder as the vector index) is taken instead.
+    """
+
+    def __init__(self, chunks: List[DocumentChunk]):
+        self.hashes = [chunk_hash(chunk) for chunk in chunks]
+        self.vectors = vector_index.embedder.embed([chunk.content for chunk in chunks]) if chunks else None
+
+    def source(self, text: str) -> Optional[str]:
+        """content_hash of the closest chunk, None if no chunk shares a word with text"""
+        if not self.hashes:
+            return None
+        scores = self.vectors @ vector_index.embedder.embed([text])[0]
+        best = int(scores.argmax())
+        return self.hashes[best] if scores[best] > 0 else None
@@ -0,0 +1,121 @@
+import re
+from typing import List, Dict, Any, Optional, Iterable
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app.core.database import Base
+
+# FTS5 external-content tables: the index points at the rows of the source
+# table instead of storing a second copy of the text, and triggers keep it in sync
+FTS_TABLES = {
+    "documents_fts": ("documents", ["title", "content"]),
+    "summaries_fts": ("summaries", ["content"]),
+    "quiz_questions_fts": ("quiz_questions", ["question"]),
+    "flashcards_fts": ("flashcards", ["front", "back"]),
+}
+
+TOKENIZER = "unicode61 remove_diacritics 2"
+
+def _fts_schema(fts_table: str, source: str, columns: List[str]) -> List[str]:
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{cols}, content='{source}', content_rowid='id', tokenize='{TOKENIZER}')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values}); END",
+    ]
+
+def create_fts_schema(connection) -> None:
+    """Create the FTS tables and triggers, indexing existing rows the first time"""
+    if connection.dialect.name != "sqlite":
+        return
+    existing = {
+        row[0] for row in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_fts'"
+        )
+    }
+    for fts_table, (source, columns) in FTS_TABLES.items():
+        for statement in _fts_schema(fts_table, source, columns):
+            connection.exec_driver_sql(statement)
+        if fts_table not in existing:
+            connection.exec_driver_sql(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_fts_after_tables(target, connection, **kw):
+    create_fts_schema(connection)
+
+# kind -> query returning id, document_id, document_title, snippet, rank for one user
+SEARCH_QUERIES = {
+    "document": """
+        SELECT d.id AS id, d.id AS document_id, d.title AS document_title,
+               snippet(documents_fts, -1, '<mark>', '</mark>', '…', :tokens) AS snippet,
+               bm25(documents_fts, 5.0, 1.0) AS rank
+        FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+        WHERE documents_fts MATCH :query AND d.user_id = :user_id
+        ORDER BY rank LIMIT :limit
+    """,
+    "summary": """
+        SELECT s.id AS id, d.id AS document_id, d.title AS document_title,
+               snippet(summaries_fts, 0, '<mark>', '</mark>', '…', :tokens) AS snippet,
+               bm25(summaries_fts) AS rank
+        FROM summaries_fts
+        JOIN summaries s ON s.id = summaries_fts.rowid
+        JOIN documents d ON d.id = s.document_id
+        WHERE summaries_fts MATCH :query AND d.user_id = :user_id
+        ORDER BY rank LIMIT :limit
+    """,
+    "quiz_question": """
+        SELECT q.id AS id, d.id AS document_id, d.title AS document_title,
+               snippet(quiz_questions_fts, 0, '<mark>', '</mark>', '…', :tokens) AS snippet,
+               bm25(quiz_questions_fts) AS rank
+        FROM quiz_questions_fts
+        JOIN quiz_questions q ON q.id = quiz_questions_fts.rowid
+        JOIN quizzes z ON z.id = q.quiz_id
+        JOIN documents d ON d.id = z.document_id
+        WHERE quiz_questions_fts MATCH :query AND d.user_id = :user_id
+        ORDER BY rank LIMIT :limit
+    """,
+    "flashcard": """
+        SELECT f.id AS id, d.id AS document_id, d.title AS document_title,
+               snippet(flashcards_fts, -1, '<mark>', '</mark>', '…', :tokens) AS snippet,
+               bm25(flashcards_fts) AS rank
+        FROM flashcards_fts
+        JOIN flashcards f ON f.id = flashcards_fts.rowid
+        JOIN flashcard_sets fs ON fs.id = f.flashcard_set_id
+        JOIN documents d ON d.id = fs.document_id
+        WHERE flashcards_fts MATCH :query AND d.user_id = :user_id
+        ORDER BY rank LIMIT :limit
+    """,
+}
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn user input into an FTS5 query: all terms required, the last one as a prefix"""
+    terms = TERM_PATTERN.findall(query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+def search(db: Session, user_id: int, query: str, kinds: Optional[Iterable[str]] = None,
+           limit: int = 20, snippet_tokens: int = 12) -> List[Dict[str, Any]]:
+    """Ranked matches across the user's documents and learning materials, best first"""
+    match = build_match_query(query)
+    if match is None:
+        return []
+    params = {"query": match, "user_id": user_id, "limit": limit, "tokens": snippet_tokens}
+    results = []
+    for kind in kinds or SEARCH_QUERIES:
+        for row in db.execute(text(SEARCH_QUERIES[kind]), params).mappings():
+            results.append({"type": kind, **row})
+    # bm25 is negative, lower is better
+    results.sort(key=lambda result: result["rank"])
+    return results[:limit]
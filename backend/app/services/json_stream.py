@@ -0,0 +1,98 @@
+import json
+from typing import Any, Dict, List
+
+class JSONArrayStreamParser:
+    """Incrementally parse a top-level JSON array of objects from streamed text.
+
+    Text is fed chunk by chunk as the LLM produces it. Every time an object of the
+    array is closed it is decoded and returned, so callers can persist it right
+    away. Anything before the opening bracket (e.g. a ```json fence) is ignored,
+    and a malformed object is skipped instead of invalidating the whole array.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buffer: List[str] = []
+        self.items_parsed = 0
+        self.items_skipped = 0
+
+    @property
+    def finished(self) -> bool:
+        """True once the closing bracket of the top-level array was seen"""
+        return self._finished
+
+    @property
+    def pending(self) -> str:
+        """Text of the object currently being received (incomplete)"""
+        return "".join(self._buffer)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of text and return the objects completed by it"""
+        completed = []
+        for char in chunk:
+            if self._finished:
+                break
+
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                continue
+
+            if self._depth == 0:
+                # Between elements: only an object start or the array end matter
+                if char == "{":
+                    self._buffer = [char]
+                    self._depth = 1
+                elif char == "]":
+                    self._finished = True
+                elif not (char.isspace() or char == ",") and not (self.items_parsed or self.items_skipped):
+                    # A bracket in the prose before the array ("see [1]"): wait for the next one
+                    self._started = False
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    item = self._decode_buffer()
+                    if item is not None:
+                        completed.append(item)
+        return completed
+
+    def _decode_buffer(self) -> Any:
+        """Decode the buffered object, skipping it if it is not valid JSON"""
+        raw = "".join(self._buffer)
+        self._buffer = []
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError:
+            self.items_skipped += 1
+            return None
+        if not isinstance(item, dict):
+            self.items_skipped += 1
+            return None
+        self.items_parsed += 1
+        return item
+
+def parse_json_array(text: str) -> List[Dict[str, Any]]:
+    """Parse a complete LLM response, keeping every valid object of the array"""
+    parser = JSONArrayStreamParser()
+    items = parser.feed(text)
+    if not items and not parser.finished:
+        raise ValueError("Response does not contain a JSON array of objects")
+    return items
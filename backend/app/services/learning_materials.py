@@ -0,0 +1,160 @@
+"""Generated learning materials: validating the model's answers, building and saving their rows.
+
+The generation functions are shared by the endpoints, the background
+pre-generation after upload and the offline backfill.
+"""
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.document import Document
+from app.models.learning_material import Summary, Quiz, QuizQuestion, FlashcardSet, Flashcard
+from app.services.document_versions import ChunkAttributor, flashcard_text, question_text
+from app.services.llm_service import LLMService
+from app.services.pregeneration import Pregenerator
+from app.services.question_bank import DuplicateFilter
+from app.services.vector_index import get_document_chunks
+
+llm_service = LLMService()
+
+MATERIAL_MODELS = {"summary": Summary, "quiz": Quiz, "flashcards": FlashcardSet}
+
+DEFAULT_NUM_CARDS = 10
+
+def touch(material) -> None:
+    """Bump the version of a summary, quiz or flashcard set after a change (invalidates ETags)"""
+    material.version = (material.version or 0) + 1
+
+def is_valid_question(question_data: Any) -> bool:
+    """Check that a generated quiz question has the fields we persist"""
+    return (
+        isinstance(question_data, dict)
+        and bool(question_data.get("question"))
+        and bool(question_data.get("correct_answer"))
+        and bool(question_data.get("options"))
+    )
+
+def is_valid_flashcard(card_data: Any) -> bool:
+    """Check that a generated flashcard has both sides"""
+    return (
+        isinstance(card_data, dict)
+        and bool(card_data.get("front"))
+        and bool(card_data.get("back"))
+    )
+
+def make_question(question_data: Dict[str, Any], attributor: ChunkAttributor, order_index: int = 0) -> QuizQuestion:
+    """Row of a generated question (checked with is_valid_question), with the chunk it was written from"""
+    return QuizQuestion(
+        question=question_data["question"],
+        correct_answer=question_data["correct_answer"],
+        options=question_data["options"],
+        explanation=question_data.get("explanation", ""),
+        order_index=order_index,
+        source_chunk_hash=attributor.source(question_text(
+            question_data["question"], question_data["options"], question_data.get("explanation")
+        ))
+    )
+
+def make_flashcard(card_data: Dict[str, Any], attributor: ChunkAttributor, order_index: int = 0) -> Flashcard:
+    """Row of a generated flashcard (checked with is_valid_flashcard), with the chunk it was written from"""
+    return Flashcard(
+        front=card_data["front"],
+        back=card_data["back"],
+        order_index=order_index,
+        source_chunk_hash=attributor.source(flashcard_text(card_data["front"], card_data["back"]))
+    )
+
+async def create_summary(db: Session, document: Document, user_id: Optional[int] = None) -> Summary:
+    """Generate and save the summary of a document"""
+    content = await llm_service.generate_summary(document.content, document.title, user_id=user_id)
+    summary = Summary(
+        document_id=document.id,
+        title=f"Summary of {document.title}",
+        content=content,
+        generator=llm_service.generator("summary")
+    )
+    db.add(summary)
+    db.commit()
+    db.refresh(summary)
+    return summary
+
+async def create_flashcard_set(
+    db: Session,
+    document: Document,
+    num_cards: int = DEFAULT_NUM_CARDS,
+    user_id: Optional[int] = None
+) -> FlashcardSet:
+    """Generate and save the flashcards of a document; ValueError if the model wrote no valid card"""
+    generated = await llm_service.generate_flashcards(document.content, document.title, num_cards, user_id=user_id)
+    # Nothing is saved without a valid card: an empty set would be served as "existing" forever
+    generated = [card for card in generated if is_valid_flashcard(card)]
+    if not generated:
+        raise ValueError("no valid flashcard in the model's answer")
+
+    attributor = ChunkAttributor(get_document_chunks(db, document))
+    flashcard_set = FlashcardSet(
+        document_id=document.id,
+        title=f"Flashcards for {document.title}",
+        num_cards=num_cards,
+        generator=llm_service.generator("flashcards"),
+        flashcards=[make_flashcard(card_data, attributor, i) for i, card_data in enumerate(generated)]
+    )
+    db.add(flashcard_set)
+    db.commit()
+    db.refresh(flashcard_set)
+    return flashcard_set
+
+async def grow_question_bank(
+    db: Session,
+    document: Document,
+    known: List[QuizQuestion],
+    num_questions: int,
+    user_id: Optional[int] = None
+) -> List[QuizQuestion]:
+    """Generate questions into the document's bank, without the ones it already has; returns the new ones"""
+    generated = await llm_service.generate_quiz(
+        document.content, document.title, num_questions, user_id=user_id, avoid=[q.question for q in known]
+    )
+    duplicates = DuplicateFilter(q.question for q in known)
+    room = max(0, settings.QUESTION_BANK_MAX_QUESTIONS - len(known))
+    generated = [q for q in generated if is_valid_question(q) and duplicates.is_new(q["question"])][:room]
+    if not generated:
+        return []
+
+    attributor = ChunkAttributor(get_document_chunks(db, document))
+    quiz = db.query(Quiz).filter(Quiz.document_id == document.id).order_by(Quiz.id).first()
+    if quiz is None:
+        quiz = Quiz(
+            document_id=document.id,
+            title=f"Quiz for {document.title}",
+            num_questions=num_questions,
+            generator=llm_service.generator("quiz")
+        )
+        db.add(quiz)
+    added = [make_question(question_data, attributor, len(quiz.questions) + i) for i, question_data in enumerate(generated)]
+    quiz.questions.extend(added)
+    touch(quiz)
+    db.commit()
+    return added
+
+# Background pre-generation after upload (users opt in with PUT /auth/me/pregeneration)
+async def pregenerate_material(material: str, document_id: int, user_id: int) -> bool:
+    """Generate a material from a background job (quizzes only fill the bank); False if it already exists"""
+    db = SessionLocal()
+    try:
+        document = db.query(Document).filter(Document.id == document_id, Document.user_id == user_id).first()
+        model = MATERIAL_MODELS[material]
+        if document is None or db.query(model.id).filter(model.document_id == document_id).first():
+            return False
+        if material == "summary":
+            await create_summary(db, document, user_id)
+        elif material == "quiz":
+            # Fills the question bank without serving a quiz to the user
+            return bool(await grow_question_bank(db, document, [], settings.QUESTION_BANK_BATCH_SIZE, user_id))
+        else:
+            await create_flashcard_set(db, document, user_id=user_id)
+        return True
+    finally:
+        db.close()
+
+pregenerator = Pregenerator(pregenerate_material)
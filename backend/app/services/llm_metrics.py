@@ -0,0 +1,89 @@
+from collections import deque
+from typing import Dict, List, Any, Tuple, Optional
+from app.core.config import settings
+from app.core.metrics import LLM_REQUESTS, LLM_REQUEST_DURATION, LLM_TOKENS, LLM_ERRORS
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the USD cost of a call from settings.LLM_MODEL_PRICES"""
+    prices = settings.LLM_MODEL_PRICES.get(model)
+    if not prices:
+        return 0.0
+    return (prompt_tokens * prices.get("input", 0.0) + completion_tokens * prices.get("output", 0.0)) / 1_000_000
+
+class _Stats:
+    def __init__(self, window: int):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.total_latency = 0.0
+        self.error_latency = 0.0
+        self.latencies = deque(maxlen=window)
+
+class LLMTaskMetrics:
+    """In-process latency, token and cost statistics per task and model"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._stats: Dict[Tuple[str, str], _Stats] = {}
+
+    def _get(self, task: str, model: str) -> _Stats:
+        key = (task, model)
+        if key not in self._stats:
+            self._stats[key] = _Stats(self.window)
+        return self._stats[key]
+
+    def record(self, task: str, provider: str, model: str, latency: float,
+               prompt_tokens: int, completion_tokens: int) -> None:
+        """Record a successful call"""
+        LLM_REQUESTS.labels(task, provider, model, "success").inc()
+        LLM_REQUEST_DURATION.labels(task, provider, model).observe(latency)
+        LLM_TOKENS.labels(task, provider, model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(task, provider, model, "completion").inc(completion_tokens)
+        stats = self._get(task, f"{provider}:{model}")
+        stats.calls += 1
+        stats.prompt_tokens += prompt_tokens
+        stats.completion_tokens += completion_tokens
+        stats.cost += estimate_cost(model, prompt_tokens, completion_tokens)
+        stats.total_latency += latency
+        stats.latencies.append(latency)
+
+    def record_error(self, task: str, latency: float, model: Optional[str] = None, error: str = "Exception") -> None:
+        """Record a call that failed on every provider"""
+        LLM_REQUESTS.labels(task, "none", model or "unavailable", "error").inc()
+        LLM_ERRORS.labels(task, error).inc()
+        stats = self._get(task, model or "unavailable")
+        stats.errors += 1
+        stats.error_latency += latency
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the current statistics, one entry per task and model"""
+        result = []
+        for (task, model), stats in sorted(self._stats.items()):
+            ordered = sorted(stats.latencies)
+
+            def percentile(p: float) -> Optional[float]:
+                if not ordered:
+                    return None
+                return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 3)
+
+            result.append({
+                "task": task,
+                "model": model,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "avg_latency": round(stats.total_latency / stats.calls, 3) if stats.calls else None,
+                "p50_latency": percentile(50),
+                "p95_latency": percentile(95),
+                "avg_error_latency": round(stats.error_latency / stats.errors, 3) if stats.errors else None,
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "estimated_cost_usd": round(stats.cost, 6)
+            })
+        return result
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+llm_metrics = LLMTaskMetrics()
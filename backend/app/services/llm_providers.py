@@ -0,0 +1,565 @@
+import asyncio
+import json
+import random
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Dict, Optional, AsyncIterator
+from app.core.config import settings
+from app.services.llm_resilience import CircuitBreaker, backoff_delay
+
+class LLMProviderError(Exception):
+    """Raised when no configured provider could complete a request"""
+
+class LLMTimeoutError(LLMProviderError):
+    """Raised when the deadline of a task expired before any provider answered"""
+
+class LLMUnavailableError(LLMProviderError):
+    """Raised when every provider is rejected by its open circuit breaker"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class FakeProviderError(LLMProviderError):
+    """Injected failure, behaving like a 503 from a real API"""
+    status_code = 503
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+@dataclass
+class LLMResult:
+    """Text returned by a provider, with the data needed for accounting"""
+    text: str
+    provider: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency: float = 0.0
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token) for APIs that don't report usage"""
+    return max(1, len(text) // 4)
+
+def messages_text(messages: List[Dict[str, str]]) -> str:
+    """Concatenate the content of chat messages"""
+    return "\n\n".join(message["content"] for message in messages)
+
+class LLMProvider:
+    """Base class for a chat completion backend"""
+    name = "base"
+
+    # Latency samples needed before percentiles are trusted
+    MIN_LATENCY_SAMPLES = 20
+
+    def __init__(self, default_model: str, latency_window: int = 200):
+        self.default_model = default_model
+        self._latencies = deque(maxlen=latency_window)
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.LLM_BREAKER_RESET_SECONDS
+        )
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Return True if the error is transient (timeout, rate limit, 5xx...)"""
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+            return True
+        status_code = getattr(error, "status_code", None)
+        return status_code is not None and (status_code in RETRYABLE_STATUS_CODES or status_code >= 500)
+
+    def record_latency(self, seconds: float) -> None:
+        """Record the duration of a successful call"""
+        self._latencies.append(seconds)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """Return the given latency percentile, or None without enough samples"""
+        if len(self._latencies) < self.MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+    async def complete(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+                       temperature: float, timeout: float) -> LLMResult:
+        """Return the full completion for the messages"""
+        raise NotImplementedError
+
+    async def stream(self, messages: List[Dict[str, str]], model: str, max_tokens: int,
+                     temperature: float, timeout: float) -> AsyncIterator[str]:
+        """Yield the completion text as it is generated"""
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, api_key: str, default_model: str, base_url: Optional[str] = None):
+        super().__init__(default_model)
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client = None
+
+    @property
+    def client(self):
+        """SDK client, created on first call (importing the SDK is slow)"""
+        if self._client is None:
+            from openai import AsyncOpenAI
+            # Retries are handled by us, so the SDK should give up right away
+            self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._client
+
+    def is_retryable(self, error):
+        from openai import APIConnectionError
+        return isinstance(error, APIConnectionError) or super().is_retryable(error)
+
+    async def complete(self, messages, model, max_tokens, temperature, timeout):
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout
+        )
+        text = response.choices[0].message.content or ""
+        usage = response.usage
+        return LLMResult(
+            text=text,
+            provider=self.name,
+            model=model,
+            prompt_tokens=usage.prompt_tokens if usage else estimate_tokens(messages_text(messages)),
+            completion_tokens=usage.completion_tokens if usage else estimate_tokens(text)
+        )
+
+    async def stream(self, messages, model, max_tokens, temperature, timeout):
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+class AnthropicProvider(LLMProvider):
+    name = "anthropic"
+
+    def __init__(self, api_key: str, default_model: str):
+        super().__init__(default_model)
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        """SDK client, created on first call (importing the SDK is slow)"""
+        if self._client is None:
+            from anthropic import AsyncAnthropic
+            self._client = AsyncAnthropic(api_key=self.api_key, max_retries=0)
+        return self._client
+
+    def is_retryable(self, error):
+        from anthropic import APIConnectionError
+        return isinstance(error, APIConnectionError) or super().is_retryable(error)
+
+    def _prompt(self, messages: List[Dict[str, str]]) -> str:
+        """Convert chat messages to the Human/Assistant text completion format"""
+        from anthropic import HUMAN_PROMPT, AI_PROMPT
+        prompt = ""
+        previous_role = None
+        for message in messages:
+            # System and user messages are merged into a single Human turn
+            role = "assistant" if message["role"] == "assistant" else "human"
+            if role == previous_role:
+                prompt += f"\n\n{message['content']}"
+            elif role == "assistant":
+                prompt += f"{AI_PROMPT} {message['content']}"
+            else:
+                prompt += f"{HUMAN_PROMPT} {message['content']}"
+            previous_role = role
+        return prompt + AI_PROMPT
+
+    async def complete(self, messages, model, max_tokens, temperature, timeout):
+        prompt = self._prompt(messages)
+        response = await self.client.completions.create(
+            model=model,
+            prompt=prompt,
+            max_tokens_to_sample=max_tokens,
+            temperature=temperature,
+            timeout=timeout
+        )
+        return LLMResult(
+            text=response.completion,
+            provider=self.name,
+            model=model,
+            prompt_tokens=estimate_tokens(prompt),
+            completion_tokens=estimate_tokens(response.completion)
+        )
+
+    async def stream(self, messages, model, max_tokens, temperature, timeout):
+        stream = await self.client.completions.create(
+            model=model,
+            prompt=self._prompt(messages),
+            max_tokens_to_sample=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.completion:
+                yield chunk.completion
+
+def fake_completion(messages: List[Dict[str, str]]) -> str:
+    """Build a deterministic, well-formed answer for the prompts LLMService sends"""
+    # Only the last message: chat history may mention quizzes or flashcards
+    prompt = messages[-1]["content"] if messages else ""
+    count_match = re.search(r"create (\d+)", prompt)
+    count = int(count_match.group(1)) if count_match else 5
+
+    if "quiz questions" in prompt:
+        # Numbered after the existing questions the prompt lists, so that they are new ones
+        _, _, existing = prompt.partition("existing questions:")
+        offset = len(re.findall(r"^\s*- ", existing, re.MULTILINE))
+        return json.dumps([
+            {
+                "question": f"Fake question {i + 1:03d}?",  # Zero-padded: the question bank's duplicate filter ignores one-character words
+                "options": [f"A) Option {i + 1}.1", f"B) Option {i + 1}.2", f"C) Option {i + 1}.3", f"D) Option {i + 1}.4"],
+                "correct_answer": "ABCD"[i % 4],
+                "explanation": f"Fake explanation {i + 1}."
+            }
+            for i in range(offset, offset + count)
+        ], indent=2)
+    if "flashcards" in prompt:
+        return json.dumps([
+            {"front": f"Fake concept {i + 1}", "back": f"Fake definition {i + 1}."}
+            for i in range(count)
+        ], indent=2)
+    return "This is a fake answer generated offline. " * 8
+
+class FakeProvider(LLMProvider):
+    """Offline provider with configurable latency, token rate and failures"""
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, tokens_per_second: Optional[float] = None,
+                 failure_rate: float = 0.0, response: Optional[str] = None,
+                 name: str = "fake", seed: Optional[int] = None):
+        super().__init__("fake-model")
+        self.name = name
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.response = response
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def _text(self, messages: List[Dict[str, str]]) -> str:
+        return self.response if self.response is not None else fake_completion(messages)
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise FakeProviderError(f"Injected failure from provider '{self.name}'")
+
+    async def complete(self, messages, model, max_tokens, temperature, timeout):
+        self.calls += 1
+        text = self._text(messages)
+        delay = self.latency
+        if self.tokens_per_second:
+            delay += estimate_tokens(text) / self.tokens_per_second
+        await asyncio.sleep(delay)
+        self._maybe_fail()
+        return LLMResult(
+            text=text,
+            provider=self.name,
+            model=model,
+            prompt_tokens=estimate_tokens(messages_text(messages)),
+            completion_tokens=estimate_tokens(text)
+        )
+
+    async def stream(self, messages, model, max_tokens, temperature, timeout):
+        self.calls += 1
+        text = self._text(messages)
+        await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        chunk_size = 16
+        for start in range(0, len(text), chunk_size):
+            chunk = text[start:start + chunk_size]
+            if self.tokens_per_second:
+                await asyncio.sleep(estimate_tokens(chunk) / self.tokens_per_second)
+            yield chunk
+
+class ProviderChain:
+    """Ordered providers with retries, circuit breakers, fallback and hedging.
+
+    Every request has a deadline shared by all its attempts. Transient errors
+    are retried with jittered exponential backoff, then the next provider is
+    tried. Providers whose circuit breaker is open are skipped. With hedging
+    enabled, when the first provider has not answered after its recent latency
+    percentile, the request is also sent to the second one and the first
+    successful answer wins. A stream fails if its provider sends nothing for
+    stream_idle_timeout seconds.
+    """
+
+    def __init__(self, providers: List[LLMProvider], timeout: float = 60.0,
+                 hedge: bool = False, hedge_percentile: float = 95.0,
+                 hedge_default_delay: float = 10.0, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 stream_idle_timeout: float = 30.0):
+        self.providers = providers
+        self.timeout = timeout
+        self.stream_idle_timeout = stream_idle_timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default_delay = hedge_default_delay
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _model_for(self, provider: LLMProvider, models: Optional[Dict[str, str]]) -> str:
+        return (models or {}).get(provider.name, provider.default_model)
+
+    async def _attempt(self, provider: LLMProvider, messages, max_tokens, temperature,
+                       models, timeout) -> LLMResult:
+        """Make one call and report its outcome to the provider's circuit breaker"""
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(
+                provider.complete(messages, self._model_for(provider, models), max_tokens, temperature, timeout),
+                timeout
+            )
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+        except Exception as e:
+            if provider.is_retryable(e):
+                provider.breaker.record_failure()
+            else:
+                provider.breaker.release()
+            raise
+        provider.breaker.record_success()
+        result.latency = time.perf_counter() - start
+        provider.record_latency(result.latency)
+        return result
+
+    async def _with_retries(self, provider: LLMProvider, call, deadline: float):
+        """Run call(timeout) until it succeeds, fails permanently or the deadline passes"""
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError(f"Deadline exceeded before provider '{provider.name}' answered")
+            if not provider.breaker.allow_request():
+                raise LLMUnavailableError(
+                    f"Circuit breaker open for provider '{provider.name}'",
+                    retry_after=provider.breaker.retry_after()
+                )
+            try:
+                return await call(remaining)
+            except Exception as e:
+                if attempt >= self.max_retries or not provider.is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                if time.monotonic() + delay >= deadline:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _call(self, provider: LLMProvider, messages, max_tokens, temperature,
+                    models, deadline: float) -> LLMResult:
+        return await self._with_retries(
+            provider,
+            lambda timeout: self._attempt(provider, messages, max_tokens, temperature, models, timeout),
+            deadline
+        )
+
+    async def _hedged_call(self, primary: LLMProvider, secondary: LLMProvider, messages,
+                           max_tokens, temperature, models, deadline: float) -> LLMResult:
+        """Race the secondary provider if the primary is slower than usual"""
+        delay = primary.latency_percentile(self.hedge_percentile)
+        if delay is None:
+            delay = self.hedge_default_delay
+
+        errors = []
+        first = asyncio.create_task(self._call(primary, messages, max_tokens, temperature, models, deadline))
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done:
+                if first.exception() is None:
+                    return first.result()
+                errors.append(first.exception())
+                pending = set()
+            pending.add(asyncio.create_task(
+                self._call(secondary, messages, max_tokens, temperature, models, deadline)
+            ))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            # Also when the caller is cancelled, whether or not the hedge was sent
+            for task in pending:
+                task.cancel()
+        raise self._combine_errors(errors)
+
+    def _combine_errors(self, errors: List[Exception]) -> LLMProviderError:
+        """Build the error reported when no provider could answer"""
+        if errors and all(isinstance(e, LLMUnavailableError) for e in errors):
+            return LLMUnavailableError(
+                f"All LLM providers unavailable: {'; '.join(str(e) for e in errors)}",
+                retry_after=min(e.retry_after for e in errors)
+            )
+        if errors and any(isinstance(e, (LLMTimeoutError, asyncio.TimeoutError)) for e in errors):
+            return LLMTimeoutError(f"LLM deadline exceeded: {'; '.join(repr(e) for e in errors)}")
+        return LLMProviderError(f"All LLM providers failed: {'; '.join(repr(e) for e in errors)}")
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                       models: Optional[Dict[str, str]] = None,
+                       timeout: Optional[float] = None) -> LLMResult:
+        """Return the first successful completion among the providers.
+
+        timeout is the deadline of the whole request, retries and fallbacks included.
+        """
+        if not self.providers:
+            raise LLMProviderError("No LLM provider configured. Please check your API keys.")
+        deadline = time.monotonic() + (timeout or self.timeout)
+
+        errors = []
+        remaining = list(self.providers)
+        if self.hedge and len(remaining) >= 2:
+            try:
+                return await self._hedged_call(
+                    remaining[0], remaining[1], messages, max_tokens, temperature, models, deadline
+                )
+            except LLMProviderError as e:
+                # The combined error already covers both providers
+                errors.append(e)
+            remaining = remaining[2:]
+
+        for provider in remaining:
+            try:
+                return await self._call(provider, messages, max_tokens, temperature, models, deadline)
+            except Exception as e:
+                errors.append(e)
+        raise self._combine_errors(errors)
+
+    async def _open_stream(self, provider: LLMProvider, messages, model, max_tokens,
+                           temperature, timeout):
+        """Start a stream and wait for its first chunk (None if the stream is empty)"""
+        chunks = provider.stream(messages, model, max_tokens, temperature, timeout)
+        try:
+            first_chunk = await asyncio.wait_for(chunks.__anext__(), timeout)
+        except StopAsyncIteration:
+            first_chunk = None
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            await chunks.aclose()
+            raise
+        except Exception as e:
+            if provider.is_retryable(e):
+                provider.breaker.record_failure()
+            else:
+                provider.breaker.release()
+            await chunks.aclose()
+            raise
+        provider.breaker.record_success()
+        return first_chunk, chunks
+
+    async def _rest_of_stream(self, provider: LLMProvider, chunks) -> AsyncIterator[str]:
+        """Yield the chunks after the first one, failing if the provider stalls between two"""
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), self.stream_idle_timeout)
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    provider.breaker.record_failure()
+                    raise LLMTimeoutError(
+                        f"Provider '{provider.name}' sent nothing for {self.stream_idle_timeout}s mid-stream"
+                    ) from None
+                except Exception as e:
+                    if provider.is_retryable(e):
+                        provider.breaker.record_failure()
+                    raise
+                yield chunk
+        finally:
+            # Also when the caller stops reading: don't leave the request open
+            await chunks.aclose()
+
+    async def stream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                     models: Optional[Dict[str, str]] = None,
+                     timeout: Optional[float] = None,
+                     stream_info: Optional[Dict[str, str]] = None) -> AsyncIterator[str]:
+        """Stream from the first provider that starts answering.
+
+        Retries and fallback only happen before the first chunk: once text was
+        sent to the caller, switching providers would produce a different answer.
+        After it, a provider silent for stream_idle_timeout fails the stream.
+        The provider and model used are written to stream_info if given.
+        """
+        if not self.providers:
+            raise LLMProviderError("No LLM provider configured. Please check your API keys.")
+        deadline = time.monotonic() + (timeout or self.timeout)
+
+        errors = []
+        for provider in self.providers:
+            start = time.perf_counter()
+            model = self._model_for(provider, models)
+            try:
+                first_chunk, chunks = await self._with_retries(
+                    provider,
+                    lambda remaining: self._open_stream(provider, messages, model, max_tokens, temperature, remaining),
+                    deadline
+                )
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            if stream_info is not None:
+                stream_info.update(provider=provider.name, model=model)
+            if first_chunk is None:
+                return
+            yield first_chunk
+            async for chunk in self._rest_of_stream(provider, chunks):
+                yield chunk
+            provider.record_latency(time.perf_counter() - start)
+            return
+        raise self._combine_errors(errors)
+
+def build_provider(name: str) -> Optional[LLMProvider]:
+    """Create a provider from settings, or None if it is not configured"""
+    if name == "openai" and settings.OPENAI_API_KEY:
+        return OpenAIProvider(settings.OPENAI_API_KEY, settings.OPENAI_MODEL, settings.OPENAI_BASE_URL)
+    if name == "anthropic" and settings.ANTHROPIC_API_KEY:
+        return AnthropicProvider(settings.ANTHROPIC_API_KEY, settings.ANTHROPIC_MODEL)
+    if name == "fake":
+        return FakeProvider(
+            latency=settings.FAKE_LLM_LATENCY_MS / 1000,
+            failure_rate=settings.FAKE_LLM_FAILURE_RATE
+        )
+    return None
+
+def build_provider_chain() -> ProviderChain:
+    """Create the provider chain described by settings.LLM_PROVIDERS"""
+    providers = []
+    for name in settings.LLM_PROVIDERS.split(","):
+        provider = build_provider(name.strip().lower())
+        if provider:
+            providers.append(provider)
+    return ProviderChain(
+        providers,
+        timeout=settings.LLM_TIMEOUT_SECONDS,
+        hedge=settings.LLM_HEDGE_ENABLED,
+        hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+        hedge_default_delay=settings.LLM_HEDGE_DEFAULT_DELAY,
+        max_retries=settings.LLM_MAX_RETRIES,
+        backoff_base=settings.LLM_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.LLM_BACKOFF_MAX_SECONDS,
+        stream_idle_timeout=settings.LLM_STREAM_IDLE_SECONDS
+    )
@@ -0,0 +1,74 @@
+import random
+import time
+from typing import Callable, Optional
+
+def backoff_delay(attempt: int, base: float, maximum: float,
+                  rng: Optional[random.Random] = None) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    rng = rng or random
+    return rng.uniform(0, min(maximum, base * (2 ** attempt)))
+
+class CircuitBreaker:
+    """Stop calling a provider after repeated failures.
+
+    closed: requests flow normally; consecutive failures are counted.
+    open: requests are rejected until reset_timeout has elapsed.
+    half_open: a single probe request is let through; its outcome closes or
+    re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now"""
+        if self.state == self.OPEN:
+            if self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            self._open()
+            return
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self._open()
+
+    def release(self) -> None:
+        """Forget an allowed request whose outcome says nothing about the provider"""
+        self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit lets a probe request through"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = self._clock()
@@ -0,0 +1,38 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any
+from app.core.config import settings
+
+# Defaults per task, overridden key by key by settings.LLM_TASK_ROUTES
+DEFAULT_TASK_ROUTES: Dict[str, Dict[str, Any]] = {
+    "summary": {"max_tokens": 1000, "temperature": 0.3, "timeout": 120},
+    "summary_update": {"max_tokens": 1000, "temperature": 0.3, "timeout": 90},
+    "quiz": {"max_tokens": 1500, "temperature": 0.4, "timeout": 90},
+    "flashcards": {"max_tokens": 1500, "temperature": 0.4, "timeout": 90},
+    "chat": {"max_tokens": 800, "temperature": 0.3, "timeout": 30},
+    "chat_memory": {"max_tokens": 400, "temperature": 0.2, "timeout": 30},
+}
+
+@dataclass
+class TaskRoute:
+    """How a given LLM task (summary, summary_update, quiz, flashcards, chat, chat_memory) is executed"""
+    task: str
+    max_tokens: int
+    temperature: float
+    timeout: float
+    models: Dict[str, str] = field(default_factory=dict)  # provider name -> model
+
+def get_task_route(task: str) -> TaskRoute:
+    """Build the route of a task from the defaults and the settings overrides"""
+    route = {**DEFAULT_TASK_ROUTES.get(task, {}), **settings.LLM_TASK_ROUTES.get(task, {})}
+    return TaskRoute(
+        task=task,
+        max_tokens=int(route.get("max_tokens", 1000)),
+        temperature=float(route.get("temperature", 0.3)),
+        timeout=float(route.get("timeout", settings.LLM_TIMEOUT_SECONDS)),
+        models=dict(route.get("models", {}))
+    )
+
+def get_task_routes() -> Dict[str, TaskRoute]:
+    """Return the effective route of every known task"""
+    tasks = list(DEFAULT_TASK_ROUTES) + [t for t in settings.LLM_TASK_ROUTES if t not in DEFAULT_TASK_ROUTES]
+    return {task: get_task_route(task) for task in tasks}
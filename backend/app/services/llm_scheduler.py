@@ -0,0 +1,267 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Any, Callable
+from app.core.config import settings
+
+class AdmissionError(Exception):
+    """Raised when LLM work is refused instead of being queued"""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class QuotaExceededError(AdmissionError):
+    """The user spent their token budget: HTTP 429"""
+    status_code = 429
+
+class QueueFullError(AdmissionError):
+    """Too much work is already waiting: HTTP 503"""
+    status_code = 503
+
+class TokenBucket:
+    """Token bucket refilled continuously at refill_per_second"""
+
+    def __init__(self, capacity: float, refill_per_second: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self._clock = clock
+        self._updated_at = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def try_consume(self, amount: float) -> float:
+        """Consume amount and return 0, or return the seconds to wait for it"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class SchedulerTicket:
+    """Handle on an admitted request, used to report the tokens really spent"""
+
+    def __init__(self, user_id: Optional[int], lane: str, reserved_tokens: int):
+        self.user_id = user_id
+        self.lane = lane
+        self.reserved_tokens = reserved_tokens
+        self.used_tokens: Optional[int] = None
+
+class BackgroundWork:
+    """Marks the LLM calls of a background job: set it in background_work"""
+
+    def __init__(self):
+        self.admitted = asyncio.Event()  # Set once a call of the job got a slot
+
+# Calls made while this is set (by a background task) go to the background lane
+background_work: ContextVar[Optional[BackgroundWork]] = ContextVar("background_work", default=None)
+
+class LLMScheduler:
+    """Admission control and fair-share scheduling of LLM calls.
+
+    Work goes to one of two lanes. Interactive work (chat) is always dispatched
+    first, and batch work (generation) may only use batch_max_concurrency of
+    the max_concurrency slots, so chat keeps free capacity. Within a lane, users
+    are served round-robin so one user's backlog can't starve the others. Each
+    user spends tokens from a token bucket (429 when empty), and each lane's
+    queue is bounded (503 when full or when waiting takes too long).
+
+    Background work (speculative pre-generation) has a third lane that only
+    gets a slot when capacity is idle: nothing waiting in the other lanes and
+    fewer than background_max_concurrency background calls running. It
+    doesn't draw on the users' token buckets.
+    """
+
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+    BACKGROUND = "background"
+    LANES = (INTERACTIVE, BATCH, BACKGROUND)
+
+    # Tasks not listed here run in the batch lane
+    TASK_LANES = {"chat": INTERACTIVE, "chat_memory": INTERACTIVE}
+
+    def __init__(self, max_concurrency: int = 8, batch_max_concurrency: int = 6,
+                 max_queue_depth: int = 50, queue_timeout: float = 30.0,
+                 user_tokens_per_minute: int = 200000, user_token_burst: int = 400000,
+                 background_max_concurrency: int = 1, background_queue_timeout: float = 600.0):
+        self.max_concurrency = max_concurrency
+        self.batch_max_concurrency = min(batch_max_concurrency, max_concurrency)
+        self.background_max_concurrency = min(background_max_concurrency, max_concurrency)
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self.background_queue_timeout = background_queue_timeout
+        self.user_tokens_per_minute = user_tokens_per_minute
+        self.user_token_burst = user_token_burst
+
+        self._running = {lane: 0 for lane in self.LANES}
+        self._queued = {lane: 0 for lane in self.LANES}
+        # Per lane: user -> waiting futures, in round-robin order
+        self._queues: Dict[str, "OrderedDict[Any, deque]"] = {lane: OrderedDict() for lane in self.LANES}
+        self._buckets: Dict[Any, TokenBucket] = {}
+        self._avg_duration = 1.0  # Moving average of slot durations, in seconds
+        self.rejected = {"quota": 0, "queue_full": 0, "queue_timeout": 0}
+
+    @classmethod
+    def from_settings(cls) -> "LLMScheduler":
+        return cls(
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            batch_max_concurrency=settings.LLM_BATCH_MAX_CONCURRENCY,
+            max_queue_depth=settings.LLM_MAX_QUEUE_DEPTH,
+            queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+            user_tokens_per_minute=settings.LLM_USER_TOKENS_PER_MINUTE,
+            user_token_burst=settings.LLM_USER_TOKEN_BURST,
+            background_max_concurrency=settings.LLM_BACKGROUND_MAX_CONCURRENCY,
+            background_queue_timeout=settings.LLM_BACKGROUND_QUEUE_TIMEOUT_SECONDS
+        )
+
+    def lane_for(self, task: str) -> str:
+        return self.TASK_LANES.get(task, self.BATCH)
+
+    def _bucket(self, user_id: Any) -> TokenBucket:
+        if user_id not in self._buckets:
+            self._buckets[user_id] = TokenBucket(self.user_token_burst, self.user_tokens_per_minute / 60)
+        return self._buckets[user_id]
+
+    def _can_start(self, lane: str) -> bool:
+        if sum(self._running.values()) >= self.max_concurrency:
+            return False
+        if lane == self.BACKGROUND:
+            return (
+                self._running[self.BACKGROUND] < self.background_max_concurrency
+                and not self._queued[self.INTERACTIVE] and not self._queued[self.BATCH]
+            )
+        return lane != self.BATCH or self._running[self.BATCH] < self.batch_max_concurrency
+
+    def _estimated_wait(self, lane: str) -> float:
+        """Rough time before queued work of this lane gets a slot"""
+        slots = {
+            self.INTERACTIVE: self.max_concurrency,
+            self.BATCH: self.batch_max_concurrency,
+            self.BACKGROUND: self.background_max_concurrency
+        }[lane]
+        return max(1.0, self._avg_duration * (self._queued[lane] + 1) / max(1, slots))
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting work: interactive lane first, background last, users in turn"""
+        for lane in self.LANES:
+            queues = self._queues[lane]
+            while queues and self._can_start(lane):
+                user_id, waiting = queues.popitem(last=False)
+                future = waiting.popleft()
+                self._queued[lane] -= 1
+                if waiting:
+                    queues[user_id] = waiting  # Back of the round-robin
+                if future.done():
+                    continue
+                self._running[lane] += 1
+                future.set_result(None)
+
+    def _remove_waiter(self, lane: str, user_id: Any, future: asyncio.Future) -> None:
+        waiting = self._queues[lane].get(user_id)
+        if waiting and future in waiting:
+            waiting.remove(future)
+            self._queued[lane] -= 1
+            if not waiting:
+                del self._queues[lane][user_id]
+
+    @asynccontextmanager
+    async def slot(self, user_id: Optional[int], task: str, tokens: int):
+        """Wait for a slot to run an LLM call for the user, or raise AdmissionError.
+
+        tokens is reserved from the user's bucket up front; whatever the ticket
+        reports as unused when the call ends is refunded.
+        """
+        work = background_work.get()
+        lane = self.BACKGROUND if work is not None else self.lane_for(task)
+        # Background work doesn't spend the user's budget (which their own requests would
+        # then find empty): its lane is already limited to idle capacity
+        quota_enabled = user_id is not None and lane != self.BACKGROUND and self.user_tokens_per_minute > 0
+        bucket = self._bucket(user_id) if quota_enabled else None
+        if bucket is not None:
+            wait = bucket.try_consume(tokens)
+            if wait > 0:
+                self.rejected["quota"] += 1
+                raise QuotaExceededError("LLM token quota exceeded, please retry later", retry_after=wait)
+
+        ticket = SchedulerTicket(user_id, lane, tokens)
+        try:
+            await self._acquire(lane, user_id)
+        except BaseException:
+            if bucket is not None:
+                bucket.refund(tokens)
+            raise
+        if work is not None:
+            work.admitted.set()
+
+        start = time.monotonic()
+        try:
+            yield ticket
+        except BaseException:
+            ticket.used_tokens = 0
+            raise
+        finally:
+            self._running[lane] -= 1
+            self._avg_duration = 0.9 * self._avg_duration + 0.1 * (time.monotonic() - start)
+            if bucket is not None and ticket.used_tokens is not None:
+                bucket.refund(max(0, tokens - ticket.used_tokens))
+            self._dispatch()
+
+    async def _acquire(self, lane: str, user_id: Any) -> None:
+        if not self._queued[lane] and self._can_start(lane):
+            self._running[lane] += 1
+            return
+
+        if self._queued[lane] >= self.max_queue_depth:
+            self.rejected["queue_full"] += 1
+            raise QueueFullError("LLM queue is full, please retry later", retry_after=self._estimated_wait(lane))
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues[lane].setdefault(user_id, deque()).append(future)
+        self._queued[lane] += 1
+        timeout = self.background_queue_timeout if lane == self.BACKGROUND else self.queue_timeout
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if future.done():
+                return
+            future.cancel()
+            self._remove_waiter(lane, user_id, future)
+            self.rejected["queue_timeout"] += 1
+            raise QueueFullError("Timed out waiting for LLM capacity", retry_after=self._estimated_wait(lane))
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted as we were cancelled: give it back
+                self._running[lane] -= 1
+                self._dispatch()
+            else:
+                future.cancel()
+                self._remove_waiter(lane, user_id, future)
+            raise
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current load, for monitoring"""
+        return {
+            "running": dict(self._running),
+            "queued": dict(self._queued),
+            "max_concurrency": self.max_concurrency,
+            "batch_max_concurrency": self.batch_max_concurrency,
+            "background_max_concurrency": self.background_max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_slot_seconds": round(self._avg_duration, 3),
+            "rejected": dict(self.rejected)
+        }
+
+llm_scheduler = LLMScheduler.from_settings()
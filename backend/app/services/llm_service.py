@@ -1,17 +1,37 @@
-from openai import OpenAI
-from typing import List, Dict, Any, Optional
-from app.core.config import settings
-import json
+from typing import List, Dict, Any, Optional, AsyncIterator
+from app.services.json_stream import JSONArrayStreamParser, parse_json_array
+from app.services.llm_providers import ProviderChain, LLMResult, LLMProviderError, build_provider_chain, estimate_tokens, messages_text
+from app.services.llm_routing import get_task_route
+from app.services.llm_metrics import llm_metrics
+from app.services.llm_scheduler import LLMScheduler, AdmissionError, llm_scheduler
+from app.core.timing import record_stage
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Bump a task's version when its prompt changes: what the old prompt generated becomes outdated
+PROMPT_VERSIONS = {"summary": 1, "quiz": 1, "flashcards": 1}
 
 class LLMService:
     # GPT-4o-mini has 128k token limit (~4 chars per token)
     # Reserve tokens for prompt + response
     MAX_CONTENT_CHARS = 400000  # ~100k tokens for content (handles large PDFs)
-
-    def __init__(self):
-        self.client = None
-        if settings.OPENAI_API_KEY:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    MAX_AVOIDED_QUESTIONS = 50  # Existing questions listed in a quiz prompt
+
+    def __init__(self, providers: Optional[ProviderChain] = None, scheduler: Optional[LLMScheduler] = None):
+        # Providers (OpenAI, Anthropic, fake...) with fallback, from settings by default
+        self.providers = providers or build_provider_chain()
+        # Shared by every LLMService so that quotas and lanes are global
+        self.scheduler = scheduler or llm_scheduler
+
+    def generator(self, task: str) -> str:
+        """Prompt version and preferred model of a task, stored with the materials it generates"""
+        if not self.providers.providers:
+            return f"{task}:v{PROMPT_VERSIONS.get(task, 1)}:none"
+        provider = self.providers.providers[0]
+        model = get_task_route(task).models.get(provider.name, provider.default_model)
+        return f"{task}:v{PROMPT_VERSIONS.get(task, 1)}:{provider.name}/{model}"
 
     def _truncate_content(self, content: str, max_chars: int = None) -> str:
         """Truncate content if it exceeds token limits"""
@@ -25,7 +45,74 @@ class LLMService:
         truncated = content[:max_chars]
         return truncated + "\n\n[Content truncated due to length...]"
 
-    async def generate_summary(self, content: str, title: str = "") -> str:
+    async def _complete(self, task: str, messages: List[Dict[str, str]], user_id: Optional[int] = None) -> LLMResult:
+        """Run a completion with the route configured for the task and record metrics"""
+        route = get_task_route(task)
+        reserved_tokens = estimate_tokens(messages_text(messages)) + route.max_tokens
+        queued = time.perf_counter()
+        async with self.scheduler.slot(user_id, task, reserved_tokens) as ticket:
+            start = time.perf_counter()
+            record_stage("llm_queue", start - queued)
+            try:
+                result = await self.providers.complete(
+                    messages,
+                    max_tokens=route.max_tokens,
+                    temperature=route.temperature,
+                    models=route.models,
+                    timeout=route.timeout
+                )
+            except Exception as e:
+                llm_metrics.record_error(task, time.perf_counter() - start, error=type(e).__name__)
+                raise
+            finally:
+                record_stage("llm", time.perf_counter() - start)
+            ticket.used_tokens = result.prompt_tokens + result.completion_tokens
+
+        latency = time.perf_counter() - start
+        llm_metrics.record(task, result.provider, result.model, latency, result.prompt_tokens, result.completion_tokens)
+        logger.info(
+            "llm_call task=%s provider=%s model=%s latency=%.3f prompt_tokens=%d completion_tokens=%d",
+            task, result.provider, result.model, latency, result.prompt_tokens, result.completion_tokens
+        )
+        return result
+
+    async def _stream_completion(self, task: str, messages: List[Dict[str, str]], user_id: Optional[int] = None) -> AsyncIterator[str]:
+        """Yield the text deltas of a streamed completion and record metrics"""
+        route = get_task_route(task)
+        prompt_tokens = estimate_tokens(messages_text(messages))
+        generated = []
+        stream_info = {"provider": "unknown", "model": "unknown"}
+        queued = time.perf_counter()
+        async with self.scheduler.slot(user_id, task, prompt_tokens + route.max_tokens) as ticket:
+            start = time.perf_counter()
+            record_stage("llm_queue", start - queued)
+            try:
+                async for text in self.providers.stream(
+                    messages,
+                    max_tokens=route.max_tokens,
+                    temperature=route.temperature,
+                    models=route.models,
+                    timeout=route.timeout,
+                    stream_info=stream_info
+                ):
+                    generated.append(text)
+                    yield text
+            except Exception as e:
+                llm_metrics.record_error(task, time.perf_counter() - start, error=type(e).__name__)
+                raise
+            # Streaming APIs don't report usage: estimate it
+            completion_tokens = estimate_tokens("".join(generated))
+            ticket.used_tokens = prompt_tokens + completion_tokens
+
+        latency = time.perf_counter() - start
+        provider, model = stream_info["provider"], stream_info["model"]
+        llm_metrics.record(task, provider, model, latency, prompt_tokens, completion_tokens)
+        logger.info(
+            "llm_stream task=%s provider=%s model=%s latency=%.3f prompt_tokens=%d completion_tokens=%d",
+            task, provider, model, latency, prompt_tokens, completion_tokens
+        )
+
+    async def generate_summary(self, content: str, title: str = "", user_id: Optional[int] = None) -> str:
         """Generate a summary of the document content"""
         # Truncate content to avoid token limits
         truncated_content = self._truncate_content(content)
@@ -43,26 +130,65 @@ class LLMService:
         """
 
         try:
-            if not self.client:
-                raise Exception("OpenAI client not initialized. Please check your API key.")
-
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
+            result = await self._complete(
+                "summary",
+                [
                     {"role": "system", "content": "You are an expert at creating clear and comprehensive summaries of educational content."},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=1000,
-                temperature=0.3
+                user_id=user_id
             )
-            return response.choices[0].message.content.strip()
+            return result.text.strip()
+        except (LLMProviderError, AdmissionError):
+            # Keep the type so callers can tell timeouts, outages and overload apart
+            raise
         except Exception as e:
             raise Exception(f"Failed to generate summary: {str(e)}")
 
-    async def generate_quiz(self, content: str, title: str = "", num_questions: int = 5) -> List[Dict[str, Any]]:
-        """Generate quiz questions from document content"""
+    async def update_summary(self, summary: str, removed: str, added: str, title: str = "",
+                             user_id: Optional[int] = None) -> str:
+        """Revise a summary for a new version of its document, from the changed passages only"""
+        prompt = f"""
+        The document below has been revised. Update its summary so that it matches the new version.
+
+        Document Title: {title}
+
+        Current summary:
+        {summary}
+
+        Passages removed from the document:
+        {self._truncate_content(removed) or "(none)"}
+
+        Passages added to the document:
+        {self._truncate_content(added) or "(none)"}
+
+        Return only the updated summary. Keep the parts of the summary that the changes don't affect as they are.
+        """
+
+        try:
+            result = await self._complete(
+                "summary_update",
+                [
+                    {"role": "system", "content": "You are an expert at creating clear and comprehensive summaries of educational content."},
+                    {"role": "user", "content": prompt}
+                ],
+                user_id=user_id
+            )
+            return result.text.strip()
+        except (LLMProviderError, AdmissionError):
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to update summary: {str(e)}")
+
+    def _quiz_messages(self, content: str, title: str, num_questions: int, avoid: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """Build the chat messages used to generate quiz questions"""
         # Truncate content to avoid token limits
         truncated_content = self._truncate_content(content)
+        # Questions already in the document's bank: ask for other ones
+        existing = ""
+        if avoid:
+            listed = "\n".join(f"        - {question[:200]}" for question in avoid[-self.MAX_AVOIDED_QUESTIONS:])
+            existing = f"\n        Do not repeat or reword these existing questions:\n{listed}\n"
 
         prompt = f"""
         Based on the following document content, create {num_questions} multiple-choice quiz questions.
@@ -77,7 +203,7 @@ class LLMService:
         2. Four answer options (A, B, C, D)
         3. The correct answer
         4. A brief explanation of why the answer is correct
-
+{existing}
         Format your response as a JSON array of objects with the following structure:
         [
             {{
@@ -89,33 +215,47 @@ class LLMService:
         ]
         """
 
-        try:
-            if not self.client:
-                raise Exception("OpenAI client not initialized. Please check your API key.")
+        return [
+            {"role": "system", "content": "You are an expert at creating educational quiz questions. Always respond with valid JSON."},
+            {"role": "user", "content": prompt}
+        ]
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert at creating educational quiz questions. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.4
+    async def generate_quiz(self, content: str, title: str = "", num_questions: int = 5, user_id: Optional[int] = None,
+                            avoid: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Generate quiz questions from document content"""
+        try:
+            result = await self._complete(
+                "quiz",
+                self._quiz_messages(content, title, num_questions, avoid),
+                user_id=user_id
             )
 
-            quiz_json = response.choices[0].message.content.strip()
-            # Clean up the response in case it has markdown formatting
-            if quiz_json.startswith("```json"):
-                quiz_json = quiz_json[7:]
-            if quiz_json.endswith("```"):
-                quiz_json = quiz_json[:-3]
+            # Keeps every well-formed question even if the tail is malformed
+            return parse_json_array(result.text)
+        except (LLMProviderError, AdmissionError):
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to generate quiz: {str(e)}")
 
-            return json.loads(quiz_json.strip())
+    async def stream_quiz(self, content: str, title: str = "", num_questions: int = 5, user_id: Optional[int] = None,
+                          avoid: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream quiz questions one by one as the model writes them"""
+        parser = JSONArrayStreamParser()
+        try:
+            async for text in self._stream_completion(
+                "quiz",
+                self._quiz_messages(content, title, num_questions, avoid),
+                user_id=user_id
+            ):
+                for question in parser.feed(text):
+                    yield question
+        except (LLMProviderError, AdmissionError):
+            raise
         except Exception as e:
             raise Exception(f"Failed to generate quiz: {str(e)}")
 
-    async def generate_flashcards(self, content: str, title: str = "", num_cards: int = 10) -> List[Dict[str, str]]:
-        """Generate flashcards from document content"""
+    def _flashcard_messages(self, content: str, title: str, num_cards: int) -> List[Dict[str, str]]:
+        """Build the chat messages used to generate flashcards"""
         # Truncate content to avoid token limits
         truncated_content = self._truncate_content(content)
 
@@ -142,33 +282,47 @@ class LLMService:
         ]
         """
 
-        try:
-            if not self.client:
-                raise Exception("OpenAI client not initialized. Please check your API key.")
+        return [
+            {"role": "system", "content": "You are an expert at creating effective study flashcards. Always respond with valid JSON."},
+            {"role": "user", "content": prompt}
+        ]
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert at creating effective study flashcards. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.4
+    async def generate_flashcards(self, content: str, title: str = "", num_cards: int = 10, user_id: Optional[int] = None) -> List[Dict[str, str]]:
+        """Generate flashcards from document content"""
+        try:
+            result = await self._complete(
+                "flashcards",
+                self._flashcard_messages(content, title, num_cards),
+                user_id=user_id
             )
 
-            flashcards_json = response.choices[0].message.content.strip()
-            # Clean up the response in case it has markdown formatting
-            if flashcards_json.startswith("```json"):
-                flashcards_json = flashcards_json[7:]
-            if flashcards_json.endswith("```"):
-                flashcards_json = flashcards_json[:-3]
+            # Keeps every well-formed card even if the tail is malformed
+            return parse_json_array(result.text)
+        except (LLMProviderError, AdmissionError):
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to generate flashcards: {str(e)}")
 
-            return json.loads(flashcards_json.strip())
+    async def stream_flashcards(self, content: str, title: str = "", num_cards: int = 10, user_id: Optional[int] = None) -> AsyncIterator[Dict[str, str]]:
+        """Stream flashcards one by one as the model writes them"""
+        parser = JSONArrayStreamParser()
+        try:
+            async for text in self._stream_completion(
+                "flashcards",
+                self._flashcard_messages(content, title, num_cards),
+                user_id=user_id
+            ):
+                for card in parser.feed(text):
+                    yield card
+        except (LLMProviderError, AdmissionError):
+            raise
         except Exception as e:
             raise Exception(f"Failed to generate flashcards: {str(e)}")
 
-    async def answer_question(self, question: str, document_content: str, document_title: str = "") -> str:
-        """Answer a question based on document content"""
+    async def answer_question(self, question: str, document_content: str, document_title: str = "",
+                              user_id: Optional[int] = None, history: Optional[List[Dict[str, str]]] = None,
+                              memory: str = "") -> str:
+        """Answer a question based on document content and the conversation so far"""
         # Truncate content to avoid token limits
         truncated_content = self._truncate_content(document_content)
 
@@ -186,19 +340,49 @@ class LLMService:
         If the answer is not found in the document, please state that clearly.
         """
 
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant that answers questions based on provided document content. Be accurate and cite the document when possible."}
+        ]
+        if memory:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{memory}"})
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": prompt})
+
         try:
-            if not self.client:
-                raise Exception("OpenAI client not initialized. Please check your API key.")
+            result = await self._complete("chat", messages, user_id=user_id)
+            return result.text.strip()
+        except (LLMProviderError, AdmissionError):
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to answer question: {str(e)}")
+
+    async def summarize_conversation(self, summary: str, messages: List[Dict[str, str]], user_id: Optional[int] = None) -> str:
+        """Fold conversation messages into the running summary of a chat session"""
+        transcript = "\n".join(f"{message['role'].capitalize()}: {message['content']}" for message in messages)
+        prompt = f"""
+        Update the summary of a tutoring conversation with the new messages below.
+
+        Current summary:
+        {summary or "(empty)"}
+
+        New messages:
+        {transcript}
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that answers questions based on provided document content. Be accurate and cite the document when possible."},
+        Return only the updated summary, in at most 200 words. Keep the topics covered, the facts
+        established, the student's open questions and anything they said they found difficult.
+        """
+
+        try:
+            result = await self._complete(
+                "chat_memory",
+                [
+                    {"role": "system", "content": "You maintain concise running summaries of conversations between a student and a tutor."},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=800,
-                temperature=0.3
+                user_id=user_id
             )
-            return response.choices[0].message.content.strip()
+            return result.text.strip()
+        except (LLMProviderError, AdmissionError):
+            raise
         except Exception as e:
-            raise Exception(f"Failed to answer question: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to summarize conversation: {str(e)}")
\ No newline at end of file
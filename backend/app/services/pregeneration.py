@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import PREGENERATION_JOBS
+from app.services.llm_scheduler import BackgroundWork, background_work
+
+logger = logging.getLogger(__name__)
+
+# In the order jobs are started: the summary is what users open first
+PREGENERATED_MATERIALS = ("summary", "quiz", "flashcards")
+
+class Pregenerator:
+    """Speculative generation of a new document's learning materials.
+
+    One background task per (document, material). Its LLM call runs in the
+    scheduler's background lane, so it only gets a slot when capacity is
+    idle. run(material, document_id, user_id) does the work and returns
+    False when there was nothing to do (the material already exists).
+    """
+
+    def __init__(self, run: Callable[[str, int, int], Awaitable[bool]]):
+        self.run = run
+        self._jobs: Dict[Tuple[int, str], Tuple[asyncio.Task, BackgroundWork]] = {}
+
+    def schedule(self, document_id: int, user_id: int, materials: Optional[Iterable[str]]) -> None:
+        """Start the jobs of the materials the user opted in to"""
+        materials = set(materials or ())
+        if not settings.PREGENERATION_ENABLED or not materials:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Not called from the event loop (worker thread, script)
+        for material in PREGENERATED_MATERIALS:
+            key = (document_id, material)
+            if material in materials and key not in self._jobs:
+                work = BackgroundWork()
+                self._jobs[key] = (asyncio.create_task(self._job(material, document_id, user_id, work)), work)
+
+    async def _job(self, material: str, document_id: int, user_id: int, work: BackgroundWork) -> None:
+        background_work.set(work)  # Context of this task only
+        outcome = "skipped"
+        try:
+            if await self.run(material, document_id, user_id):
+                outcome = "generated"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            # Quota, queue timeout, provider outage...: the user generates it on demand instead
+            outcome = "failed"
+            logger.info("pregeneration document=%s material=%s failed: %s", document_id, material, e)
+        finally:
+            PREGENERATION_JOBS.labels(material, outcome).inc()
+            job = self._jobs.get((document_id, material))
+            if job and job[0] is asyncio.current_task():
+                del self._jobs[(document_id, material)]
+
+    async def claim(self, document_id: int, material: str) -> None:
+        """Called before generating a material on request.
+
+        A job whose LLM call already has a slot is awaited: its result is then
+        in the database. A job still waiting for idle capacity is cancelled,
+        so the request doesn't queue behind it.
+        """
+        job = self._jobs.get((document_id, material))
+        if job is None or job[0] is asyncio.current_task():
+            return
+        task, work = job
+        if work.admitted.is_set():
+            await asyncio.wait([task])
+        else:
+            del self._jobs[(document_id, material)]
+            task.cancel()
+
+    def cancel(self, document_id: int) -> None:
+        """Drop the jobs of a document (deleted, or replaced by a new version)"""
+        for material in PREGENERATED_MATERIALS:
+            job = self._jobs.pop((document_id, material), None)
+            if job:
+                job[0].cancel()
+
+    def shutdown(self) -> None:
+        for task, _ in self._jobs.values():
+            task.cancel()
+        self._jobs.clear()
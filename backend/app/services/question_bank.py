@@ -0,0 +1,122 @@
+"""Question bank: every quiz question generated for a document, sampled per user.
+
+Generated questions accumulate in the document's quiz (duplicates dropped)
+instead of being regenerated. A new quiz takes the questions the user last
+answered wrong (up to half of it) and the ones they haven't been served yet,
+then the least recently served: most quizzes are a database query, not an
+LLM call.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, contains_eager
+from app.core.config import settings
+from app.models.learning_material import Quiz, QuizQuestion, QuestionStat
+from app.services.vector_index import vector_index
+
+BankRow = Tuple[QuizQuestion, Optional[QuestionStat]]
+
+def load_bank(db: Session, document_id: int, user_id: int) -> List[BankRow]:
+    """The questions of a document's quizzes (quiz loaded too) with the user's stats, in one query"""
+    return [
+        (question, stat) for question, stat in db.query(QuizQuestion, QuestionStat).join(QuizQuestion.quiz).outerjoin(
+            QuestionStat, (QuestionStat.question_id == QuizQuestion.id) & (QuestionStat.user_id == user_id)
+        ).options(contains_eager(QuizQuestion.quiz)).filter(
+            Quiz.document_id == document_id
+        ).order_by(Quiz.id, QuizQuestion.order_index, QuizQuestion.id)
+    ]
+
+class DuplicateFilter:
+    """Tells new questions from ones the bank already has, reworded ones included.
+
+    Question texts are compared with the vector index's embedder: a cosine
+    above QUESTION_BANK_DUPLICATE_SIMILARITY is a duplicate.
+    """
+
+    def __init__(self, questions: Iterable[str], threshold: Optional[float] = None):
+        self.threshold = settings.QUESTION_BANK_DUPLICATE_SIMILARITY if threshold is None else threshold
+        texts = list(questions)
+        embedder = vector_index.embedder
+        self.vectors = embedder.embed(texts) if texts else np.zeros((0, embedder.dim), dtype=np.float32)
+
+    def is_new(self, question: str) -> bool:
+        """True the first time a question is seen (it is remembered)"""
+        vector = vector_index.embedder.embed([question])[0]
+        if len(self.vectors) and float((self.vectors @ vector).max()) >= self.threshold:
+            return False
+        self.vectors = np.vstack([self.vectors, vector])
+        return True
+
+@dataclass
+class Sample:
+    questions: List[QuizQuestion]  # Unseen and weak ones first
+    fresh: int  # How many are unseen or weak
+
+def _served_at(stat: QuestionStat) -> float:
+    return stat.last_served_at.timestamp() if stat.last_served_at else 0.0
+
+def sample_questions(rows: List[BankRow], count: int, rng: random.Random = random) -> Sample:
+    """count questions: up to half answered wrong last time, unseen ones (random order), then the least recently served"""
+    unseen, weak, rest = [], [], []
+    for question, stat in rows:
+        if stat is not None and stat.last_answer_correct is False:
+            weak.append((question, stat))
+        elif stat is None or (not stat.times_served and stat.last_answer_correct is None):
+            unseen.append(question)
+        else:
+            rest.append((question, stat))
+    rng.shuffle(unseen)
+    weak.sort(key=lambda row: _served_at(row[1]))
+    rest.sort(key=lambda row: _served_at(row[1]))
+    weak_first = (count + 1) // 2  # The rest of the weak ones only when there are no unseen ones left
+    questions = [question for question, _ in weak[:weak_first]] + unseen + [question for question, _ in weak[weak_first:] + rest]
+    return Sample(questions[:count], min(count, len(unseen) + len(weak)))
+
+def _upsert_stats(db: Session, rows: List[Dict]) -> None:
+    """Insert the user's stats of the questions, or add the counts to the existing ones.
+
+    One INSERT ... ON CONFLICT DO UPDATE: two requests of the same user
+    (two tabs, a retry) can't both insert a row and hit the unique index.
+    """
+    if not rows:
+        return
+    insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    statement = insert(QuestionStat).values(rows)
+    excluded = statement.excluded
+    updates = {
+        counter: getattr(QuestionStat, counter) + getattr(excluded, counter)
+        for counter in ("times_served", "times_correct", "times_wrong")
+    }
+    for column in ("last_answer_correct", "last_served_at"):
+        # Only the columns these rows set
+        if rows[0].get(column) is not None:
+            updates[column] = getattr(excluded, column)
+    db.execute(statement.on_conflict_do_update(index_elements=["user_id", "question_id"], set_=updates))
+
+def _stat_row(user_id: int, question_id: int, **values) -> Dict:
+    return {"user_id": user_id, "question_id": question_id, "times_served": 0, "times_correct": 0, "times_wrong": 0,
+            "last_answer_correct": None, "last_served_at": None, **values}
+
+def record_served(db: Session, user_id: int, question_ids: List[int]) -> None:
+    """Count the questions of a quiz as served to the user (the caller commits)"""
+    now = datetime.now(timezone.utc)
+    _upsert_stats(db, [_stat_row(user_id, question_id, times_served=1, last_served_at=now) for question_id in question_ids])
+
+def record_answers(db: Session, user_id: int, document_id: int, answers: Dict[int, str]) -> List[Tuple[QuizQuestion, bool]]:
+    """Grade answers (question id -> letter) to questions of the document; unknown ids are ignored"""
+    questions = db.query(QuizQuestion).join(QuizQuestion.quiz).filter(
+        Quiz.document_id == document_id, QuizQuestion.id.in_(list(answers))
+    ).order_by(QuizQuestion.id).all()
+    graded = []
+    for question in questions:
+        correct = answers[question.id].strip()[:1].upper() == question.correct_answer.strip().upper()
+        graded.append((question, correct))
+    _upsert_stats(db, [
+        _stat_row(user_id, question.id, times_correct=int(correct), times_wrong=int(not correct), last_answer_correct=correct)
+        for question, correct in graded
+    ])
+    return graded
@@ -0,0 +1,281 @@
+"""Single-pass text extraction for Markdown and DOCX.
+
+Both extractors walk the document once, in order, and write plain text that
+keeps the structure: headings as "#" lines (chunk_text starts a new chunk at
+each), list items as "- " lines, table rows as cells joined with " | ", and a
+blank line between blocks.
+"""
+import html
+import re
+import zipfile
+from typing import Dict, Iterable, List, Optional, Tuple
+
+def heading(level: int, text: str) -> str:
+    return f"{'#' * min(max(level, 1), 6)} {text}"
+
+# --- Markdown ------------------------------------------------------------------
+
+FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+ATX_HEADING = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+SETEXT_UNDERLINE = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+THEMATIC_BREAK = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+LIST_ITEM = re.compile(r"^([ \t]*)([-*+]|\d{1,9}[.)])[ \t]+(.*)$")
+BLOCKQUOTE = re.compile(r"^ {0,3}> ?")
+TABLE_DELIMITER = re.compile(r"^ {0,3}\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+SKIPPED_LINE = re.compile(r"^ {0,3}(?:\[[^\]]+\]:[ \t]+\S|<!--.*-->[ \t]*$)")  # Link definitions, comments
+TABLE_PIPE = re.compile(r"(?<!\\)\|")
+
+MARKUP_CHARS = re.compile(r"[*_`\[\]<>&\\~]")
+CODE_SPAN = re.compile(r"(`+)(.+?)\1", re.S)
+ESCAPED = re.compile(r"\\([!-/:-@\[-`{-~])")
+ESCAPE_BASE = 0xE000  # Escaped characters are parked in the private use area while markup is removed
+PARKED = re.compile("[\ue000-\ue07f]")
+INLINE_MARKUP = [
+    (re.compile(r"!\[([^\]]*)\]\([^)]*\)"), r"\1"),  # Images: alt text
+    (re.compile(r"\[([^\]]+)\](?:\([^)]*\)|\[[^\]]*\])"), r"\1"),  # Links
+    (re.compile(r"<((?:https?|mailto):[^>\s]+)>"), r"\1"),  # Autolinks
+    (re.compile(r"<!--.*?-->|</?[A-Za-z][^>]*>", re.S), ""),  # Inline HTML
+    (re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1"), r"\2"),
+    (re.compile(r"\*(?=\S)(.+?)(?<=\S)\*"), r"\1"),
+    (re.compile(r"(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)"), r"\1"),  # Not inside snake_case words
+    (re.compile(r"~~(?=\S)(.+?)(?<=\S)~~"), r"\1"),
+]
+
+def _markup_text(text: str) -> str:
+    text = ESCAPED.sub(lambda m: chr(ESCAPE_BASE + ord(m.group(1))), text)
+    for pattern, replacement in INLINE_MARKUP:
+        text = pattern.sub(replacement, text)
+    text = html.unescape(text)
+    return PARKED.sub(lambda m: chr(ord(m.group()) - ESCAPE_BASE), text)
+
+def inline_text(text: str) -> str:
+    """Plain text of inline Markdown; code spans are kept verbatim"""
+    if not MARKUP_CHARS.search(text):
+        return text.strip()
+    parts = []
+    position = 0
+    for match in CODE_SPAN.finditer(text):
+        parts.append(_markup_text(text[position:match.start()]))
+        parts.append(match.group(2).strip())
+        position = match.end()
+    parts.append(_markup_text(text[position:]))
+    return "".join(parts).strip()
+
+def table_row(line: str) -> str:
+    cells = TABLE_PIPE.split(line.strip().strip("|"))
+    return " | ".join(inline_text(cell.replace("\\|", "|")) for cell in cells)
+
+class MarkdownScanner:
+    """Line by line Markdown block scanner, writing plain text blocks"""
+
+    def __init__(self):
+        self.blocks: List[str] = []
+        self.paragraph: List[str] = []
+        self.items: List[Tuple[str, List[str]]] = []  # (prefix, lines) of the open list
+        self.table: Optional[List[str]] = None
+        self.code: List[str] = []
+        self.fence: Optional[str] = None  # Opening fence of the open code block
+
+    def flush(self) -> None:
+        """End the open paragraph, list, table or code block"""
+        if self.paragraph:
+            self.blocks.append(inline_text("\n".join(self.paragraph)))
+            self.paragraph = []
+        if self.items:
+            self.blocks.append("\n".join(prefix + inline_text(" ".join(lines)) for prefix, lines in self.items))
+            self.items = []
+        if self.table:
+            self.blocks.append("\n".join(self.table))
+        self.table = None
+        if self.code:
+            self.blocks.append("\n".join(self.code).strip("\n"))
+            self.code = []
+
+    def feed(self, line: str) -> None:
+        line = line.rstrip("\r\n")
+        if self.fence:
+            if line.strip().startswith(self.fence) and not line.strip().strip(self.fence[0]):
+                self.fence = None
+                self.flush()
+            else:
+                self.code.append(line)
+            return
+        if self.table is not None and "|" in line:
+            self.table.append(table_row(line))
+            return
+        if not line.strip():
+            self.flush()
+            return
+        if not (self.paragraph or self.items) and (line.startswith("    ") or line.startswith("\t")):
+            self.code.append(line[1:] if line.startswith("\t") else line[4:])  # Indented code
+            return
+        if self.code or self.table is not None:
+            self.flush()
+
+        match = BLOCKQUOTE.match(line)
+        while match:
+            line = line[match.end():]
+            match = BLOCKQUOTE.match(line)
+        if not line.strip():
+            self.flush()
+            return
+
+        match = FENCE.match(line)
+        if match:
+            self.flush()
+            self.fence = match.group(1)
+            return
+        match = ATX_HEADING.match(line)
+        if match:
+            self.flush()
+            self.blocks.append(heading(len(match.group(1)), inline_text(match.group(2) or "")))
+            return
+        match = SETEXT_UNDERLINE.match(line)
+        if match and self.paragraph:
+            text = inline_text(" ".join(self.paragraph))
+            self.paragraph = []
+            self.flush()
+            self.blocks.append(heading(1 if match.group(1)[0] == "=" else 2, text))
+            return
+        if THEMATIC_BREAK.match(line):
+            self.flush()
+            return
+        if self.paragraph and "|" in self.paragraph[-1] and "|" in line and TABLE_DELIMITER.match(line):
+            header = self.paragraph.pop()
+            self.flush()
+            self.table = [table_row(header)]
+            return
+        if SKIPPED_LINE.match(line):
+            return
+        match = LIST_ITEM.match(line)
+        if match:
+            if self.paragraph:
+                self.flush()
+            indent = len(match.group(1).expandtabs(4)) // 2
+            marker = match.group(2)
+            prefix = "  " * indent + ("- " if marker in "-*+" else marker + " ")
+            self.items.append((prefix, [match.group(3)]))
+            return
+        if self.items:
+            self.items[-1][1].append(line.strip())  # Continuation of the item
+        else:
+            self.paragraph.append(line.strip())
+
+    def text(self) -> str:
+        self.fence = None
+        self.flush()
+        return "\n\n".join(block for block in self.blocks if block.strip())
+
+def markdown_to_text(lines: Iterable[str]) -> str:
+    """Plain text of a Markdown document, read line by line"""
+    scanner = MarkdownScanner()
+    for line in lines:
+        scanner.feed(line)
+    return scanner.text()
+
+# --- DOCX ----------------------------------------------------------------------
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY, W_SDT_CONTENT = W + "body", W + "sdtContent"
+W_P, W_R, W_T, W_TAB, W_BR, W_CR = W + "p", W + "r", W + "t", W + "tab", W + "br", W + "cr"
+W_TBL, W_TR, W_TC = W + "tbl", W + "tr", W + "tc"
+W_PPR, W_PSTYLE, W_NUMPR, W_VAL = W + "pPr", W + "pStyle", W + "numPr", W + "val"
+# Word stores the names of built-in styles in English whatever the UI language
+HEADING_STYLE = re.compile(r"^heading (\d)$")
+
+def docx_styles(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Style id -> lowercase style name"""
+    from lxml import etree
+    try:
+        root = etree.fromstring(archive.read("word/styles.xml"), etree.XMLParser(resolve_entities=False))
+    except KeyError:
+        return {}
+    styles = {}
+    for style in root.iterchildren(W + "style"):
+        name = style.find(W + "name")
+        if name is not None:
+            styles[style.get(W + "styleId")] = (name.get(W_VAL) or "").lower()
+    return styles
+
+def paragraph_text(paragraph) -> str:
+    parts = []
+    for run in paragraph.iter(W_R):
+        for child in run:
+            if child.tag == W_T:
+                parts.append(child.text or "")
+            elif child.tag == W_TAB:
+                parts.append("\t")
+            elif child.tag in (W_BR, W_CR):
+                parts.append("\n")
+    return "".join(parts).strip()
+
+def paragraph_kind(paragraph, styles: Dict[str, str]) -> Tuple[Optional[int], bool]:
+    """Heading level (None for body text) and whether the paragraph is a list item"""
+    properties = paragraph.find(W_PPR)
+    if properties is None:
+        return None, False
+    style = properties.find(W_PSTYLE)
+    name = styles.get(style.get(W_VAL), "") if style is not None else ""
+    match = HEADING_STYLE.match(name)
+    level = int(match.group(1)) if match else (1 if name == "title" else None)
+    return level, properties.find(W_NUMPR) is not None or name.startswith("list")
+
+def table_rows(table) -> List[str]:
+    """One line per row, cells joined with " | " (nested tables inline)"""
+    rows = []
+    for row in table.iterchildren(W_TR):
+        cells = []
+        for cell in row.iterchildren(W_TC):
+            parts = []
+            for child in cell:
+                if child.tag == W_P:
+                    parts.append(paragraph_text(child))
+                elif child.tag == W_TBL:
+                    parts.append(" / ".join(table_rows(child)))
+            cells.append(" ".join(part for part in parts if part))
+        if any(cells):
+            rows.append(" | ".join(cells))
+    return rows
+
+def docx_to_text(file_path: str) -> str:
+    """Plain text of a DOCX body: paragraphs and tables in document order.
+
+    word/document.xml is parsed incrementally and each top-level block is
+    freed once written, so memory doesn't grow with the document.
+    """
+    from lxml import etree
+    blocks: List[str] = []
+    items: List[str] = []
+    with zipfile.ZipFile(file_path) as archive:
+        styles = docx_styles(archive)
+        with archive.open("word/document.xml") as source:
+            for _, element in etree.iterparse(source, events=("end",), tag=(W_P, W_TBL), resolve_entities=False):
+                parent = element.getparent()
+                # Paragraphs of a table cell are written with their table
+                if parent is None or parent.tag not in (W_BODY, W_SDT_CONTENT):
+                    continue
+                if parent.tag == W_SDT_CONTENT and next(element.iterancestors(W_TC), None) is not None:
+                    continue
+
+                if element.tag == W_TBL:
+                    block, is_item = "\n".join(table_rows(element)), False
+                else:
+                    level, is_item = paragraph_kind(element, styles)
+                    block = paragraph_text(element)
+                    if block and level:
+                        block = heading(level, " ".join(block.split()))
+                if block:
+                    if is_item:
+                        items.append("- " + block)
+                    else:
+                        if items:
+                            blocks.append("\n".join(items))
+                            items = []
+                        blocks.append(block)
+
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
+    if items:
+        blocks.append("\n".join(items))
+    return "\n\n".join(blocks)
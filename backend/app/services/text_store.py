@@ -0,0 +1,78 @@
+import os
+import struct
+from app.core.config import settings
+
+class TextStore:
+    """Extracted text of each document as a UTF-8 file plus a block index.
+
+    The index holds the total length in characters, then the byte offset of
+    every BLOCK_CHARS-th character, so reading a slice seeks straight to the
+    right block and decodes at most BLOCK_CHARS + length characters.
+    """
+
+    BLOCK_CHARS = 4096
+    _ENTRY = struct.Struct("<Q")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _text_path(self, document_id: int) -> str:
+        return os.path.join(self.directory, f"{document_id}.txt")
+
+    def _index_path(self, document_id: int) -> str:
+        return os.path.join(self.directory, f"{document_id}.idx")
+
+    def exists(self, document_id: int) -> bool:
+        return os.path.exists(self._index_path(document_id))
+
+    def write(self, document_id: int, text: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # Until the new index is in place the document counts as not stored,
+        # so a failed write never leaves the old index over the new text
+        if os.path.exists(self._index_path(document_id)):
+            os.remove(self._index_path(document_id))
+        offsets = [len(text)]
+        position = 0
+        text_path = self._text_path(document_id)
+        with open(f"{text_path}.tmp", "wb") as f:
+            for start in range(0, len(text), self.BLOCK_CHARS):
+                offsets.append(position)
+                encoded = text[start:start + self.BLOCK_CHARS].encode("utf-8", "surrogatepass")
+                f.write(encoded)
+                position += len(encoded)
+        index_path = self._index_path(document_id)
+        with open(f"{index_path}.tmp", "wb") as f:
+            f.write(b"".join(self._ENTRY.pack(value) for value in offsets))
+        os.replace(f"{text_path}.tmp", text_path)
+        # The index is written last: it marks the document as stored
+        os.replace(f"{index_path}.tmp", index_path)
+
+    def _entry(self, index_file, position: int) -> int:
+        index_file.seek(position * self._ENTRY.size)
+        return self._ENTRY.unpack(index_file.read(self._ENTRY.size))[0]
+
+    def length(self, document_id: int) -> int:
+        """Total length of the text in characters"""
+        with open(self._index_path(document_id), "rb") as index_file:
+            return self._entry(index_file, 0)
+
+    def read(self, document_id: int, start: int, length: int) -> str:
+        """Characters [start, start + length) of the text"""
+        with open(self._index_path(document_id), "rb") as index_file:
+            total = self._entry(index_file, 0)
+            if start >= total or length <= 0:
+                return ""
+            block = start // self.BLOCK_CHARS
+            byte_offset = self._entry(index_file, 1 + block)
+        # newline="" keeps \r\n as two characters, as in the stored text
+        with open(self._text_path(document_id), "r", encoding="utf-8", errors="surrogatepass", newline="") as f:
+            f.seek(byte_offset)
+            f.read(start - block * self.BLOCK_CHARS)
+            return f.read(min(length, total - start))
+
+    def delete(self, document_id: int) -> None:
+        for path in (self._index_path(document_id), self._text_path(document_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+text_store = TextStore(settings.TEXT_STORE_DIR)
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import shutil
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Tuple
+from app.core.config import settings
+
+class ChunkTooLargeError(Exception):
+    """Raised when a chunk goes past its limit (chunk size or end of the file)"""
+
+class ChecksumMismatchError(Exception):
+    """Raised when a chunk doesn't match the checksum sent with it"""
+
+@dataclass
+class ChunkResult:
+    written: int  # Bytes kept at the offset
+    interrupted: bool = False  # The body ended early (client disconnected)
+
+class UploadStore:
+    """Partial files of resumable uploads, written chunk by chunk at an offset.
+
+    Chunks are streamed to disk as they arrive, so memory use doesn't depend
+    on the size of the chunk or of the file.
+    """
+
+    HASH_BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"{upload_id}.part")
+
+    def create(self, upload_id: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        open(self.path(upload_id), "wb").close()
+
+    async def write_chunk(
+        self,
+        upload_id: str,
+        offset: int,
+        body: AsyncIterator[bytes],
+        limit: int,
+        checksum: Optional[Tuple[str, bytes]] = None
+    ) -> ChunkResult:
+        """Write body at offset, keeping at most limit bytes.
+
+        checksum is (hashlib algorithm, expected digest). Without one, the
+        bytes that arrived before an interruption are kept so the client can
+        resume from there; with one, the chunk is kept only if it is whole
+        and matches.
+        """
+        digest = hashlib.new(checksum[0]) if checksum else None
+        written = 0
+        interrupted = False
+        with open(self.path(upload_id), "r+b") as f:
+            f.seek(offset)
+            try:
+                async for data in body:
+                    if written + len(data) > limit:
+                        f.truncate(offset)
+                        raise ChunkTooLargeError(f"Chunk larger than {limit} bytes")
+                    f.write(data)
+                    written += len(data)
+                    if digest:
+                        digest.update(data)
+            except ChunkTooLargeError:
+                raise
+            except Exception:
+                interrupted = True
+
+            if digest and (interrupted or digest.digest() != checksum[1]):
+                f.truncate(offset)
+                if interrupted:
+                    return ChunkResult(0, interrupted=True)
+                raise ChecksumMismatchError(f"Chunk doesn't match its {checksum[0]} checksum")
+            # Drops what an earlier, failed attempt may have written past the chunk
+            f.truncate(offset + written)
+        return ChunkResult(written, interrupted)
+
+    def sha256(self, upload_id: str) -> str:
+        """Hex digest of the partial file, read block by block"""
+        digest = hashlib.sha256()
+        with open(self.path(upload_id), "rb") as f:
+            for block in iter(lambda: f.read(self.HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def reset(self, upload_id: str) -> None:
+        """Drop the bytes received so far"""
+        open(self.path(upload_id), "wb").close()
+
+    def move(self, upload_id: str, destination: str) -> None:
+        """Move the completed file to its final location"""
+        os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+        # shutil.move copies when UPLOAD_PARTIAL_DIR is on another filesystem
+        shutil.move(self.path(upload_id), destination)
+
+    def discard(self, upload_id: str) -> None:
+        if os.path.exists(self.path(upload_id)):
+            os.remove(self.path(upload_id))
+
+upload_store = UploadStore(settings.UPLOAD_PARTIAL_DIR)
@@ -0,0 +1,264 @@
+import logging
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.document import Document, DocumentChunk
+from app.services.chunking import chunk_text, content_hash
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w\w+", re.UNICODE)
+
+# Frequent English and French words that would make every chunk look alike
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or that the this to was were will with
+au aux avec ce ces dans de des du elle en est et il ils la le les leur mais ne nous on ou par pas pour qu que
+qui sa se ses son sont sur un une vous
+""".split())
+
+class HashingEmbedder:
+    """Embed text by feature hashing words and word bigrams.
+
+    Runs locally with no model to download, and a given text always maps to
+    the same vector, so indexes stay valid across restarts and workers.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOP_WORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized float32 matrix, one row per text"""
+        rows, columns = [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                rows.append(row)
+                columns.append(zlib.crc32(feature.encode("utf-8")) % self.dim)
+
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(matrix, (np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64)), 1.0)
+        # Sublinear term frequency, then unit length so that dot product = cosine
+        matrix = np.log1p(matrix)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+class UserVectorIndex:
+    """Vectors of all the chunks of one user, stored as one contiguous matrix"""
+
+    def __init__(self, dim: int, quantize: bool = True):
+        self.dim = dim
+        self.quantize = quantize
+        self.vectors = np.zeros((0, dim), dtype=np.int8 if quantize else np.float32)
+        self.scales = np.zeros(0, dtype=np.float32)  # Per-row scale of the int8 vectors
+        self.chunk_ids = np.zeros(0, dtype=np.int64)
+        self.document_ids = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def add(self, document_id: int, chunk_ids: List[int], vectors: np.ndarray) -> None:
+        if self.quantize:
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            stored = np.round(vectors / scales[:, None]).astype(np.int8)
+        else:
+            scales = np.ones(len(vectors), dtype=np.float32)
+            stored = vectors.astype(np.float32)
+        self.vectors = np.ascontiguousarray(np.concatenate([self.vectors, stored]))
+        self.scales = np.concatenate([self.scales, scales.astype(np.float32)])
+        self.chunk_ids = np.concatenate([self.chunk_ids, np.asarray(chunk_ids, dtype=np.int64)])
+        self.document_ids = np.concatenate([self.document_ids, np.full(len(chunk_ids), document_id, dtype=np.int64)])
+
+    def remove(self, document_id: int) -> int:
+        """Drop the vectors of a document, return how many were removed"""
+        keep = self.document_ids != document_id
+        removed = int(len(keep) - keep.sum())
+        if removed:
+            self.vectors = np.ascontiguousarray(self.vectors[keep])
+            self.scales = self.scales[keep]
+            self.chunk_ids = self.chunk_ids[keep]
+            self.document_ids = self.document_ids[keep]
+        return removed
+
+    def remove_chunks(self, chunk_ids: List[int]) -> int:
+        """Drop the vectors of some chunks, return how many were removed"""
+        keep = ~np.isin(self.chunk_ids, np.asarray(chunk_ids, dtype=np.int64))
+        removed = int(len(keep) - keep.sum())
+        if removed:
+            self.vectors = np.ascontiguousarray(self.vectors[keep])
+            self.scales = self.scales[keep]
+            self.chunk_ids = self.chunk_ids[keep]
+            self.document_ids = self.document_ids[keep]
+        return removed
+
+    def search(self, query: np.ndarray, k: int, document_id: Optional[int] = None) -> List[Tuple[int, int, float]]:
+        """Top-k (chunk_id, document_id, cosine score) with a positive score, best first"""
+        if not len(self):
+            return []
+        scores = (self.vectors @ query) * self.scales
+        if document_id is not None:
+            scores = np.where(self.document_ids == document_id, scores, -np.inf)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (int(self.chunk_ids[i]), int(self.document_ids[i]), float(scores[i]))
+            for i in top if scores[i] > 0
+        ]
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, vectors=self.vectors, scales=self.scales,
+                 chunk_ids=self.chunk_ids, document_ids=self.document_ids)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, dim: int, quantize: bool) -> Optional["UserVectorIndex"]:
+        """Load a saved index, None if it was built with other settings"""
+        with np.load(path) as data:
+            vectors = data["vectors"]
+            if vectors.shape[1] != dim or (vectors.dtype == np.int8) != quantize:
+                return None
+            index = cls(dim, quantize)
+            index.vectors = np.ascontiguousarray(vectors)
+            index.scales = data["scales"]
+            index.chunk_ids = data["chunk_ids"]
+            index.document_ids = data["document_ids"]
+        return index
+
+def get_document_chunks(db: Session, document: Document) -> List[DocumentChunk]:
+    """Chunks of a document, created from its content the first time"""
+    chunks = db.query(DocumentChunk).filter(
+        DocumentChunk.document_id == document.id
+    ).order_by(DocumentChunk.chunk_index).all()
+    if chunks or not document.content:
+        return chunks
+
+    chunks = [
+        DocumentChunk(
+            document_id=document.id, chunk_index=chunk.index, start_offset=chunk.start,
+            content=chunk.text, content_hash=content_hash(chunk.text)
+        )
+        for chunk in chunk_text(document.content, settings.CHUNK_MAX_CHARS)
+    ]
+    db.add_all(chunks)
+    db.commit()
+    return chunks
+
+class VectorIndexManager:
+    """Per-user vector indexes, kept on disk and cached in memory (LRU).
+
+    Each worker process has its own cache: an index is reloaded when its file
+    was saved since (by another worker), which costs one stat per access.
+    Workers don't lock the file between them, so two of them updating the
+    same user's index at the same moment can lose one update until the next
+    rebuild.
+    """
+
+    def __init__(self, directory: str, dim: int = 512, quantize: bool = True, cache_size: int = 100):
+        self.directory = directory
+        self.embedder = HashingEmbedder(dim)
+        self.quantize = quantize
+        self.cache_size = cache_size
+        # user_id -> (index, mtime of the file it matches)
+        self._indexes: "OrderedDict[int, Tuple[UserVectorIndex, Optional[int]]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _path(self, user_id: int) -> str:
+        return os.path.join(self.directory, f"user_{user_id}.npz")
+
+    def _mtime(self, user_id: int) -> Optional[int]:
+        try:
+            return os.stat(self._path(user_id)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _cache(self, user_id: int, index: UserVectorIndex, mtime: Optional[int]) -> UserVectorIndex:
+        self._indexes[user_id] = (index, mtime)
+        self._indexes.move_to_end(user_id)
+        while len(self._indexes) > self.cache_size:
+            self._indexes.popitem(last=False)
+        return index
+
+    def _save(self, user_id: int, index: UserVectorIndex) -> UserVectorIndex:
+        os.makedirs(self.directory, exist_ok=True)
+        index.save(self._path(user_id))
+        return self._cache(user_id, index, self._mtime(user_id))
+
+    def get(self, db: Session, user_id: int) -> UserVectorIndex:
+        """The user's index, loaded from disk or rebuilt from the database"""
+        with self._lock:
+            mtime = self._mtime(user_id)
+            cached = self._indexes.get(user_id)
+            if cached is not None and (mtime is None or cached[1] == mtime):
+                self._indexes.move_to_end(user_id)
+                return cached[0]
+            index = None
+            if mtime is not None:
+                try:
+                    index = UserVectorIndex.load(self._path(user_id), self.embedder.dim, self.quantize)
+                except Exception as e:
+                    logger.warning("vector_index user=%s unreadable index, rebuilding: %s", user_id, e)
+            if index is None:
+                return self.rebuild(db, user_id)
+            return self._cache(user_id, index, mtime)
+
+    def rebuild(self, db: Session, user_id: int) -> UserVectorIndex:
+        """Index every document of a user from scratch"""
+        with self._lock:
+            index = UserVectorIndex(self.embedder.dim, self.quantize)
+            for document in db.query(Document).filter(Document.user_id == user_id).all():
+                self._add(index, document.id, get_document_chunks(db, document))
+            return self._save(user_id, index)
+
+    def _add(self, index: UserVectorIndex, document_id: int, chunks: List[DocumentChunk]) -> None:
+        if chunks:
+            index.add(document_id, [chunk.id for chunk in chunks], self.embedder.embed([chunk.content for chunk in chunks]))
+
+    def index_document(self, db: Session, document: Document) -> int:
+        """Add (or replace) a document in its owner's index, return the number of chunks"""
+        with self._lock:
+            index = self.get(db, document.user_id)
+            index.remove(document.id)
+            chunks = get_document_chunks(db, document)
+            self._add(index, document.id, chunks)
+            self._save(document.user_id, index)
+            return len(chunks)
+
+    def update_chunks(self, db: Session, document: Document, removed_ids: List[int], added: List[DocumentChunk]) -> None:
+        """Apply a new version of a document: only the added chunks are embedded"""
+        with self._lock:
+            index = self.get(db, document.user_id)
+            # The added ids too: a rebuilt index already has them
+            index.remove_chunks(removed_ids + [chunk.id for chunk in added])
+            self._add(index, document.id, added)
+            self._save(document.user_id, index)
+
+    def remove_document(self, db: Session, user_id: int, document_id: int) -> None:
+        with self._lock:
+            index = self.get(db, user_id)
+            if index.remove(document_id):
+                self._save(user_id, index)
+
+    def search(self, db: Session, user_id: int, query: str, k: int = 10,
+               document_id: Optional[int] = None) -> List[Tuple[int, int, float]]:
+        """Top-k (chunk_id, document_id, score) across the user's documents"""
+        index = self.get(db, user_id)
+        return index.search(self.embedder.embed([query])[0], k, document_id)
+
+vector_index = VectorIndexManager(
+    settings.VECTOR_INDEX_DIR,
+    dim=settings.VECTOR_INDEX_DIM,
+    quantize=settings.VECTOR_INDEX_QUANTIZE,
+    cache_size=settings.VECTOR_INDEX_CACHE_USERS
+)
@@ -0,0 +1,296 @@
+"""Synthetic document corpus for extraction benchmarks.
+
+Generates deterministic PDF, DOCX and Markdown files of controlled size:
+number of pages, tables and images per page, unicode-heavy text and (for
+PDF) multi-column layouts or text drawn out of reading order.
+
+    python benchmarks/corpus.py --output corpus/ --pages 50 --tables 1 --images 1 --unicode
+
+The PDF writer is self-contained (no reportlab needed) and uses the standard
+Helvetica font, which only covers the Windows-1252 character set: in PDFs,
+characters outside it (Greek, CJK, emoji...) are written as "?".
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import io
+import random
+import struct
+import zlib
+from typing import List
+
+WORDS = (
+    "cell membrane protein energy enzyme molecule mitochondria nucleus gene "
+    "theory model function variable equation derivative integral matrix vector "
+    "history empire revolution economy trade treaty culture language society "
+    "algorithm data structure network memory process thread compiler system"
+).split()
+
+UNICODE_WORDS = (
+    "énergie réaction théorème élève Größe Straße naïve façade "
+    "αβγ δύναμη λόγος 细胞 能量 分子 数学 エネルギー 細胞 "
+    "∑ ∫ √ ≈ ≠ ∞ → ∂ 😀 🧬 📚"
+).split()
+
+# Characters per page of running text, roughly a page of course notes
+CHARS_PER_PAGE = 3000
+
+def make_sentence(rng: random.Random, unicode: bool) -> str:
+    vocabulary = WORDS + UNICODE_WORDS if unicode else WORDS
+    words = [rng.choice(vocabulary) for _ in range(rng.randint(8, 18))]
+    return " ".join(words).capitalize() + "."
+
+def make_paragraph(rng: random.Random, unicode: bool) -> str:
+    return " ".join(make_sentence(rng, unicode) for _ in range(rng.randint(3, 6)))
+
+def make_table(rng: random.Random, unicode: bool, rows: int = 6, cols: int = 4) -> List[List[str]]:
+    header = [f"Column {c + 1}" for c in range(cols)]
+    body = [
+        [rng.choice(WORDS + UNICODE_WORDS if unicode else WORDS) + f" {rng.randint(1, 999)}" for _ in range(cols)]
+        for _ in range(rows - 1)
+    ]
+    return [header] + body
+
+def make_png(width: int, height: int, rng: random.Random) -> bytes:
+    """Noisy RGB PNG (incompressible like a photo) built with zlib only"""
+    raw = b"".join(b"\x00" + bytes(rng.getrandbits(8) for _ in range(width * 3)) for _ in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+def page_paragraphs(rng: random.Random, unicode: bool) -> List[str]:
+    paragraphs = []
+    while sum(len(p) for p in paragraphs) < CHARS_PER_PAGE:
+        paragraphs.append(make_paragraph(rng, unicode))
+    return paragraphs
+
+# --- PDF ---------------------------------------------------------------------
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 50
+FONT_SIZE = 10
+LEADING = 12
+
+def _pdf_escape(text: str) -> bytes:
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def _wrap(text: str, width_chars: int) -> List[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width_chars:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+class _PDFWriter:
+    def __init__(self):
+        self.objects: List[bytes] = []
+
+    def add(self, body: bytes) -> int:
+        self.objects.append(body)
+        return len(self.objects)
+
+    def reserve(self) -> int:
+        return self.add(b"")
+
+    def set(self, object_id: int, body: bytes) -> None:
+        self.objects[object_id - 1] = body
+
+    def stream(self, dictionary: bytes, data: bytes) -> int:
+        return self.add(dictionary[:-2] + b" /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+
+    def tobytes(self, root_id: int) -> bytes:
+        out = io.BytesIO()
+        out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self.objects, start=1):
+            offsets.append(out.tell())
+            out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.objects) + 1))
+        for offset in offsets:
+            out.write(b"%010d 00000 n \n" % offset)
+        out.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(self.objects) + 1, root_id, xref))
+        return out.getvalue()
+
+def make_pdf(path: str, pages: int = 10, tables_per_page: int = 0, images_per_page: int = 0,
+             unicode: bool = False, columns: int = 1, scrambled: bool = False, seed: int = 0) -> str:
+    """Write a PDF with the given number of pages and return its path.
+
+    scrambled draws the lines of running text in random order (each at its
+    own position), like some PDF generators do: the page looks the same, but
+    the content stream is no longer in reading order.
+    """
+    rng = random.Random(seed)
+    writer = _PDFWriter()
+    catalog_id = writer.reserve()
+    pages_id = writer.reserve()
+    font_id = writer.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    column_gap = 20
+    column_width = (PAGE_WIDTH - 2 * MARGIN - (columns - 1) * column_gap) / columns
+    chars_per_line = int(column_width / (FONT_SIZE * 0.5))
+    page_ids = []
+
+    for _ in range(pages):
+        ops = [b"BT /F1 %d Tf %d TL ET" % (FONT_SIZE, LEADING)]
+        y_top = PAGE_HEIGHT - MARGIN
+        xobjects = {}
+
+        for index in range(images_per_page):
+            width, height = 64, 48
+            data = zlib.compress(bytes(rng.getrandbits(8) for _ in range(width * height * 3)))
+            image_id = writer.stream(
+                b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB "
+                b"/BitsPerComponent 8 /Filter /FlateDecode >>" % (width, height),
+                data
+            )
+            name = b"Im%d" % index
+            xobjects[name] = image_id
+            x = MARGIN + index * 170
+            ops.append(b"q 160 0 0 120 %d %d cm /%s Do Q" % (x, y_top - 120, name))
+        if images_per_page:
+            y_top -= 135
+
+        for _ in range(tables_per_page):
+            table = make_table(rng, unicode)
+            cols = len(table[0])
+            cell_width = (PAGE_WIDTH - 2 * MARGIN) / cols
+            row_height = 16
+            for r, row in enumerate(table):
+                y = y_top - (r + 1) * row_height
+                for c, cell in enumerate(row):
+                    x = MARGIN + c * cell_width
+                    ops.append(b"%.1f %.1f %.1f %d re S" % (x, y, cell_width, row_height))
+                    ops.append(b"BT /F1 %d Tf %.1f %.1f Td (%s) Tj ET" % (FONT_SIZE, x + 3, y + 4, _pdf_escape(cell[:22])))
+            y_top -= len(table) * row_height + 15
+
+        # Running text, flowed column by column
+        lines = []
+        for paragraph in page_paragraphs(rng, unicode):
+            lines.extend(_wrap(paragraph, chars_per_line))
+            lines.append("")
+        lines_per_column = max(1, int((y_top - MARGIN) / LEADING))
+        placed = []
+        for column in range(columns):
+            column_lines = lines[column * lines_per_column:(column + 1) * lines_per_column]
+            if not column_lines:
+                break
+            x = MARGIN + column * (column_width + column_gap)
+            if not scrambled:
+                ops.append(b"BT /F1 %d Tf %d TL %.1f %.1f Td" % (FONT_SIZE, LEADING, x, y_top - LEADING))
+                for line in column_lines:
+                    ops.append(b"(%s) Tj T*" % _pdf_escape(line))
+                ops.append(b"ET")
+            placed.extend((x, y_top - (i + 1) * LEADING, line) for i, line in enumerate(column_lines) if line)
+        if scrambled:
+            rng.shuffle(placed)
+            for x, y, line in placed:
+                ops.append(b"BT /F1 %d Tf %.1f %.1f Td (%s) Tj ET" % (FONT_SIZE, x, y, _pdf_escape(line)))
+
+        content_id = writer.stream(b"<< >>", b"\n".join(ops))
+        xobject_refs = b" ".join(b"/%s %d 0 R" % (name, oid) for name, oid in xobjects.items())
+        page_ids.append(writer.add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R >> /XObject << %s >> >> /Contents %d 0 R >>"
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, font_id, xobject_refs, content_id)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    writer.set(pages_id, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)))
+    writer.set(catalog_id, b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+    with open(path, "wb") as f:
+        f.write(writer.tobytes(catalog_id))
+    return path
+
+# --- DOCX ----------------------------------------------------------------------
+
+def make_docx(path: str, pages: int = 10, tables_per_page: int = 0, images_per_page: int = 0,
+              unicode: bool = False, seed: int = 0) -> str:
+    """Write a DOCX with roughly the given number of pages and return its path"""
+    from docx import Document as DocxDocument
+    from docx.shared import Inches
+
+    rng = random.Random(seed)
+    doc = DocxDocument()
+    image = make_png(64, 48, rng) if images_per_page else None
+    for page in range(pages):
+        doc.add_heading(f"Section {page + 1}", level=1)
+        for _ in range(images_per_page):
+            doc.add_picture(io.BytesIO(image), width=Inches(2))
+        for _ in range(tables_per_page):
+            table_data = make_table(rng, unicode)
+            table = doc.add_table(rows=len(table_data), cols=len(table_data[0]))
+            for r, row in enumerate(table_data):
+                for c, cell in enumerate(row):
+                    table.cell(r, c).text = cell
+        for paragraph in page_paragraphs(rng, unicode):
+            doc.add_paragraph(paragraph)
+        if page < pages - 1:
+            doc.add_page_break()
+    doc.save(path)
+    return path
+
+# --- Markdown ------------------------------------------------------------------
+
+def make_markdown(path: str, pages: int = 10, tables_per_page: int = 0, images_per_page: int = 0,
+                  unicode: bool = False, seed: int = 0) -> str:
+    """Write a Markdown file with roughly the given number of pages and return its path"""
+    rng = random.Random(seed)
+    parts = [f"# Synthetic course notes {seed}\n"]
+    for page in range(pages):
+        parts.append(f"\n## Section {page + 1}\n")
+        for index in range(images_per_page):
+            parts.append(f"\n![Figure {page + 1}.{index + 1}](images/figure_{page + 1}_{index + 1}.png)\n")
+        for _ in range(tables_per_page):
+            table = make_table(rng, unicode)
+            parts.append("\n| " + " | ".join(table[0]) + " |\n")
+            parts.append("|" + "---|" * len(table[0]) + "\n")
+            for row in table[1:]:
+                parts.append("| " + " | ".join(row) + " |\n")
+        for paragraph in page_paragraphs(rng, unicode):
+            parts.append(f"\n{paragraph}\n")
+        parts.append("\n```python\nresult = compute(x) if x < 10 else None\n```\n")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+    return path
+
+MAKERS = {"pdf": make_pdf, "docx": make_docx, "markdown": make_markdown}
+EXTENSIONS = {"pdf": ".pdf", "docx": ".docx", "markdown": ".md"}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic document corpus")
+    parser.add_argument("--output", default="corpus")
+    parser.add_argument("--formats", default="pdf,docx,markdown")
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=0, help="Tables per page")
+    parser.add_argument("--images", type=int, default=0, help="Images per page")
+    parser.add_argument("--unicode", action="store_true", help="Mix accented, Greek, CJK and emoji words in")
+    parser.add_argument("--columns", type=int, default=1, help="Text columns (PDF only)")
+    parser.add_argument("--scrambled", action="store_true", help="Draw text out of reading order (PDF only)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for fmt in args.formats.split(","):
+        name = f"synthetic_{args.pages}p_t{args.tables}_i{args.images}{'_u' if args.unicode else ''}"
+        path = os.path.join(args.output, name + EXTENSIONS[fmt])
+        kwargs = dict(pages=args.pages, tables_per_page=args.tables, images_per_page=args.images,
+                      unicode=args.unicode, seed=args.seed)
+        if fmt == "pdf":
+            kwargs.update(columns=args.columns, scrambled=args.scrambled)
+        MAKERS[fmt](path, **kwargs)
+        print(f"{path} ({os.path.getsize(path) / 1024:.1f} KB)")
+
+if __name__ == "__main__":
+    main()
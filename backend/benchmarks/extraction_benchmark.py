@@ -0,0 +1,180 @@
+"""Throughput and memory benchmark of DocumentProcessor extractors.
+
+Generates a synthetic corpus (see corpus.py), then measures pages/sec, MB/sec
+and peak RSS for each extractor on each document. Every measurement runs in a
+fresh process so that peak RSS belongs to that extractor alone.
+
+    python benchmarks/extraction_benchmark.py --output extraction.json
+    python benchmarks/extraction_benchmark.py --compare extraction.json  # diff with a previous run
+
+Results are written as JSON, one entry per (extractor, document).
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Any
+
+from benchmarks.corpus import make_pdf, make_docx, make_markdown
+
+# extractor name -> (document format, DocumentProcessor method)
+EXTRACTORS = {
+    "pdf/pdfplumber": ("pdf", "extract_text_from_pdf_pdfplumber"),
+    "pdf/pypdf2": ("pdf", "extract_text_from_pdf_pypdf2"),
+    "pdf/default": ("pdf", "extract_text_from_pdf"),
+    "docx/default": ("docx", "extract_text_from_docx"),
+    "docx/paragraphs": ("docx", "extract_text_from_docx_paragraphs"),
+    "markdown/default": ("markdown", "extract_text_from_markdown"),
+    "markdown/html": ("markdown", "extract_text_from_markdown_html"),
+}
+
+# case name -> generator options (pages are multiplied by --scale)
+CASES = {
+    "text": dict(pages=20),
+    "tables": dict(pages=20, tables_per_page=2),
+    "images": dict(pages=10, images_per_page=2),
+    "unicode": dict(pages=20, unicode=True),
+    "two_columns": dict(pages=20, columns=2),
+    "scrambled": dict(pages=20, scrambled=True),
+}
+PDF_ONLY_OPTIONS = {"columns", "scrambled"}
+
+MAKERS = {"pdf": make_pdf, "docx": make_docx, "markdown": make_markdown}
+EXTENSIONS = {"pdf": ".pdf", "docx": ".docx", "markdown": ".md"}
+
+def build_corpus(directory: str, scale: float, cases: List[str], formats: List[str]) -> List[Dict[str, Any]]:
+    """Generate every (format, case) document and describe it"""
+    documents = []
+    for fmt in formats:
+        for case in cases:
+            options = dict(CASES[case])
+            if fmt != "pdf" and PDF_ONLY_OPTIONS & set(options):
+                continue
+            options["pages"] = max(1, int(options["pages"] * scale))
+            path = os.path.join(directory, f"{case}{EXTENSIONS[fmt]}")
+            MAKERS[fmt](path, **options)
+            documents.append({
+                "format": fmt,
+                "case": case,
+                "path": path,
+                "pages": options["pages"],
+                "size_bytes": os.path.getsize(path)
+            })
+    return documents
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _measure(method: str, path: str, runs: int) -> Dict[str, Any]:
+    """Run in a child process: time the extractor and report peak RSS"""
+    from app.services.document_processor import DocumentProcessor
+    processor = DocumentProcessor()
+    extract = getattr(processor, method)
+    baseline_rss = _peak_rss_mb()
+
+    durations = []
+    chars = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        chars = len(extract(path))
+        durations.append(time.perf_counter() - start)
+    return {
+        "durations": durations,
+        "chars": chars,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "import_rss_mb": round(baseline_rss, 1)
+    }
+
+def run_benchmark(documents: List[Dict[str, Any]], extractors: List[str], runs: int) -> List[Dict[str, Any]]:
+    results = []
+    context = get_context("spawn")
+    for name in extractors:
+        fmt, method = EXTRACTORS[name]
+        for document in (d for d in documents if d["format"] == fmt):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                measured = pool.submit(_measure, method, document["path"], runs).result()
+            median = statistics.median(measured["durations"])
+            results.append({
+                "extractor": name,
+                "case": document["case"],
+                "pages": document["pages"],
+                "size_bytes": document["size_bytes"],
+                "runs": runs,
+                "median_s": round(median, 4),
+                "min_s": round(min(measured["durations"]), 4),
+                "pages_per_s": round(document["pages"] / median, 2),
+                "mb_per_s": round(document["size_bytes"] / (1024 * 1024) / median, 3),
+                "chars": measured["chars"],
+                "peak_rss_mb": measured["peak_rss_mb"],
+                "import_rss_mb": measured["import_rss_mb"]
+            })
+            print(f"{name:<18} {document['case']:<12} {results[-1]['pages_per_s']:>9} pages/s "
+                  f"{results[-1]['mb_per_s']:>8} MB/s {results[-1]['peak_rss_mb']:>8} MB peak")
+    return results
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+def compare(results: List[Dict[str, Any]], previous: Dict[str, Any]) -> None:
+    """Print the throughput and memory ratios against a previous run"""
+    old = {(r["extractor"], r["case"]): r for r in previous.get("results", [])}
+    print(f"\nComparison with {previous.get('revision', '?')} (ratio new/old, >1 is faster / uses more memory)")
+    for result in results:
+        before = old.get((result["extractor"], result["case"]))
+        if not before:
+            continue
+        speed = result["pages_per_s"] / before["pages_per_s"] if before["pages_per_s"] else float("nan")
+        memory = result["peak_rss_mb"] / before["peak_rss_mb"] if before["peak_rss_mb"] else float("nan")
+        print(f"{result['extractor']:<18} {result['case']:<12} throughput x{speed:.2f}  peak RSS x{memory:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document text extraction")
+    parser.add_argument("--extractors", default=",".join(EXTRACTORS), help="Comma separated, see EXTRACTORS")
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply the page count of every case")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--corpus-dir", default=None, help="Keep the generated corpus in this directory")
+    parser.add_argument("--output", default=None, help="Write the JSON results to this file")
+    parser.add_argument("--compare", default=None, help="Previous JSON results to compare with")
+    args = parser.parse_args()
+
+    extractors = args.extractors.split(",")
+    formats = sorted({EXTRACTORS[name][0] for name in extractors})
+    directory = args.corpus_dir or tempfile.mkdtemp(prefix="extraction_corpus_")
+    os.makedirs(directory, exist_ok=True)
+
+    documents = build_corpus(directory, args.scale, args.cases.split(","), formats)
+    results = run_benchmark(documents, extractors, args.runs)
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
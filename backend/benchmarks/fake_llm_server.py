@@ -0,0 +1,129 @@
+"""OpenAI-compatible fake completions server for offline load tests.
+
+Answers POST /v1/chat/completions (streamed or not) with well-formed
+summaries, quizzes, flashcards and chat answers, after a configurable
+latency and token rate, and injects errors at a configurable rate.
+
+    python benchmarks/fake_llm_server.py --port 9000 --latency-ms 300 --tokens-per-second 80 --error-rate 0.02
+
+Point the backend at it with:
+
+    LLM_PROVIDERS=openai OPENAI_API_KEY=fake OPENAI_BASE_URL=http://localhost:9000/v1
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.services.llm_providers import fake_completion, estimate_tokens, messages_text
+
+def create_app(latency: float = 0.2, tokens_per_second: float = 0.0, error_rate: float = 0.0,
+               error_status: int = 503, seed: int = None) -> FastAPI:
+    """Build the fake server; tokens_per_second=0 sends the whole answer at once"""
+    app = FastAPI(title="Fake LLM server")
+    rng = random.Random(seed)
+    app.state.requests = 0
+    app.state.errors = 0
+
+    def error_response() -> JSONResponse:
+        app.state.errors += 1
+        return JSONResponse(
+            status_code=error_status,
+            content={"error": {"message": "Injected error", "type": "server_error", "code": None}},
+            headers={"Retry-After": "1"}
+        )
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        messages = body.get("messages", [])
+        model = body.get("model", "fake-model")
+        text = fake_completion(messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        await asyncio.sleep(latency)
+        if error_rate and rng.random() < error_rate:
+            return error_response()
+
+        if not body.get("stream"):
+            if tokens_per_second:
+                await asyncio.sleep(estimate_tokens(text) / tokens_per_second)
+            prompt_tokens = estimate_tokens(messages_text(messages))
+            completion_tokens = estimate_tokens(text)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+            }
+
+        async def event_stream():
+            chunk_size = 16
+            for start in range(0, len(text), chunk_size):
+                chunk = text[start:start + chunk_size]
+                if tokens_per_second:
+                    await asyncio.sleep(estimate_tokens(chunk) / tokens_per_second)
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+            done = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+            }
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests, "errors": app.state.errors}
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=200, help="Delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="Generation speed (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(
+        latency=args.latency_ms / 1000,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
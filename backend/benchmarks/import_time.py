@@ -0,0 +1,105 @@
+"""Cold start benchmark: time to import the FastAPI app in a fresh interpreter.
+
+Each run starts a new Python process and imports app.main, so nothing is
+cached in sys.modules. The script exits with status 1 when the median import
+time exceeds --max-seconds, or when a module that must be loaded lazily (PDF,
+DOCX and Markdown extractors, LLM SDKs) is imported at startup:
+
+    python benchmarks/import_time.py --runs 5 --max-seconds 1.5 --top 15
+
+--top lists the slowest imports (cumulative time from python -X importtime)
+to find what made a regression.
+"""
+import sys
+import os
+import argparse
+import json
+import statistics
+import subprocess
+from typing import Dict, List, Tuple, Any
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by some requests: importing them at startup is a regression
+LAZY_MODULES = ["PyPDF2", "pdfplumber", "pdfminer", "PIL", "docx", "lxml", "markdown", "openai", "anthropic"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+def run_once(module: str) -> Dict[str, Any]:
+    """Import the app in a new interpreter, return the import time and loaded modules"""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(module: str, top: int) -> List[Tuple[str, float]]:
+    """Top-level packages with the largest cumulative import time, in seconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    cumulative: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if not total.strip().isdigit():
+            continue
+        name = name.strip()
+        root = name.split(".")[0]
+        if name == root or root == "app":
+            cumulative[name] = max(cumulative.get(name, 0.0), int(total) / 1e6)
+    return sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the backend")
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=1.5, help="Fail when the median import time is above this")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports")
+    parser.add_argument("--output", default=None, help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    samples = [run_once(args.module) for _ in range(args.runs)]
+    timings = [sample["seconds"] for sample in samples]
+    eager = [name for name in LAZY_MODULES if name in samples[-1]["modules"]]
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "median_seconds": round(statistics.median(timings), 4),
+        "min_seconds": round(min(timings), 4),
+        "max_seconds": round(max(timings), 4),
+        "modules_loaded": len(samples[-1]["modules"]),
+        "eager_lazy_modules": eager,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.top:
+        print("\nSlowest imports (cumulative):")
+        for name, seconds in slowest_imports(args.module, args.top):
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = False
+    if report["median_seconds"] > args.max_seconds:
+        print(f"\nREGRESSION: median import time {report['median_seconds']:.3f}s > {args.max_seconds:.3f}s")
+        failed = True
+    if eager:
+        print(f"\nREGRESSION: imported at startup instead of on first use: {', '.join(eager)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""End-to-end load test of the FastAPI backend, without real LLM calls.
+
+Each virtual user registers, logs in, then repeatedly uploads a document,
+generates a summary, a quiz and flashcards, asks a question and reviews a
+flashcard. Throughput and p50/p95/p99 latency are reported per endpoint.
+
+By default the app runs in-process on a temporary database with the offline
+fake LLM provider:
+
+    python benchmarks/load_test.py --users 20 --iterations 3 --llm-latency-ms 300
+
+Use the fake completions server instead (exercises the real OpenAI client):
+
+    python benchmarks/fake_llm_server.py --port 9000 &
+    python benchmarks/load_test.py --llm-url http://127.0.0.1:9000/v1
+
+Or target a running deployment with --base-url. Save results with --output
+and compare with a previous run with --baseline: the script exits with
+status 1 when an endpoint's p95 regresses by more than --max-regression.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Any, Optional
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+class Recorder:
+    """Latencies and errors per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def timed(self, endpoint: str, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][response.status_code] += 1
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+        return response
+
+    def report(self, duration: float) -> Dict[str, Any]:
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "throughput_rps": round(len(values) / duration, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "statuses": dict(self.statuses[endpoint])
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            "duration_s": round(duration, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "throughput_rps": round(total / duration, 2),
+            "endpoints": endpoints
+        }
+
+def synthetic_markdown(size_kb: int, seed: int) -> bytes:
+    """Markdown course notes of roughly size_kb kilobytes"""
+    paragraph = (
+        "Mitochondria are membrane-bound organelles that generate most of the chemical energy "
+        "needed to power the cell's biochemical reactions. "
+    )
+    parts = [f"# Course notes {seed}\n"]
+    section = 0
+    while sum(len(part) for part in parts) < size_kb * 1024:
+        section += 1
+        parts.append(f"\n## Section {section}\n\n{paragraph * 4}\n\n- point one\n- point two\n")
+    return "".join(parts).encode("utf-8")
+
+async def run_user(client, recorder: Recorder, index: int, run_id: str, args) -> None:
+    prefix = args.api_prefix
+    username = f"load_{run_id}_{index}"
+    await recorder.timed("POST /auth/register", client.post(
+        f"{prefix}/auth/register",
+        json={"username": username, "email": f"{username}@example.com", "password": "load-test-password"}
+    ))
+    response = await recorder.timed("POST /auth/login", client.post(
+        f"{prefix}/auth/login",
+        data={"username": username, "password": "load-test-password"}
+    ))
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    for iteration in range(args.iterations):
+        response = await recorder.timed("POST /documents/upload", client.post(
+            f"{prefix}/documents/upload",
+            files={"file": (f"notes_{index}_{iteration}.md", synthetic_markdown(args.doc_kb, iteration))},
+            headers=headers
+        ))
+        if response is None or response.status_code != 200:
+            continue
+        document_id = response.json()["document_id"]
+
+        await recorder.timed("GET /documents/", client.get(f"{prefix}/documents/", headers=headers))
+        await recorder.timed("POST /learning-materials/summaries/{id}", client.post(
+            f"{prefix}/learning-materials/summaries/{document_id}", headers=headers
+        ))
+        await recorder.timed("POST /learning-materials/quizzes/{id}", client.post(
+            f"{prefix}/learning-materials/quizzes/{document_id}?num_questions=5", headers=headers
+        ))
+        await recorder.timed("POST /learning-materials/flashcards/{id}", client.post(
+            f"{prefix}/learning-materials/flashcards/{document_id}?num_cards=10", headers=headers
+        ))
+        await recorder.timed("POST /chat/ask", client.post(
+            f"{prefix}/chat/ask",
+            json={"question": "What do mitochondria do?", "document_id": document_id},
+            headers=headers
+        ))
+        response = await recorder.timed("GET /learning-materials/flashcards/{id}", client.get(
+            f"{prefix}/learning-materials/flashcards/{document_id}", headers=headers
+        ))
+        if response is not None and response.status_code == 200 and response.json():
+            flashcard_id = response.json()[0]["id"]
+            await recorder.timed("PUT /learning-materials/flashcards/{id}/review", client.put(
+                f"{prefix}/learning-materials/flashcards/{flashcard_id}/review?difficulty=1", headers=headers
+            ))
+
+def configure_in_process(args) -> None:
+    """Point settings at a temporary database and an offline LLM before the app is imported"""
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    if args.llm_url:
+        os.environ["LLM_PROVIDERS"] = "openai"
+        os.environ["OPENAI_API_KEY"] = "fake"
+        os.environ["OPENAI_BASE_URL"] = args.llm_url
+    else:
+        os.environ["LLM_PROVIDERS"] = "fake"
+        os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+
+def create_client(args):
+    import httpx
+    timeout = httpx.Timeout(args.timeout)
+    if args.base_url:
+        return httpx.AsyncClient(base_url=args.base_url, timeout=timeout)
+
+    configure_in_process(args)
+    from app.main import app
+    from app.core.database import engine, Base
+    from app.models import user, document, learning_material, chat  # noqa: F401  (register tables)
+    Base.metadata.create_all(bind=engine)
+    return httpx.AsyncClient(app=app, base_url="http://loadtest", timeout=timeout)
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Return the endpoints whose p95 regressed beyond the allowed ratio"""
+    regressions = []
+    for endpoint, stats in baseline.get("endpoints", {}).items():
+        current = report["endpoints"].get(endpoint)
+        if not current:
+            continue
+        allowed = stats["p95_ms"] * (1 + max_regression)
+        if current["p95_ms"] > allowed:
+            regressions.append(f"{endpoint}: p95 {current['p95_ms']}ms > {allowed:.1f}ms (baseline {stats['p95_ms']}ms)")
+    return regressions
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{report['requests']} requests in {report['duration_s']}s "
+          f"({report['throughput_rps']} req/s, {report['errors']} errors)\n")
+    print(f"{'endpoint':<48} {'reqs':>6} {'err':>5} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:<48} {stats['requests']:>6} {stats['errors']:>5} {stats['throughput_rps']:>7} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+async def run(args) -> Dict[str, Any]:
+    run_id = uuid.uuid4().hex[:8]
+    recorder = Recorder()
+    async with create_client(args) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(run_user(client, recorder, i, run_id, args) for i in range(args.users)))
+        duration = time.perf_counter() - start
+    return recorder.report(duration)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the AI Knowledge Tutor API")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=2, help="Documents processed per user")
+    parser.add_argument("--doc-kb", type=int, default=20, help="Size of each uploaded document")
+    parser.add_argument("--base-url", default=None, help="Test a running server instead of the in-process app")
+    parser.add_argument("--api-prefix", default="/api/v1")
+    parser.add_argument("--llm-url", default=None, help="OpenAI-compatible fake server for the in-process app")
+    parser.add_argument("--llm-latency-ms", type=int, default=200, help="Latency of the in-process fake provider")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file")
+    parser.add_argument("--baseline", default=None, help="Previous JSON report to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 increase (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(report, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo p95 regression against baseline")
+
+if __name__ == "__main__":
+    main()
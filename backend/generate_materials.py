@@ -0,0 +1,301 @@
+"""Generate missing or outdated learning materials offline.
+
+Finds the documents without a summary, quiz or flashcard set (with
+--outdated, also those whose material was generated with an older prompt or
+another model, see LLMService.generator) and generates them with at most
+--concurrency LLM calls in flight:
+
+    python generate_materials.py --dry-run
+    python generate_materials.py --materials summary,quiz --concurrency 8
+    python generate_materials.py --outdated --user alice --limit 500
+
+Each material is committed as soon as it is generated, and progress is
+checkpointed to --checkpoint: after a crash, run the same command again and
+it resumes where it left off. Failed items are retried on the next run, up to
+--max-attempts times. Throughput and token spend are reported at the end,
+for this run and for all runs of the checkpoint.
+
+Regenerating outdated flashcards replaces the cards, and their review history
+with them. Outdated quizzes keep their questions, and the users' stats on
+them: new questions are added to the document's question bank.
+"""
+import sys
+import os
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.models.document import Document
+from app.models.chat import ChatSession  # noqa: F401 (mapper of the Document relationships)
+from app.models.learning_material import Summary, Quiz, QuizQuestion, FlashcardSet
+from app.services.learning_materials import (
+    MATERIAL_MODELS, grow_question_bank, is_valid_flashcard, llm_service, make_flashcard, touch
+)
+from app.services.document_versions import ChunkAttributor
+from app.services.llm_metrics import llm_metrics
+from app.services.llm_scheduler import llm_scheduler
+from app.services.pregeneration import PREGENERATED_MATERIALS
+from app.services.vector_index import get_document_chunks
+
+CHECKPOINT_INTERVAL = 1.0  # Seconds between checkpoint writes (committed materials are never redone)
+
+@dataclass
+class WorkItem:
+    document_id: int
+    material: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.document_id}:{self.material}"
+
+def find_work(db: Session, materials: List[str], outdated: bool = False, user_id: Optional[int] = None,
+              document_ids: Optional[List[int]] = None) -> List[WorkItem]:
+    """Materials to generate, by document id then in the order of materials"""
+    items = []
+    for material in materials:
+        model = MATERIAL_MODELS[material]
+        query = db.query(Document.id).outerjoin(model, model.document_id == Document.id).filter(
+            Document.content.isnot(None), Document.content != ""
+        )
+        if outdated:
+            generator = llm_service.generator(material)
+            query = query.filter(or_(model.id.is_(None), model.generator.is_(None), model.generator != generator))
+        else:
+            query = query.filter(model.id.is_(None))
+        if user_id is not None:
+            query = query.filter(Document.user_id == user_id)
+        if document_ids:
+            query = query.filter(Document.id.in_(document_ids))
+        items.extend(WorkItem(document_id, material) for (document_id,) in query.distinct())
+    order = {material: i for i, material in enumerate(materials)}
+    return sorted(items, key=lambda item: (item.document_id, order[item.material]))
+
+async def generate(item: WorkItem, outdated: bool, num_questions: int, num_cards: int) -> bool:
+    """Generate one material, replacing an outdated one; False if there was nothing to do"""
+    db = SessionLocal()
+    try:
+        document = db.get(Document, item.document_id)
+        if document is None or not document.content:
+            return False
+        model = MATERIAL_MODELS[item.material]
+        generator = llm_service.generator(item.material)
+        existing = db.query(model).filter(model.document_id == document.id).first()
+        if existing is not None and (not outdated or existing.generator == generator):
+            return False  # Generated in the meantime, by a user or another run
+
+        # No user_id: the per-user quotas of the server don't apply to backfills
+        if item.material == "summary":
+            content = await llm_service.generate_summary(document.content, document.title)
+            material = existing or Summary(document_id=document.id, title=f"Summary of {document.title}")
+            material.content = content
+        elif item.material == "quiz":
+            # Grows the question bank: the questions users were served (and their stats) stay
+            known = db.query(QuizQuestion).join(QuizQuestion.quiz).filter(Quiz.document_id == document.id).all()
+            if len(known) >= settings.QUESTION_BANK_MAX_QUESTIONS:
+                return False
+            added = await grow_question_bank(db, document, known, max(num_questions, settings.QUESTION_BANK_BATCH_SIZE))
+            if not added:
+                raise ValueError("No valid new question in the model's answer")
+            material = existing = added[0].quiz  # Created by grow_question_bank if there was none
+        else:
+            count = existing.num_cards if existing is not None and existing.num_cards else num_cards
+            generated = await llm_service.generate_flashcards(document.content, document.title, count)
+            generated = [card for card in generated if is_valid_flashcard(card)]
+            if not generated:
+                raise ValueError("No valid flashcard in the model's answer")
+            attributor = ChunkAttributor(get_document_chunks(db, document))
+            material = existing or FlashcardSet(document_id=document.id, title=f"Flashcards for {document.title}", num_cards=count)
+            material.flashcards = [make_flashcard(card, attributor, i) for i, card in enumerate(generated)]
+
+        material.generator = generator
+        if existing is None:
+            db.add(material)
+        else:
+            touch(material)
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+class Checkpoint:
+    """Progress of a run, saved as JSON so that the same command can resume it.
+
+    A checkpoint written with other options (or another prompt version or
+    model) is ignored: the run starts over.
+    """
+
+    def __init__(self, path: str, run: Dict[str, Any]):
+        self.path = path
+        self.state: Dict[str, Any] = {
+            "run": run,
+            "done": [],
+            "failed": {},  # key -> {"attempts": n, "error": "..."}
+            "totals": {"generated": 0, "skipped": 0, "failed": 0, "seconds": 0.0,
+                       "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+        }
+        self.resumed = False
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get("run") == run:
+                self.state = saved
+                self.resumed = True
+        self.done = set(self.state["done"])
+        self._saved_at = 0.0
+
+    def attempts(self, key: str) -> int:
+        return self.state["failed"].get(key, {}).get("attempts", 0)
+
+    def mark(self, key: str, outcome: str, error: Optional[str] = None) -> None:
+        self.state["totals"][outcome] += 1
+        if outcome == "failed":
+            self.state["failed"][key] = {"attempts": self.attempts(key) + 1, "error": error}
+        else:
+            self.done.add(key)
+            self.state["failed"].pop(key, None)
+
+    def save(self, force: bool = False) -> None:
+        """Write the checkpoint (at most every CHECKPOINT_INTERVAL unless forced), atomically"""
+        now = time.monotonic()
+        if not force and now - self._saved_at < CHECKPOINT_INTERVAL:
+            return
+        self.state["done"] = sorted(self.done)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.state, f)
+        os.replace(temporary, self.path)
+        self._saved_at = now
+
+def token_spend(materials: List[str]) -> Dict[str, Any]:
+    """Tokens and estimated cost of this process's generation calls"""
+    spend = {"prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+    for entry in llm_metrics.snapshot():
+        if entry["task"] in materials:
+            spend["prompt_tokens"] += entry["prompt_tokens"]
+            spend["completion_tokens"] += entry["completion_tokens"]
+            spend["cost_usd"] += entry["estimated_cost_usd"]
+    return spend
+
+async def run(items: List[WorkItem], checkpoint: Checkpoint, args) -> Dict[str, int]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    counts = {"generated": 0, "skipped": 0, "failed": 0}
+    start = time.perf_counter()
+
+    async def process(item: WorkItem) -> None:
+        async with semaphore:
+            try:
+                outcome = "generated" if await generate(item, args.outdated, args.questions, args.cards) else "skipped"
+                error = None
+            except Exception as e:
+                outcome, error = "failed", f"{type(e).__name__}: {e}"
+        counts[outcome] += 1
+        checkpoint.mark(item.key, outcome, error)
+        checkpoint.save()
+        finished = sum(counts.values())
+        if error or finished % args.progress_every == 0 or finished == len(items):
+            elapsed = time.perf_counter() - start
+            line = f"[{finished}/{len(items)}] {elapsed:.1f}s, {finished / elapsed * 60:.1f}/min"
+            print(f"{line} - document {item.document_id} {item.material} failed: {error}" if error else line, flush=True)
+
+    await asyncio.gather(*(process(item) for item in items))
+    return counts
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate missing or outdated summaries, quizzes and flashcards")
+    parser.add_argument("--materials", default=",".join(PREGENERATED_MATERIALS),
+                        help="Comma separated: summary, quiz, flashcards (default: all)")
+    parser.add_argument("--outdated", action="store_true",
+                        help="Also regenerate materials generated with an older prompt or another model")
+    parser.add_argument("--user", help="Only the documents of this username")
+    parser.add_argument("--document", type=int, action="append", dest="documents", help="Only this document (repeatable)")
+    parser.add_argument("--limit", type=int, help="Generate at most this many materials")
+    parser.add_argument("--concurrency", type=int, default=4, help="LLM calls in flight")
+    parser.add_argument("--questions", type=int, default=5, help="Questions per new quiz")
+    parser.add_argument("--cards", type=int, default=10, help="Cards per new flashcard set")
+    parser.add_argument("--checkpoint", default="generate_materials.checkpoint.json")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Give up on an item after this many failed runs")
+    parser.add_argument("--progress-every", type=int, default=10)
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be generated")
+    args = parser.parse_args()
+
+    materials = [material.strip() for material in args.materials.split(",") if material.strip()]
+    unknown = set(materials) - set(PREGENERATED_MATERIALS)
+    if unknown or not materials:
+        parser.error(f"--materials must be among {', '.join(PREGENERATED_MATERIALS)}")
+    args.concurrency = max(1, args.concurrency)
+
+    db = SessionLocal()
+    try:
+        user_id = None
+        if args.user:
+            user = db.query(User).filter(User.username == args.user).first()
+            if user is None:
+                print(f"No user named {args.user}")
+                return 1
+            user_id = user.id
+        items = find_work(db, materials, args.outdated, user_id, args.documents)
+    finally:
+        db.close()
+
+    run_options = {
+        "materials": materials, "outdated": args.outdated, "user": args.user, "documents": args.documents,
+        "generators": {material: llm_service.generator(material) for material in materials}
+    }
+    checkpoint = Checkpoint(args.checkpoint, run_options)
+    given_up = [item for item in items if checkpoint.attempts(item.key) >= args.max_attempts]
+    items = [item for item in items if item.key not in checkpoint.done and checkpoint.attempts(item.key) < args.max_attempts]
+    if args.limit is not None:
+        items = items[:args.limit]
+
+    for material in materials:
+        print(f"{material}: {sum(1 for item in items if item.material == material)} to generate")
+    if checkpoint.resumed:
+        totals = checkpoint.state["totals"]
+        print(f"Resuming {args.checkpoint}: {totals['generated']} generated, {totals['failed']} failed so far")
+    if given_up:
+        print(f"{len(given_up)} item(s) skipped after {args.max_attempts} failed attempts (see {args.checkpoint})")
+    if args.dry_run or not items:
+        return 0
+
+    # The only client of this process's scheduler: let it use all the slots
+    llm_scheduler.max_concurrency = llm_scheduler.batch_max_concurrency = args.concurrency
+    start = time.perf_counter()
+    try:
+        counts = asyncio.run(run(items, checkpoint, args))
+    finally:
+        elapsed = time.perf_counter() - start
+        spend = token_spend(materials)
+        totals = checkpoint.state["totals"]
+        totals["seconds"] = round(totals["seconds"] + elapsed, 3)
+        for key, value in spend.items():
+            totals[key] = round(totals[key] + value, 6)
+        checkpoint.save(force=True)
+
+    print(
+        f"Generated {counts['generated']}, skipped {counts['skipped']}, failed {counts['failed']} "
+        f"in {elapsed:.1f}s ({counts['generated'] / elapsed * 60:.1f} materials/min, concurrency {args.concurrency})"
+    )
+    print(
+        f"Tokens: {spend['prompt_tokens']} prompt + {spend['completion_tokens']} completion, "
+        f"estimated ${spend['cost_usd']:.4f}"
+    )
+    if checkpoint.resumed:
+        print(
+            f"All runs: {totals['generated']} generated in {totals['seconds']:.1f}s, "
+            f"{totals['prompt_tokens'] + totals['completion_tokens']} tokens, estimated ${totals['cost_usd']:.4f}"
+        )
+    return 1 if counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,11 +8,13 @@ from app.core.database import engine, Base
 from app.models.user import User
 from app.models.document import Document, DocumentType
 from app.models.learning_material import Summary, Quiz, Flashcard
+from app.models.chat import ChatSession, ChatMessage
+from app.core.migrations import upgrade_database
 
 def create_tables():
-    """Create all database tables"""
+    """Create or migrate all database tables (alembic upgrade head)"""
     try:
-        Base.metadata.create_all(bind=engine)
+        upgrade_database(engine)
         print("Database tables created successfully!")
         print("Database file: knowledge_tutor.db")
 
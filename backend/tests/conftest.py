@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.migrations import upgrade_database
+
+@pytest.fixture(scope="session")
+def engine(tmp_path_factory):
+    """SQLite database migrated to the latest revision"""
+    path = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    upgrade_database(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+@pytest.fixture
+def client(engine, tmp_path, monkeypatch):
+    """API client on the test database, saving files under tmp_path"""
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+    from app.core.database import get_db
+    from app.main import app
+    from app.services.text_store import text_store
+    from app.services.upload_store import upload_store
+    from app.services.vector_index import vector_index
+
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(upload_store, "directory", str(tmp_path / "partial"))
+    monkeypatch.setattr(text_store, "directory", str(tmp_path / "text_store"))
+    monkeypatch.setattr(vector_index, "directory", str(tmp_path / "vector_index"))
+    sessions = sessionmaker(bind=engine)
+
+    def get_test_db():
+        session = sessions()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = get_test_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+@pytest.fixture
+def auth_headers(engine):
+    """Creates a user and returns the Authorization header of its token"""
+    import uuid
+    from app.core.security import create_access_token
+    from app.models import chat, learning_material  # noqa: F401 (mappers of the User relationships)
+    from app.models.user import User
+
+    def make(username=None):
+        username = username or f"user-{uuid.uuid4().hex[:8]}"
+        session = sessionmaker(bind=engine)()
+        try:
+            session.add(User(username=username, email=f"{username}@example.com", hashed_password="x"))
+            session.commit()
+        finally:
+            session.close()
+        return {"Authorization": f"Bearer {create_access_token(username)}"}
+    return make
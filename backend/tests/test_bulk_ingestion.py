@@ -0,0 +1,90 @@
+"""Bulk uploads: staging files and ZIP members, limits, and the extraction worker pool."""
+import asyncio
+import io
+import os
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from app.models.document import DocumentType
+from app.services.bulk_ingestion import BulkLimitError, BulkStager, ExtractionPool
+from app.services.document_processor import DocumentProcessor
+
+def make_stager(tmp_path, max_files=10, max_total_size=10_000):
+    return BulkStager(str(tmp_path / "staged"), DocumentProcessor(), max_files, max_total_size)
+
+def make_zip(members, encrypted=()):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    data = bytearray(buffer.getvalue())
+    for name in encrypted:
+        # zipfile can't write encrypted members: set the flag in the central directory
+        header = data.index(b"PK\x01\x02")
+        while data[header + 46:header + 46 + len(name)] != name.encode():
+            header = data.index(b"PK\x01\x02", header + 4)
+        data[header + 8] |= 0x1
+    return io.BytesIO(bytes(data))
+
+def test_zip_members_are_staged_and_junk_is_skipped(tmp_path):
+    stager = make_stager(tmp_path)
+    stager.add_upload(io.BytesIO(b"# Notes"), "notes.md")
+    stager.add_upload(make_zip({
+        "course/cells.md": b"# Cells",
+        "course/notes.md": b"# Other notes",  # Same name as the upload above
+        "course/": b"",
+        "__MACOSX/course/._cells.md": b"resource fork",
+        "course/.DS_Store": b"finder",
+        "course/picture.png": b"png",
+        "course/secret.md": b"locked",
+    }, encrypted={"course/secret.md"}), "course.zip")
+
+    staged = {(f.filename, f.source): f for f in stager.files}
+    assert set(staged) == {("notes.md", None), ("cells.md", "course.zip"), ("notes.md", "course.zip"),
+                           ("picture.png", "course.zip"), ("secret.md", "course.zip")}
+    assert staged[("cells.md", "course.zip")].document_type == DocumentType.MARKDOWN
+    assert staged[("picture.png", "course.zip")].error == "Unsupported file type"
+    assert staged[("secret.md", "course.zip")].error == "Encrypted archive member"
+    assert sorted(os.listdir(stager.directory)) == ["cells.md", "notes-1.md", "notes.md"]
+    with open(staged[("notes.md", "course.zip")].path, "rb") as f:
+        assert f.read() == b"# Other notes"
+    assert stager.total_size == len(b"# Notes# Cells# Other notes")
+
+def test_invalid_archive_is_reported(tmp_path):
+    stager = make_stager(tmp_path)
+    stager.add_upload(io.BytesIO(b"not a zip"), "course.zip")
+    assert [(f.filename, f.path) for f in stager.files] == [("course.zip", None)]
+    assert stager.files[0].error.startswith("Invalid ZIP archive")
+
+def test_file_limit_counts_staged_documents_and_discard_cleans_up(tmp_path):
+    stager = make_stager(tmp_path, max_files=2)
+    with pytest.raises(BulkLimitError):
+        stager.add_upload(make_zip({"a.md": b"a", "skipped.png": b"png", "b.md": b"b", "c.md": b"c"}), "course.zip")
+    assert len(os.listdir(stager.directory)) == 2
+    stager.discard()
+    assert os.listdir(stager.directory) == []
+
+def test_size_limit_is_checked_on_the_bytes_written(tmp_path):
+    stager = make_stager(tmp_path, max_total_size=100)
+    stager.add_upload(io.BytesIO(b"x" * 60), "first.md")
+    with pytest.raises(BulkLimitError):
+        stager.add_upload(make_zip({"second.md": b"y" * 60}), "course.zip")
+    # The partial copy is removed right away, the staged file by discard()
+    assert os.listdir(stager.directory) == ["first.md"]
+    stager.discard()
+    assert os.listdir(stager.directory) == []
+
+def test_pool_recovers_after_a_worker_dies(tmp_path):
+    path = tmp_path / "cells.md"
+    path.write_text("# Cells\n\nCells divide.")
+    pool = ExtractionPool(1)
+    try:
+        broken = pool._get_pool()
+        broken.submit(os._exit, 1)  # A worker crashing (out of memory...)
+        with pytest.raises(BrokenProcessPool):
+            asyncio.run(pool.extract(str(path), DocumentType.MARKDOWN))
+        text, page_offsets, seconds = asyncio.run(pool.extract(str(path), DocumentType.MARKDOWN))
+        assert pool._pool is not broken
+        assert "Cells divide." in text and seconds >= 0
+    finally:
+        pool.shutdown()
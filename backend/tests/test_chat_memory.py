@@ -0,0 +1,81 @@
+"""Chat memory: when older turns are folded into the summary, and the size of the history sent."""
+import asyncio
+from sqlalchemy.orm import sessionmaker
+from app.models import learning_material  # noqa: F401 (mappers of the Document relationships)
+from app.models.chat import ChatSession, ChatMessage
+from app.models.document import Document, DocumentType
+from app.models.user import User
+from app.services.chat_memory import ChatMemory
+
+class FakeLLM:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.folded = []
+
+    async def summarize_conversation(self, summary, messages, user_id=None):
+        if self.fail:
+            raise RuntimeError("provider down")
+        self.folded.append(messages)
+        return f"{summary}+{len(messages)}"
+
+def chat_session(db, name, messages):
+    owner = User(username=name, email=f"{name}@example.com", hashed_password="x")
+    db.add(owner)
+    db.flush()
+    document = Document(title="Cells", filename="cells.md", file_path="/tmp/cells.md",
+                        document_type=DocumentType.MARKDOWN, content="Cells", user_id=owner.id)
+    db.add(document)
+    db.flush()
+    session = ChatSession(user_id=owner.id, document_id=document.id, title="Chat")
+    session.messages = [
+        ChatMessage(role="user" if i % 2 == 0 else "assistant", content=content) for i, content in enumerate(messages)
+    ]
+    db.add(session)
+    db.flush()
+    return session
+
+def test_turns_are_kept_verbatim_below_the_fold_threshold(db):
+    session = chat_session(db, "memory-below", [f"message {i}" for i in range(7)])
+    llm = FakeLLM()
+    history = asyncio.run(ChatMemory(llm, turns=2).load(db, session))
+    assert [m["content"] for m in history] == [f"message {i}" for i in range(7)]
+    assert llm.folded == [] and session.summary == ""
+
+def test_oldest_turns_are_folded_at_twice_the_window_and_the_summary_is_committed(engine):
+    db = sessionmaker(bind=engine)()
+    try:
+        session = chat_session(db, "memory-fold", [f"message {i}" for i in range(8)])
+        db.commit()
+        llm = FakeLLM()
+        history = asyncio.run(ChatMemory(llm, turns=2).load(db, session))
+        assert [m["content"] for m in llm.folded[0]] == [f"message {i}" for i in range(4)]
+        assert [m["content"] for m in history] == [f"message {i}" for i in range(4, 8)]
+        session_id, last_folded = session.id, session.messages[3].id
+        db.rollback()  # The answer failed: the summary must survive
+    finally:
+        db.close()
+
+    db = sessionmaker(bind=engine)()
+    try:
+        session = db.get(ChatSession, session_id)
+        assert (session.summary, session.summarized_until_id) == ("+4", last_folded)
+        # The folded turns aren't sent again, and the next fold is a window later
+        history = asyncio.run(ChatMemory(llm, turns=2).load(db, session))
+        assert len(history) == 4 and len(llm.folded) == 1
+    finally:
+        db.close()
+
+def test_failed_fold_sends_the_recent_turns_and_retries_later(db):
+    session = chat_session(db, "memory-fail", [f"message {i}" for i in range(9)])
+    history = asyncio.run(ChatMemory(FakeLLM(fail=True), turns=2).load(db, session))
+    assert [m["content"] for m in history] == [f"message {i}" for i in range(5, 9)]
+    assert session.summary == "" and session.summarized_until_id == 0
+
+def test_history_stays_within_its_budget(db):
+    session = chat_session(db, "memory-budget", ["x" * 500] * 15)
+    memory = ChatMemory(FakeLLM(), turns=3, message_chars=100)
+    history = asyncio.run(memory.load(db, session))
+    # At most 2 * turns messages after a fold, each cut to message_chars
+    assert len(history) == 6
+    assert all(m["content"] == "x" * 100 + " [...]" for m in history)
+    assert sum(len(m["content"]) for m in history) <= 6 * (100 + len(" [...]"))
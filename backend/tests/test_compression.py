@@ -0,0 +1,88 @@
+"""Response compression (brotli/gzip) and the orjson default response class."""
+import asyncio
+import gzip
+import json
+from datetime import datetime, timezone
+import brotli
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from app.core.compression import CompressionMiddleware, choose_encoding
+
+def test_choose_encoding_prefers_brotli_and_honours_q0():
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip, br;q=0") == "gzip"
+    assert choose_encoding("identity") is None and choose_encoding("") is None
+
+def test_large_responses_are_compressed_and_small_ones_are_not(client, auth_headers):
+    headers = auth_headers()
+    text = "# Cells\n\n" + "Cells divide and grow. " * 200
+    document_id = client.post("/api/v1/documents/upload", headers=headers,
+                              files={"file": ("cells.md", text.encode(), "text/markdown")}).json()["document_id"]
+    url = f"/api/v1/documents/{document_id}"
+
+    for encoding, decompress in (("br", brotli.decompress), ("gzip", gzip.decompress)):
+        # Read the raw body: the client would otherwise decode it
+        with client.stream("GET", url, headers={**headers, "Accept-Encoding": encoding}) as response:
+            raw = b"".join(response.iter_raw())
+        assert response.headers["Content-Encoding"] == encoding
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert int(response.headers["Content-Length"]) == len(raw) < len(text)
+        assert json.loads(decompress(raw))["content"] == text.strip()
+
+    identity = client.get(url, headers={**headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers and identity.json()["content"] == text.strip()
+    small = client.get("/api/v1/auth/me", headers={**headers, "Accept-Encoding": "br, gzip"})
+    assert small.status_code == 200 and "Content-Encoding" not in small.headers
+    assert len(small.content) < 1024
+
+def run_middleware(app, sent, accept_encoding="br"):
+    """Call CompressionMiddleware around an ASGI app, collecting the messages sent in sent"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=10)(scope, receive, send))
+
+def test_event_streams_are_passed_through_as_they_are_sent():
+    sent, seen_before_second_event = [], []
+
+    async def sse_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream")]})
+        await send({"type": "http.response.body", "body": b"event: question\ndata: {}\n\n", "more_body": True})
+        seen_before_second_event.append(len(sent))
+        await send({"type": "http.response.body", "body": b"event: done\ndata: {}\n\n", "more_body": False})
+
+    run_middleware(sse_app, sent)
+    assert seen_before_second_event == [2]  # Start and first event already forwarded
+    assert [message.get("body") for message in sent[1:]] == [b"event: question\ndata: {}\n\n", b"event: done\ndata: {}\n\n"]
+    assert all(name != b"content-encoding" for name, _ in sent[0]["headers"])
+
+def test_single_message_event_stream_isnt_compressed():
+    body = b"event: done\ndata: " + b"x" * 100 + b"\n\n"
+
+    async def sse_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream")]})
+        await send({"type": "http.response.body", "body": body})
+
+    sent = []
+    run_middleware(sse_app, sent)
+    assert sent[1]["body"] == body
+    assert all(name != b"content-encoding" for name, _ in sent[0]["headers"])
+
+def test_orjson_keeps_the_datetime_format():
+    content = {
+        "naive": datetime(2026, 10, 19, 9, 30, 5),
+        "micro": datetime(2026, 10, 19, 9, 30, 5, 123456),
+        "aware": datetime(2026, 10, 19, 9, 30, 5, tzinfo=timezone.utc),
+        "nested": [{"at": datetime(2026, 1, 2, 3, 4, 5)}],
+    }
+    # FastAPI runs jsonable_encoder before the response class renders
+    encoded = jsonable_encoder(content)
+    assert json.loads(ORJSONResponse(encoded).body) == json.loads(JSONResponse(encoded).body)
+    # Also when a route builds the response itself from datetimes
+    assert json.loads(ORJSONResponse(content).body) == json.loads(JSONResponse(encoded).body)
+    assert json.loads(ORJSONResponse(content).body)["aware"] == "2026-10-19T09:30:05+00:00"
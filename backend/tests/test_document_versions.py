@@ -0,0 +1,57 @@
+"""Re-upload diffing: which chunks are kept, and which questions and cards go stale."""
+import numpy as np
+from app.models import chat, learning_material, user  # noqa: F401 (mappers of the Document relationships)
+from app.models.document import DocumentChunk
+from app.services.chunking import chunk_text, content_hash
+from app.services.document_versions import ChunkAttributor, diff_chunks, flashcard_text, question_text
+from app.services.vector_index import UserVectorIndex
+
+PARAGRAPHS = [
+    "Mitochondria produce ATP through cellular respiration.",
+    "Ribosomes translate messenger RNA into proteins.",
+    "Chloroplasts capture light energy for photosynthesis.",
+]
+
+def stored_chunks(text):
+    return [
+        DocumentChunk(id=i + 1, chunk_index=chunk.index, start_offset=chunk.start,
+                      content=chunk.text, content_hash=content_hash(chunk.text))
+        for i, chunk in enumerate(chunk_text(text, max_chars=60))
+    ]
+
+def test_unchanged_chunks_are_kept_even_when_moved():
+    old = stored_chunks("\n\n".join(PARAGRAPHS))
+    new = chunk_text("\n\n".join(["A new introduction paragraph.", PARAGRAPHS[0], PARAGRAPHS[2]]), max_chars=60)
+    diff = diff_chunks(old, new)
+    assert [(row.content, chunk.index) for row, chunk in diff.kept] == [(PARAGRAPHS[0], 1), (PARAGRAPHS[2], 2)]
+    assert [chunk.text for chunk in diff.added] == ["A new introduction paragraph."]
+    assert [row.content for row in diff.removed] == [PARAGRAPHS[1]]
+    assert diff.stale_hashes() == {content_hash(PARAGRAPHS[1])}
+
+def test_repeated_chunk_removed_once_is_not_stale():
+    old = stored_chunks("\n\n".join([PARAGRAPHS[0], PARAGRAPHS[1], PARAGRAPHS[0]]))
+    diff = diff_chunks(old, chunk_text("\n\n".join([PARAGRAPHS[0], PARAGRAPHS[1]]), max_chars=60))
+    assert len(diff.removed) == 1
+    assert diff.stale_hashes() == set()
+
+def test_chunks_without_a_stored_hash_are_matched():
+    old = stored_chunks("\n\n".join(PARAGRAPHS))
+    for row in old:
+        row.content_hash = None
+    assert len(diff_chunks(old, chunk_text("\n\n".join(PARAGRAPHS), max_chars=60)).kept) == 3
+
+def test_items_are_attributed_to_their_source_chunk():
+    chunks = stored_chunks("\n\n".join(PARAGRAPHS))
+    attributor = ChunkAttributor(chunks)
+    question = question_text("Which organelle translates RNA?", {"A": "Ribosomes", "B": "Nucleus"}, "Ribosomes make proteins.")
+    assert attributor.source(question) == content_hash(PARAGRAPHS[1])
+    assert attributor.source(flashcard_text("Photosynthesis", "Chloroplasts capture light energy")) == content_hash(PARAGRAPHS[2])
+    assert attributor.source("Unrelated words entirely") is None
+    assert ChunkAttributor([]).source(question) is None
+
+def test_remove_chunks_keeps_the_other_vectors():
+    index = UserVectorIndex(dim=8, quantize=False)
+    index.add(1, [10, 11, 12], np.eye(3, 8, dtype=np.float32))
+    assert index.remove_chunks([11, 99]) == 1
+    assert index.chunk_ids.tolist() == [10, 12]
+    assert len(index) == 2
@@ -0,0 +1,56 @@
+"""Document uploads and re-uploads: where files are saved, and extraction in the worker pool."""
+import os
+from app.core.config import settings
+
+def upload(client, headers, filename, data):
+    return client.post("/api/v1/documents/upload", headers=headers, files={"file": (filename, data, "text/markdown")})
+
+def test_failed_reupload_keeps_the_current_version(client, auth_headers):
+    headers = auth_headers()
+    document_id = upload(client, headers, "cells.md", b"# Cells\n\nCells divide.").json()["document_id"]
+
+    broken = client.put(f"/api/v1/documents/{document_id}/file", headers=headers,
+                        files={"file": ("cells.pdf", b"not a pdf", "application/pdf")})
+    assert broken.status_code == 500 and broken.json()["detail"].startswith("Failed to process document")
+    assert os.listdir(settings.UPLOAD_DIR) == ["cells.md"]
+    detail = client.get(f"/api/v1/documents/{document_id}", headers=headers).json()
+    assert detail["filename"] == "cells.md" and "Cells divide." in detail["content"]
+
+def test_same_name_uploads_keep_their_own_file(client, auth_headers):
+    headers = auth_headers()
+    first = upload(client, headers, "notes.md", b"# First\n\nFirst notes.").json()["document_id"]
+    second = upload(client, headers, "notes.md", b"# Second\n\nSecond notes.").json()["document_id"]
+    assert sorted(os.listdir(settings.UPLOAD_DIR)) == ["notes-1.md", "notes.md"]
+
+    # Deleting one of them leaves the other's file alone
+    assert client.delete(f"/api/v1/documents/{first}", headers=headers).status_code == 200
+    assert os.listdir(settings.UPLOAD_DIR) == ["notes-1.md"]
+    unchanged = client.put(f"/api/v1/documents/{second}/file", headers=headers,
+                           files={"file": ("notes.md", b"# Second\n\nSecond notes.", "text/markdown")})
+    assert unchanged.json()["unchanged"] is True
+
+def test_upload_filename_cant_leave_the_upload_directory(client, auth_headers, tmp_path):
+    headers = auth_headers()
+    response = upload(client, headers, "../../escaped.md", b"# Escaped")
+    assert response.status_code == 200
+    assert os.listdir(settings.UPLOAD_DIR) == ["escaped.md"] and not (tmp_path / "escaped.md").exists()
+    detail = client.get(f"/api/v1/documents/{response.json()['document_id']}", headers=headers).json()
+    assert detail["filename"] == "escaped.md"
+
+def test_upload_is_extracted_in_the_worker_pool(client, auth_headers, monkeypatch):
+    from app.services.bulk_ingestion import extraction_pool
+    extracted = []
+    extract = extraction_pool.extract
+
+    async def counting_extract(file_path, document_type):
+        extracted.append(os.path.basename(file_path))
+        return await extract(file_path, document_type)
+    monkeypatch.setattr(extraction_pool, "extract", counting_extract)
+    headers = auth_headers()
+    response = upload(client, headers, "cells.md", b"# Cells\n\nCells divide.")
+    assert response.status_code == 200 and extracted == ["cells.md"]
+
+    broken = client.post("/api/v1/documents/upload", headers=headers,
+                         files={"file": ("broken.pdf", b"not a pdf", "application/pdf")})
+    assert broken.status_code == 500 and broken.json()["detail"].startswith("Failed to process document")
+    assert extracted == ["cells.md", "broken.pdf"] and os.listdir(settings.UPLOAD_DIR) == ["cells.md"]
@@ -0,0 +1,101 @@
+"""Offline backfill: which materials are missing or outdated, and resuming from a checkpoint."""
+from app.models.document import Document, DocumentType
+from app.models.learning_material import Summary, Quiz
+from app.models.user import User
+from generate_materials import Checkpoint, find_work, llm_service
+
+def add_documents(db, count):
+    user = User(username="backfill", email="backfill@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    documents = [
+        Document(title=f"Doc {i}", filename=f"doc{i}.md", file_path=f"/tmp/doc{i}.md",
+                 document_type=DocumentType.MARKDOWN, content=f"Content {i}" if i else "", user_id=user.id)
+        for i in range(count)
+    ]
+    db.add_all(documents)
+    db.flush()
+    return user, documents
+
+def test_missing_and_outdated_materials(db):
+    user, (empty, current, old, untagged) = add_documents(db, 4)
+    db.add_all([
+        Summary(document_id=current.id, title="s", content="c", generator=llm_service.generator("summary")),
+        Summary(document_id=old.id, title="s", content="c", generator="summary:v0:old/model"),
+        Summary(document_id=untagged.id, title="s", content="c"),
+        Quiz(document_id=current.id, title="q", num_questions=5, generator=llm_service.generator("quiz")),
+    ])
+    db.flush()
+
+    missing = find_work(db, ["summary", "quiz"], user_id=user.id)
+    assert [(item.document_id, item.material) for item in missing] == [(old.id, "quiz"), (untagged.id, "quiz")]
+    outdated = find_work(db, ["summary", "quiz"], outdated=True, user_id=user.id)
+    assert [(item.document_id, item.material) for item in outdated] == [
+        (old.id, "summary"), (old.id, "quiz"), (untagged.id, "summary"), (untagged.id, "quiz")
+    ]
+    assert find_work(db, ["summary"], outdated=True, document_ids=[current.id]) == []
+
+def test_checkpoint_resumes_only_the_same_run(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    run = {"materials": ["quiz"], "outdated": False}
+    checkpoint = Checkpoint(path, run)
+    checkpoint.mark("1:quiz", "generated")
+    checkpoint.mark("2:quiz", "failed", "TimeoutError: slow")
+    checkpoint.save(force=True)
+
+    resumed = Checkpoint(path, run)
+    assert resumed.resumed and resumed.done == {"1:quiz"}
+    assert resumed.attempts("2:quiz") == 1
+    resumed.mark("2:quiz", "generated")
+    assert resumed.attempts("2:quiz") == 0
+    assert resumed.state["totals"]["generated"] == 2
+
+    assert not Checkpoint(path, {**run, "outdated": True}).resumed
+
+def test_outdated_quiz_grows_the_bank_and_keeps_the_stats(engine, monkeypatch):
+    import asyncio
+    import generate_materials
+    from sqlalchemy.orm import sessionmaker
+    from app.models.learning_material import QuizQuestion, QuestionStat
+    from generate_materials import WorkItem, generate
+
+    sessions = sessionmaker(bind=engine)
+    monkeypatch.setattr(generate_materials, "SessionLocal", sessions)
+    requested = []
+
+    async def fake_quiz(content, title, num_questions, user_id=None, avoid=None):
+        requested.append((num_questions, list(avoid or [])))
+        return [{"question": "Which gas do plants release during photosynthesis?", "options": ["A) O2", "B) CO2"],
+                 "correct_answer": "A", "explanation": ""}]
+    monkeypatch.setattr(llm_service, "generate_quiz", fake_quiz)
+
+    db = sessions()
+    try:
+        user = User(username="outdated-quiz", email="outdated-quiz@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        document = Document(title="Plants", filename="plants.md", file_path="/tmp/plants.md",
+                            document_type=DocumentType.MARKDOWN, content="Plants", user_id=user.id)
+        db.add(document)
+        db.flush()
+        question = QuizQuestion(question="What do roots absorb from the soil?", correct_answer="A",
+                                options=["A) water", "B) light"], order_index=0)
+        db.add(Quiz(document_id=document.id, title="q", num_questions=5, generator="quiz:v0:old/model", questions=[question]))
+        db.flush()
+        db.add(QuestionStat(user_id=user.id, question_id=question.id, times_served=1, times_correct=0, times_wrong=1,
+                            last_answer_correct=False))
+        db.commit()
+        document_id, question_id = document.id, question.id
+    finally:
+        db.close()
+
+    assert asyncio.run(generate(WorkItem(document_id, "quiz"), outdated=True, num_questions=5, num_cards=5))
+    assert requested == [(generate_materials.settings.QUESTION_BANK_BATCH_SIZE, ["What do roots absorb from the soil?"])]
+    db = sessions()
+    try:
+        quiz = db.query(Quiz).filter(Quiz.document_id == document_id).one()
+        assert [q.id for q in quiz.questions][0] == question_id and len(quiz.questions) == 2
+        assert quiz.generator == llm_service.generator("quiz")
+        assert db.query(QuestionStat).filter(QuestionStat.question_id == question_id).one().times_wrong == 1
+    finally:
+        db.close()
@@ -0,0 +1,63 @@
+"""Conditional GETs of the generated materials: ETags, If-None-Match and 304."""
+from datetime import datetime
+from sqlalchemy.orm import sessionmaker
+from app.models.learning_material import Flashcard, FlashcardSet, Summary
+
+def upload(client, headers, text):
+    response = client.post("/api/v1/documents/upload", headers=headers,
+                           files={"file": ("cells.md", text.encode(), "text/markdown")})
+    assert response.status_code == 200, response.text
+    return response.json()["document_id"]
+
+def add_materials(engine, document_id, summary, created_at=None):
+    session = sessionmaker(bind=engine)()
+    try:
+        session.add(Summary(document_id=document_id, title="Summary", content=summary, created_at=created_at))
+        session.add(FlashcardSet(document_id=document_id, title="Cards", created_at=created_at,
+                                 flashcards=[Flashcard(front="Cell?", back="The unit of life")]))
+        session.commit()
+    finally:
+        session.close()
+
+def test_matching_etag_is_304_until_the_material_changes(client, auth_headers, engine):
+    headers = auth_headers()
+    document_id = upload(client, headers, "# Cells\n\nCells divide.")
+    add_materials(engine, document_id, "Cells divide.")
+
+    summary = client.get(f"/api/v1/learning-materials/summaries/{document_id}", headers=headers)
+    cards = client.get(f"/api/v1/learning-materials/flashcards/{document_id}", headers=headers)
+    quizzes = client.get(f"/api/v1/learning-materials/quizzes/{document_id}", headers=headers)
+    assert summary.status_code == cards.status_code == quizzes.status_code == 200
+    etags = {summary.headers["ETag"], cards.headers["ETag"], quizzes.headers["ETag"]}
+    assert len(etags) == 3 and all(etag.startswith('W/"') for etag in etags)
+    assert summary.headers["Cache-Control"] == "private, no-cache" and "Last-Modified" in summary.headers
+
+    for url, response in ((f"summaries/{document_id}", summary), (f"flashcards/{document_id}", cards)):
+        cached = client.get(f"/api/v1/learning-materials/{url}", headers={**headers, "If-None-Match": response.headers["ETag"]})
+        assert cached.status_code == 304 and cached.content == b""
+        assert cached.headers["ETag"] == response.headers["ETag"]
+    # Another resource's ETag doesn't match
+    other = client.get(f"/api/v1/learning-materials/flashcards/{document_id}", headers={**headers, "If-None-Match": summary.headers["ETag"]})
+    assert other.status_code == 200
+
+    reviewed = client.put(f"/api/v1/learning-materials/flashcards/{cards.json()[0]['id']}/review?difficulty=0", headers=headers)
+    assert reviewed.status_code == 200
+    after_review = client.get(f"/api/v1/learning-materials/flashcards/{document_id}", headers={**headers, "If-None-Match": cards.headers["ETag"]})
+    assert after_review.status_code == 200
+    assert after_review.headers["ETag"] != cards.headers["ETag"]
+    assert after_review.json()[0]["difficulty"] == "easy"
+
+def test_etag_of_a_deleted_document_doesnt_match_a_reused_id(client, auth_headers, engine):
+    headers = auth_headers()
+    document_id = upload(client, headers, "# Cells\n\nCells divide.")
+    add_materials(engine, document_id, "Old summary", created_at=datetime(2026, 1, 1))
+    old = client.get(f"/api/v1/learning-materials/summaries/{document_id}", headers=headers)
+    assert client.delete(f"/api/v1/documents/{document_id}", headers=headers).status_code == 200
+
+    # SQLite hands out the same ids again
+    assert upload(client, headers, "# Atoms\n\nAtoms are small.") == document_id
+    add_materials(engine, document_id, "New summary")
+    new = client.get(f"/api/v1/learning-materials/summaries/{document_id}", headers={**headers, "If-None-Match": old.headers["ETag"]})
+    assert new.json()["id"] == old.json()["id"]
+    assert new.status_code == 200 and new.json()["content"] == "New summary"
+    assert new.headers["ETag"] != old.headers["ETag"]
@@ -0,0 +1,46 @@
+"""Streamed JSON arrays of the LLM answers: objects completed chunk by chunk."""
+import pytest
+from app.services.json_stream import JSONArrayStreamParser, parse_json_array
+
+def feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+def test_objects_split_across_chunks_are_returned_when_closed():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"front": "Ce') == []
+    assert parser.pending == '{"front": "Ce'
+    assert parser.feed('ll", "back": "Unit"}, {"fro') == [{"front": "Cell", "back": "Unit"}]
+    assert parser.feed('nt": "Atom", "back": "Matter"}]') == [{"front": "Atom", "back": "Matter"}]
+    assert parser.finished and parser.items_parsed == 2
+
+def test_one_character_at_a_time():
+    text = '[{"a": {"b": [1, 2]}}, {"c": 3}]'
+    assert feed_all(JSONArrayStreamParser(), text) == [{"a": {"b": [1, 2]}}, {"c": 3}]
+
+def test_braces_and_escaped_quotes_inside_strings():
+    text = r'[{"question": "What does \"{x}\" print in f\"{x}]\"?", "answer": "a } or ]"}, {"n": "\\"}]'
+    items = feed_all(JSONArrayStreamParser(), [text[:20], text[20:41], text[41:]])
+    assert items == [{"question": 'What does "{x}" print in f"{x}]"?', "answer": "a } or ]"}, {"n": "\\"}]
+
+def test_truncated_trailing_object_is_left_pending():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"front": "Cell", "back": "Unit"}, {"front": "Ato') == [{"front": "Cell", "back": "Unit"}]
+    assert not parser.finished and parser.pending == '{"front": "Ato'
+    assert parse_json_array('[{"front": "Cell", "back": "Unit"}, {"front": "Ato') == [{"front": "Cell", "back": "Unit"}]
+
+def test_malformed_and_non_object_elements_are_skipped():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"a": 1,}, {"b": 2}]') == [{"b": 2}]
+    assert parser.items_skipped == 1
+
+def test_prose_and_code_fences_around_the_array():
+    fenced = 'Here are the cards:\n```json\n[\n  {"front": "Cell", "back": "Unit"}\n]\n```\nGood luck!'
+    assert parse_json_array(fenced) == [{"front": "Cell", "back": "Unit"}]
+    cited = 'Based on section [2] of the text:\n[{"front": "Atom", "back": "Matter"}]'
+    assert parse_json_array(cited) == [{"front": "Atom", "back": "Matter"}]
+    assert parse_json_array("Nothing to extract: []") == []
+    with pytest.raises(ValueError):
+        parse_json_array("I could not write flashcards for this document.")
@@ -0,0 +1,44 @@
+"""Learning material endpoints: what is saved when the model's answer is unusable."""
+from sqlalchemy.orm import sessionmaker
+from app.models.document import Document, DocumentType
+from app.models.learning_material import FlashcardSet
+from app.models.user import User
+from app.services.learning_materials import llm_service
+
+def add_document(engine, username):
+    db = sessionmaker(bind=engine)()
+    try:
+        owner = db.query(User).filter(User.username == username).one()
+        document = Document(title="Cells", filename="cells.md", file_path="/tmp/cells.md",
+                            document_type=DocumentType.MARKDOWN, content="Cells have a membrane.", user_id=owner.id)
+        db.add(document)
+        db.commit()
+        return document.id
+    finally:
+        db.close()
+
+def test_no_flashcard_set_is_saved_without_a_valid_card(engine, client, auth_headers, monkeypatch):
+    headers = auth_headers("no-valid-cards")
+    document_id = add_document(engine, "no-valid-cards")
+    answers = [[{"front": "", "back": "Nothing"}, "not a card"], [{"front": "Cell", "back": "Unit of life"}]]
+
+    async def fake_flashcards(content, title, num_cards, user_id=None):
+        return answers.pop(0)
+    monkeypatch.setattr(llm_service, "generate_flashcards", fake_flashcards)
+
+    response = client.post(f"/api/v1/learning-materials/flashcards/{document_id}", headers=headers)
+    assert response.status_code == 500
+    db = sessionmaker(bind=engine)()
+    try:
+        assert db.query(FlashcardSet).filter(FlashcardSet.document_id == document_id).count() == 0
+    finally:
+        db.close()
+
+    # The next request generates again instead of finding an empty set
+    response = client.post(f"/api/v1/learning-materials/flashcards/{document_id}", headers=headers)
+    assert response.status_code == 200
+    assert [card["front"] for card in response.json()["flashcards"]] == ["Cell"]
+
+def test_chat_shares_the_provider_chain_and_its_breakers():
+    from app.api.api_v1.endpoints import chat
+    assert chat.llm_service is llm_service
@@ -0,0 +1,128 @@
+"""Provider chain: fallback, hedging and the error reported when every provider fails."""
+import asyncio
+import pytest
+from app.services.llm_providers import (
+    FakeProvider, FakeProviderError, LLMProviderError, LLMTimeoutError, LLMUnavailableError, ProviderChain
+)
+
+MESSAGES = [{"role": "user", "content": "Hello"}]
+
+class SlowProvider(FakeProvider):
+    """Fake provider remembering whether its call was cancelled"""
+
+    def __init__(self, latency: float, name: str):
+        super().__init__(latency=latency, response=f"answer from {name}", name=name)
+        self.cancelled = False
+
+    async def complete(self, messages, model, max_tokens, temperature, timeout):
+        try:
+            return await super().complete(messages, model, max_tokens, temperature, timeout)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+def chain(*providers, **kwargs):
+    return ProviderChain(list(providers), timeout=5.0, max_retries=1, backoff_base=0.001, backoff_max=0.001, **kwargs)
+
+def test_falls_back_to_the_next_provider_after_retrying():
+    failing = FakeProvider(failure_rate=1.0, name="failing")
+    backup = FakeProvider(response="backup answer", name="backup")
+    result = asyncio.run(chain(failing, backup).complete(MESSAGES, max_tokens=10, temperature=0))
+    assert (result.provider, result.text) == ("backup", "backup answer")
+    assert failing.calls == 2  # One retry of the transient error
+    assert backup.calls == 1
+
+def test_hedge_fires_after_the_delay_and_cancels_the_loser():
+    async def scenario():
+        slow, fast = SlowProvider(1.0, "slow"), SlowProvider(0.0, "fast")
+        result = await chain(slow, fast, hedge=True, hedge_default_delay=0.05).complete(
+            MESSAGES, max_tokens=10, temperature=0
+        )
+        await asyncio.sleep(0)
+        return result, slow, fast
+    result, slow, fast = asyncio.run(scenario())
+    assert result.provider == "fast"
+    assert slow.cancelled and not fast.cancelled
+
+def test_no_hedge_when_the_primary_answers_in_time():
+    async def scenario():
+        primary, secondary = SlowProvider(0.0, "primary"), SlowProvider(0.0, "secondary")
+        result = await chain(primary, secondary, hedge=True, hedge_default_delay=0.5).complete(
+            MESSAGES, max_tokens=10, temperature=0
+        )
+        return result, secondary.calls
+    result, secondary_calls = asyncio.run(scenario())
+    assert result.provider == "primary" and secondary_calls == 0
+
+def test_every_provider_failing_combines_the_errors():
+    providers = [FakeProvider(failure_rate=1.0, name="one"), FakeProvider(failure_rate=1.0, name="two")]
+    with pytest.raises(LLMProviderError) as error:
+        asyncio.run(chain(*providers).complete(MESSAGES, max_tokens=10, temperature=0))
+    assert type(error.value) is LLMProviderError
+    assert "'one'" in str(error.value) and "'two'" in str(error.value)
+
+def test_combined_error_kinds():
+    providers = chain()
+    unavailable = providers._combine_errors([
+        LLMUnavailableError("a open", retry_after=30), LLMUnavailableError("b open", retry_after=5)
+    ])
+    assert isinstance(unavailable, LLMUnavailableError) and unavailable.retry_after == 5
+    timeout = providers._combine_errors([LLMUnavailableError("a open", retry_after=30), asyncio.TimeoutError()])
+    assert isinstance(timeout, LLMTimeoutError)
+    failed = providers._combine_errors([FakeProviderError("503"), LLMUnavailableError("b open", retry_after=5)])
+    assert type(failed) is LLMProviderError
+
+class StallingProvider(FakeProvider):
+    """Fake provider sending one chunk, then nothing"""
+
+    def __init__(self):
+        super().__init__(name="stalling")
+        self.closed = False
+
+    async def stream(self, messages, model, max_tokens, temperature, timeout):
+        try:
+            yield "first words"
+            await asyncio.sleep(10)
+            yield "never sent"
+        finally:
+            self.closed = True
+
+def test_stream_stalling_mid_answer_fails_and_counts_against_the_breaker():
+    async def scenario():
+        provider = StallingProvider()
+        received = []
+        with pytest.raises(LLMTimeoutError):
+            async for chunk in chain(provider, stream_idle_timeout=0.05).stream(MESSAGES, max_tokens=10, temperature=0):
+                received.append(chunk)
+        return provider, received
+    provider, received = asyncio.run(scenario())
+    assert received == ["first words"]
+    assert provider.closed and provider.breaker.failures == 1
+
+def test_stream_with_steady_chunks_isnt_cut():
+    provider = FakeProvider(response="x" * 64, tokens_per_second=400)  # 0.01s between chunks
+
+    async def read():
+        return "".join([chunk async for chunk in chain(provider, stream_idle_timeout=0.5).stream(
+            MESSAGES, max_tokens=10, temperature=0
+        )])
+    assert asyncio.run(read()) == "x" * 64
+    assert provider.breaker.failures == 0
+
+@pytest.mark.parametrize("cancel_after, hedged", [(0.05, False), (0.3, True)])
+def test_cancelled_caller_cancels_the_hedged_calls(cancel_after, hedged):
+    async def scenario():
+        slow, backup = SlowProvider(1.0, "slow"), SlowProvider(1.0, "backup")
+        call = asyncio.create_task(chain(slow, backup, hedge=True, hedge_default_delay=0.2).complete(
+            MESSAGES, max_tokens=10, temperature=0
+        ))
+        await asyncio.sleep(cancel_after)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0)
+        # Checked before asyncio.run cancels the tasks left behind
+        return slow.cancelled, backup.calls, backup.cancelled
+    slow_cancelled, backup_calls, backup_cancelled = asyncio.run(scenario())
+    assert slow_cancelled
+    assert backup_calls == int(hedged) and backup_cancelled == hedged
@@ -0,0 +1,57 @@
+"""Circuit breaker states and retry backoff."""
+import random
+from app.services.llm_resilience import CircuitBreaker, backoff_delay
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_breaker_opens_then_probes_then_closes():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_success()  # Only consecutive failures count
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() == 30
+
+    clock.now += 29
+    assert not breaker.allow_request() and breaker.retry_after() == 1
+    clock.now += 1
+    assert breaker.allow_request()  # The probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()  # Only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    assert breaker.allow_request() and breaker.allow_request()
+
+def test_failed_probe_reopens_and_released_probe_is_retried():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.retry_after() == 10
+
+    clock.now += 10
+    assert breaker.allow_request()
+    breaker.release()  # Cancelled: says nothing about the provider
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+def test_backoff_jitter_stays_within_the_exponential_bound():
+    rng = random.Random(0)
+    for attempt in range(8):
+        bound = min(8.0, 0.5 * 2 ** attempt)
+        delays = [backoff_delay(attempt, 0.5, 8.0, rng) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+        assert max(delays) > bound / 2  # Full jitter: spread over the whole range
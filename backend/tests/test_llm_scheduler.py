@@ -0,0 +1,101 @@
+"""LLM scheduler: lane priority, fairness between users, quotas and load shedding."""
+import asyncio
+import pytest
+from app.services.llm_scheduler import LLMScheduler, QueueFullError, QuotaExceededError, TokenBucket
+
+async def hold(llm, order, user_id, task, release, name=None):
+    """Stub LLM call: take a slot, note the order it was granted in, wait for release"""
+    async with llm.slot(user_id, task, 10):
+        order.append(name or (user_id, task))
+        await release.wait()
+
+def make_scheduler(**kwargs):
+    """Scheduler without quotas, the list of granted slots, the release event and the tasks"""
+    return LLMScheduler(user_tokens_per_minute=0, **kwargs), [], asyncio.Event(), []
+
+async def start(tasks, coroutine):
+    tasks.append(asyncio.create_task(coroutine))
+    await asyncio.sleep(0)
+
+def test_interactive_lane_goes_before_batch_and_batch_keeps_free_slots():
+    async def scenario():
+        llm, order, release, tasks = make_scheduler(max_concurrency=2, batch_max_concurrency=1)
+        await start(tasks, hold(llm, order, 1, "quiz", release, "batch0"))
+        await start(tasks, hold(llm, order, 2, "summary", release, "batch1"))  # Waits: batch is capped at 1
+        assert llm.snapshot()["running"] == {"interactive": 0, "batch": 1, "background": 0}
+        await start(tasks, hold(llm, order, 3, "chat", release, "chat0"))  # Uses the slot kept free
+        await start(tasks, hold(llm, order, 4, "chat", release, "chat1"))  # No slot left: queued
+        assert llm.snapshot()["queued"] == {"interactive": 1, "batch": 1, "background": 0}
+        release.set()
+        await asyncio.gather(*tasks)
+        return order
+    order = asyncio.run(scenario())
+    assert order[:2] == ["batch0", "chat0"]
+    assert order.index("chat1") < order.index("batch1")
+
+def test_users_take_turns_within_a_lane():
+    async def scenario():
+        llm, order, release, tasks = make_scheduler(max_concurrency=1, batch_max_concurrency=1)
+        await start(tasks, hold(llm, order, 0, "quiz", release, "running"))
+        for i in range(3):
+            await start(tasks, hold(llm, order, 1, "quiz", release, f"heavy{i}"))
+        await start(tasks, hold(llm, order, 2, "quiz", release, "light0"))
+        await start(tasks, hold(llm, order, 3, "quiz", release, "other0"))
+        release.set()
+        await asyncio.gather(*tasks)
+        return order
+    assert asyncio.run(scenario()) == ["running", "heavy0", "light0", "other0", "heavy1", "heavy2"]
+
+def test_token_bucket_refuses_with_retry_after_and_refunds_unused_tokens():
+    async def scenario():
+        llm = LLMScheduler(user_tokens_per_minute=60, user_token_burst=100)
+        async with llm.slot(1, "quiz", 80) as ticket:
+            ticket.used_tokens = 30  # 50 of the 80 reserved come back
+        async with llm.slot(1, "quiz", 60):
+            pass
+        with pytest.raises(QuotaExceededError) as error:
+            async with llm.slot(1, "quiz", 60):
+                pass
+        async with llm.slot(2, "quiz", 60):  # Another user has their own bucket
+            pass
+        return error.value, llm.rejected["quota"]
+    error, rejected = asyncio.run(scenario())
+    assert error.status_code == 429 and 49 <= error.retry_after <= 51 and rejected == 1
+
+def test_token_bucket_refills_over_time():
+    now = [0.0]
+    bucket = TokenBucket(capacity=100, refill_per_second=10, clock=lambda: now[0])
+    assert bucket.try_consume(100) == 0
+    assert bucket.try_consume(50) == 5
+    now[0] = 5.0
+    assert bucket.try_consume(50) == 0
+    assert bucket.try_consume(500) == 10  # Never more than the capacity
+
+def test_full_queue_sheds_load_with_503():
+    async def scenario():
+        llm, order, release, tasks = make_scheduler(max_concurrency=1, batch_max_concurrency=1, max_queue_depth=2)
+        for i in range(3):
+            await start(tasks, hold(llm, order, i, "quiz", release))
+        with pytest.raises(QueueFullError) as error:
+            async with llm.slot(9, "quiz", 10):
+                pass
+        # Lanes have their own queue: chat still gets in line
+        await start(tasks, hold(llm, order, 9, "chat", release))
+        release.set()
+        await asyncio.gather(*tasks)
+        return error.value, llm.rejected["queue_full"], len(order)
+    error, rejected, served = asyncio.run(scenario())
+    assert error.status_code == 503 and error.retry_after >= 1 and rejected == 1 and served == 4
+
+def test_queue_timeout_gives_up_the_place_in_line():
+    async def scenario():
+        llm, order, release, tasks = make_scheduler(max_concurrency=1, batch_max_concurrency=1, queue_timeout=0.01)
+        await start(tasks, hold(llm, order, 1, "quiz", release))
+        with pytest.raises(QueueFullError):
+            async with llm.slot(2, "quiz", 10):
+                pass
+        queued = llm.snapshot()["queued"]["batch"]
+        release.set()
+        await asyncio.gather(*tasks)
+        return queued, llm.rejected["queue_timeout"]
+    assert asyncio.run(scenario()) == (0, 1)
@@ -0,0 +1,58 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+from app.core.database import Base
+from app.core.migrations import alembic_config, include_object, upgrade_database
+
+def test_migrations_match_models(engine):
+    """alembic upgrade head builds the schema the models describe"""
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_object": include_object})
+        assert compare_metadata(context, Base.metadata) == []
+
+# Tables a database created with create_all (before migrations existed) can have
+LEGACY_TABLES = [
+    "users", "documents", "summaries", "quizzes", "quiz_questions", "flashcard_sets", "flashcards",
+    "chat_sessions", "chat_messages", "document_chunks",
+]
+
+def test_create_all_database_is_adopted(tmp_path):
+    """A database created with create_all is stamped, then gets the missing indexes"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in LEGACY_TABLES])
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_documents_user_id")
+        connection.exec_driver_sql("INSERT INTO users (username, email, hashed_password) VALUES ('ada', 'ada@example.com', 'x')")
+
+    upgrade_database(engine)
+
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    assert "ix_documents_user_id" in {index["name"] for index in inspect(engine).get_indexes("documents")}
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT version_num FROM alembic_version").scalar() == head
+        assert connection.exec_driver_sql("SELECT count(*) FROM users").scalar() == 1
+    engine.dispose()
+
+def test_database_from_before_versions_and_page_offsets_is_adopted(tmp_path):
+    """create_all databases without the version and page_offsets columns get them from 0002"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'unversioned.db'}")
+    upgrade_database(engine, "0001")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE alembic_version")  # Built by create_all
+        connection.exec_driver_sql("INSERT INTO users (username, email, hashed_password) VALUES ('ada', 'ada@example.com', 'x')")
+        connection.exec_driver_sql(
+            "INSERT INTO documents (title, filename, file_path, document_type, content, user_id) "
+            "VALUES ('Cells', 'cells.md', '/tmp/cells.md', 'MARKDOWN', 'Cells', 1)"
+        )
+        connection.exec_driver_sql("INSERT INTO summaries (title, content, document_id) VALUES ('Cells', 'Summary', 1)")
+
+    upgrade_database(engine)
+
+    columns = inspect(engine).get_columns
+    assert "page_offsets" in {column["name"] for column in columns("documents")}
+    for table in ("summaries", "quizzes", "flashcard_sets"):
+        assert "version" in {column["name"] for column in columns(table)}
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT version FROM summaries").scalar() == 1
+    engine.dispose()
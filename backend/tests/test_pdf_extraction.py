@@ -0,0 +1,64 @@
+"""Adaptive PDF extraction: which pages go through pdfplumber, and the text they get."""
+import PyPDF2
+import pytest
+from benchmarks.corpus import make_pdf
+from app.services.document_processor import DocumentProcessor
+
+@pytest.fixture
+def processor():
+    return DocumentProcessor()
+
+def merge_pdfs(path, sources):
+    writer = PyPDF2.PdfWriter()
+    for source in sources:
+        if source is None:
+            writer.add_blank_page(width=595, height=842)
+            continue
+        for page in PyPDF2.PdfReader(source).pages:
+            writer.add_page(page)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+@pytest.mark.parametrize("options", [{}, {"columns": 2}, {"images_per_page": 1}])
+def test_plain_pages_take_the_fast_path(tmp_path, processor, options):
+    path = make_pdf(str(tmp_path / "plain.pdf"), pages=3, **options)
+    pages, routes = processor.extract_pdf_pages_adaptive(path)
+    assert routes == [("pypdf2", "ok")] * 3
+    assert pages == processor.extract_pdf_pages_pypdf2(path)
+
+def test_only_the_pages_that_need_it_use_pdfplumber(tmp_path, processor):
+    path = merge_pdfs(str(tmp_path / "mixed.pdf"), [
+        make_pdf(str(tmp_path / "text.pdf"), pages=2),
+        make_pdf(str(tmp_path / "tables.pdf"), pages=1, tables_per_page=2),
+        make_pdf(str(tmp_path / "scrambled.pdf"), pages=1, scrambled=True),
+        None,
+    ])
+    pages, routes = processor.extract_pdf_pages_adaptive(path)
+    assert routes == [
+        ("pypdf2", "ok"), ("pypdf2", "ok"),
+        ("pdfplumber", "table"), ("pdfplumber", "order"), ("pdfplumber", "empty"),
+    ]
+    assert pages[2].startswith("Column 1 Column 2 Column 3 Column 4")
+    assert pages[4] == ""
+
+def test_out_of_order_page_is_read_in_order(tmp_path, processor):
+    plain = make_pdf(str(tmp_path / "plain.pdf"), pages=1, seed=3)
+    scrambled = make_pdf(str(tmp_path / "scrambled.pdf"), pages=1, seed=3, scrambled=True)
+    # Same words in the same order (the two extractors lay out blank lines differently)
+    assert processor.extract_pdf_pages(scrambled)[0].split() == processor.extract_pdf_pages(plain)[0].split()
+
+def test_page_offsets_follow_the_adaptive_text(tmp_path, processor):
+    path = merge_pdfs(str(tmp_path / "mixed.pdf"), [
+        make_pdf(str(tmp_path / "text.pdf"), pages=1),
+        make_pdf(str(tmp_path / "tables.pdf"), pages=1, tables_per_page=1),
+    ])
+    text, offsets = processor.extract_text_from_pdf_with_pages(path)
+    assert len(offsets) == 2
+    assert text[offsets[1]:].startswith("Column 1")
+
+def test_unreadable_pdf_fails(tmp_path, processor):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+    with pytest.raises(Exception, match="Failed to extract text from PDF"):
+        processor.extract_pdf_pages(str(path))
@@ -0,0 +1,139 @@
+"""Background pre-generation: the scheduler's idle-only lane and handing jobs over to requests."""
+import asyncio
+from app.services.llm_scheduler import BackgroundWork, LLMScheduler, background_work
+from app.services.pregeneration import Pregenerator
+
+def scheduler(**kwargs):
+    return LLMScheduler(max_concurrency=2, batch_max_concurrency=2, user_tokens_per_minute=0, **kwargs)
+
+async def hold(llm, order, name, release, work=None):
+    if work is not None:
+        background_work.set(work)
+    async with llm.slot(1, "summary", 10):
+        order.append(name)
+        await release.wait()
+
+def test_background_call_waits_until_nothing_else_is_queued():
+    async def scenario():
+        llm, order, release = scheduler(), [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(llm, order, f"batch{i}", release)) for i in range(2)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(hold(llm, order, "background", release, BackgroundWork())))
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(hold(llm, order, "batch2", release)))
+        await asyncio.sleep(0)
+        assert llm.snapshot()["queued"] == {"interactive": 0, "batch": 1, "background": 1}
+        release.set()
+        await asyncio.gather(*tasks)
+        return order
+    assert asyncio.run(scenario()) == ["batch0", "batch1", "batch2", "background"]
+
+def test_background_lane_is_capped():
+    async def scenario():
+        llm, order, release = scheduler(background_max_concurrency=1), [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(llm, order, f"bg{i}", release, BackgroundWork())) for i in range(2)]
+        await asyncio.sleep(0)
+        running = llm.snapshot()["running"]["background"]
+        release.set()
+        await asyncio.gather(*tasks)
+        return running
+    assert asyncio.run(scenario()) == 1
+
+def test_claim_cancels_a_job_still_waiting_for_a_slot():
+    async def scenario():
+        started = []
+
+        async def run(material, document_id, user_id):
+            started.append(material)
+            await asyncio.sleep(10)  # Queued in the background lane
+            return True
+
+        pregenerator = Pregenerator(run)
+        pregenerator.schedule(1, 1, ["summary"])
+        await asyncio.sleep(0)
+        task, _ = pregenerator._jobs[(1, "summary")]
+        await pregenerator.claim(1, "summary")
+        await asyncio.sleep(0)
+        return started, task.cancelled(), pregenerator._jobs
+    assert asyncio.run(scenario()) == (["summary"], True, {})
+
+def test_claim_waits_for_a_job_holding_a_slot():
+    async def scenario():
+        saved = []
+
+        async def run(material, document_id, user_id):
+            background_work.get().admitted.set()
+            await asyncio.sleep(0.01 if material == "summary" else 10)
+            saved.append(material)
+            return True
+
+        pregenerator = Pregenerator(run)
+        pregenerator.schedule(1, 1, ["summary", "quiz"])
+        await asyncio.sleep(0)
+        await pregenerator.claim(1, "summary")
+        summary_saved = list(saved)
+        pregenerator.cancel(1)
+        await asyncio.sleep(0)
+        return summary_saved, pregenerator._jobs
+    assert asyncio.run(scenario()) == (["summary"], {})
+
+def test_pregeneration_uses_the_generation_services(engine, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+    from app.models import chat  # noqa: F401 (mapper of the Document relationships)
+    from app.models.document import Document, DocumentType
+    from app.models.learning_material import FlashcardSet, Summary
+    from app.models.user import User
+    from app.services import learning_materials
+
+    sessions = sessionmaker(bind=engine)
+    monkeypatch.setattr(learning_materials, "SessionLocal", sessions)
+    calls = []
+
+    async def fake_summary(content, title, user_id=None):
+        calls.append("summary")
+        return "A summary"
+
+    async def fake_flashcards(content, title, num_cards, user_id=None):
+        calls.append("flashcards")
+        return [{"front": "Cell", "back": "Unit of life"}]
+    monkeypatch.setattr(learning_materials.llm_service, "generate_summary", fake_summary)
+    monkeypatch.setattr(learning_materials.llm_service, "generate_flashcards", fake_flashcards)
+
+    db = sessions()
+    try:
+        owner = User(username="pregenerated", email="pregenerated@example.com", hashed_password="x")
+        db.add(owner)
+        db.flush()
+        document = Document(title="Cells", filename="cells.md", file_path="/tmp/cells.md",
+                            document_type=DocumentType.MARKDOWN, content="Cells", user_id=owner.id)
+        db.add(document)
+        db.commit()
+        user_id, document_id = owner.id, document.id
+    finally:
+        db.close()
+
+    run = learning_materials.pregenerate_material
+    assert asyncio.run(run("summary", document_id, user_id))
+    assert asyncio.run(run("flashcards", document_id, user_id))
+    assert not asyncio.run(run("summary", document_id, user_id))  # Already generated
+    assert not asyncio.run(run("flashcards", document_id, user_id + 1))  # Not the owner
+    assert calls == ["summary", "flashcards"]
+    db = sessions()
+    try:
+        assert db.query(Summary).filter(Summary.document_id == document_id).one().content == "A summary"
+        assert len(db.query(FlashcardSet).filter(FlashcardSet.document_id == document_id).one().flashcards) == 1
+    finally:
+        db.close()
+
+def test_background_calls_dont_spend_the_users_quota():
+    async def scenario():
+        llm = LLMScheduler(max_concurrency=2, batch_max_concurrency=2, user_tokens_per_minute=60, user_token_burst=100)
+        background_work.set(BackgroundWork())
+        for _ in range(3):
+            async with llm.slot(1, "summary", 100):
+                pass
+        background_work.set(None)
+        async with llm.slot(1, "summary", 100):
+            pass
+        return llm.rejected["quota"]
+    assert asyncio.run(scenario()) == 0
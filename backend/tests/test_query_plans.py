@@ -0,0 +1,114 @@
+"""EXPLAIN QUERY PLAN of the hot queries, on a database built by the migrations.
+
+Each query is written the way the endpoints and services issue it. A plan
+step like "SCAN documents" (no index) means a full table scan crept back in.
+"""
+from datetime import datetime
+from typing import Callable, Dict, List
+import pytest
+from sqlalchemy import func
+from sqlalchemy.orm import Session, Query
+from app.models.chat import ChatSession, ChatMessage
+from app.models.document import Document, DocumentChunk, DocumentVersion
+from app.models.learning_material import Summary, Quiz, QuizQuestion, QuestionStat, FlashcardSet, Flashcard
+
+def query_plan(db: Session, query: Query) -> List[str]:
+    """Detail column of EXPLAIN QUERY PLAN for an ORM query"""
+    compiled = query.statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[3] for row in rows]
+
+def full_scans(plan: List[str]) -> List[str]:
+    return [step for step in plan if step.startswith("SCAN ") and "USING" not in step]
+
+HOT_QUERIES: Dict[str, Callable[[Session], Query]] = {
+    # GET /documents
+    "list_documents": lambda db: db.query(
+        Document.id, Document.title, Document.filename, Document.document_type, Document.created_at,
+        Document.version, func.coalesce(func.length(Document.content), 0)
+    ).filter(Document.user_id == 1),
+    # "existing material" checks before generating
+    "existing_summary": lambda db: db.query(Summary).filter(Summary.document_id == 1),
+    "existing_quiz": lambda db: db.query(Quiz).filter(Quiz.document_id == 1),
+    "existing_flashcard_set": lambda db: db.query(FlashcardSet).filter(FlashcardSet.document_id == 1),
+    # Conditional GETs: ownership and version in one query
+    "summary_version": lambda db: db.query(Summary.id, Summary.version).join(Document).filter(
+        Summary.document_id == 1, Document.user_id == 1
+    ),
+    "quiz_versions": lambda db: db.query(Quiz.id, Quiz.version).filter(Quiz.document_id == 1).order_by(Quiz.id),
+    "flashcard_set_version": lambda db: db.query(FlashcardSet.id, FlashcardSet.version).join(Document).filter(
+        FlashcardSet.document_id == 1, Document.user_id == 1
+    ),
+    # Lazy loads of quiz.questions and flashcard_set.flashcards
+    "quiz_questions": lambda db: db.query(QuizQuestion).filter(QuizQuestion.quiz_id == 1),
+    "flashcards_of_set": lambda db: db.query(Flashcard).filter(Flashcard.flashcard_set_id == 1),
+    # Question bank of a document with a user's stats, and the stats of served or answered questions
+    "question_bank": lambda db: db.query(QuizQuestion, QuestionStat).join(QuizQuestion.quiz).outerjoin(
+        QuestionStat, (QuestionStat.question_id == QuizQuestion.id) & (QuestionStat.user_id == 1)
+    ).filter(Quiz.document_id == 1),
+    "user_question_stats": lambda db: db.query(QuestionStat).filter(
+        QuestionStat.user_id == 1, QuestionStat.question_id.in_([1, 2, 3])
+    ),
+    # Cards due for review across a user's documents
+    "due_flashcards": lambda db: db.query(Flashcard).join(FlashcardSet).join(Document).filter(
+        Document.user_id == 1, Flashcard.next_review <= datetime(2026, 1, 1)
+    ).order_by(Flashcard.next_review),
+    # Chat sessions and memory
+    "chat_sessions": lambda db: db.query(ChatSession).filter(
+        ChatSession.user_id == 1, ChatSession.document_id == 1
+    ).order_by(ChatSession.id.desc()),
+    "document_chat_sessions": lambda db: db.query(ChatSession).filter(ChatSession.document_id == 1),
+    "pending_chat_messages": lambda db: db.query(ChatMessage).filter(
+        ChatMessage.session_id == 1, ChatMessage.id > 10
+    ).order_by(ChatMessage.id),
+    # Chunks for the vector index and semantic search results
+    "document_chunks": lambda db: db.query(DocumentChunk).filter(
+        DocumentChunk.document_id == 1
+    ).order_by(DocumentChunk.chunk_index),
+    "semantic_results": lambda db: db.query(DocumentChunk, Document.title).join(Document).filter(
+        DocumentChunk.id.in_([1, 2, 3]), Document.user_id == 1
+    ),
+    # GET /documents/{id}/versions
+    "document_versions": lambda db: db.query(DocumentVersion).filter(
+        DocumentVersion.document_id == 1
+    ).order_by(DocumentVersion.version),
+}
+
+# Index each query must go through (any of them when the planner has a choice)
+EXPECTED_INDEXES = {
+    "list_documents": {"ix_documents_user_id"},
+    "existing_summary": {"ix_summaries_document_id"},
+    "existing_quiz": {"ix_quizzes_document_id"},
+    "existing_flashcard_set": {"ix_flashcard_sets_document_id"},
+    "summary_version": {"ix_summaries_document_id"},
+    "quiz_versions": {"ix_quizzes_document_id"},
+    "flashcard_set_version": {"ix_flashcard_sets_document_id"},
+    "quiz_questions": {"ix_quiz_questions_quiz_id"},
+    "flashcards_of_set": {"ix_flashcards_flashcard_set_id"},
+    "question_bank": {"ix_quizzes_document_id"},
+    "user_question_stats": {"ix_question_stats_user_id_question_id"},
+    "due_flashcards": {"ix_flashcards_next_review", "ix_flashcards_flashcard_set_id"},
+    "chat_sessions": {"ix_chat_sessions_user_id", "ix_chat_sessions_document_id"},
+    "document_chat_sessions": {"ix_chat_sessions_document_id"},
+    "pending_chat_messages": {"ix_chat_messages_session_id"},
+    "document_chunks": {"ix_document_chunks_document_id"},
+    "semantic_results": {"INTEGER PRIMARY KEY"},
+    "document_versions": {"ix_document_versions_document_id"},
+}
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_has_no_full_scan(db, name):
+    plan = query_plan(db, HOT_QUERIES[name](db))
+    assert not full_scans(plan), f"{name} scans a whole table: {plan}"
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_expected_index(db, name):
+    plan = query_plan(db, HOT_QUERIES[name](db))
+    assert any(index in step for step in plan for index in EXPECTED_INDEXES[name]), \
+        f"{name} doesn't use {sorted(EXPECTED_INDEXES[name])}: {plan}"
+
+def test_full_scan_is_detected(db):
+    """The check above must fail on a query no index can serve"""
+    plan = query_plan(db, db.query(Document).filter(Document.title == "notes"))
+    assert full_scans(plan) == ["SCAN documents"]
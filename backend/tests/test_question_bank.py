@@ -0,0 +1,149 @@
+"""Question bank: duplicate detection, sampling unseen and weak questions, recording answers."""
+import random
+from datetime import datetime
+from app.models import chat, user  # noqa: F401 (mappers of the Document relationships)
+from app.models.document import Document, DocumentType
+from app.models.learning_material import Quiz, QuizQuestion, QuestionStat
+from app.models.user import User
+from app.services.question_bank import DuplicateFilter, load_bank, record_answers, record_served, sample_questions
+
+def question(id, text=None):
+    return QuizQuestion(id=id, question=text or f"Question {id:03d}?", correct_answer="A", options=["A) a", "B) b"])
+
+def stat(served=1, last_correct=None, served_at=1):
+    return QuestionStat(times_served=served, last_answer_correct=last_correct,
+                        last_served_at=datetime.fromtimestamp(1_700_000_000 + served_at))
+
+def test_duplicates_are_detected_reworded_or_within_a_batch():
+    duplicates = DuplicateFilter(["Which organelle produces ATP in the cell?"])
+    assert not duplicates.is_new("Which organelle produces the ATP in a cell?")
+    assert duplicates.is_new("What do ribosomes translate into proteins?")
+    assert not duplicates.is_new("What do ribosomes translate into proteins?")
+    assert DuplicateFilter([]).is_new("Anything at all?")
+
+def test_weak_and_unseen_first_then_least_recently_served():
+    rows = [
+        (question(1), stat(last_correct=True, served_at=5)),
+        (question(2), stat(last_correct=False, served_at=9)),
+        (question(3), None),
+        (question(4), stat(last_correct=True, served_at=2)),
+        (question(5), stat(served=0)),
+        (question(6), stat(last_correct=False, served_at=3)),
+    ]
+    sample = sample_questions(rows, 5, random.Random(0))
+    assert [q.id for q in sample.questions[:2]] == [6, 2]
+    assert sorted(q.id for q in sample.questions[2:4]) == [3, 5]
+    assert sample.questions[4].id == 4
+    assert sample.fresh == 4
+    # Weak questions take at most half of a quiz while there are unseen ones
+    assert [q.id for q in sample_questions(rows, 2, random.Random(0)).questions][0] == 6
+    assert [q.id for q in sample_questions(rows, 2, random.Random(0)).questions][1] in (3, 5)
+    assert sample_questions(rows, 3, random.Random(0)).fresh == 3
+    assert sample_questions([], 5).questions == []
+
+def test_served_and_answered_questions_update_the_stats(db):
+    owner = User(username="quizzer", email="quizzer@example.com", hashed_password="x")
+    db.add(owner)
+    db.flush()
+    document = Document(title="Cells", filename="cells.md", file_path="/tmp/cells.md",
+                        document_type=DocumentType.MARKDOWN, content="Cells", user_id=owner.id)
+    db.add(document)
+    db.flush()
+    quiz = Quiz(document_id=document.id, title="Quiz", questions=[
+        QuizQuestion(question=f"Question {i:03d}?", correct_answer="B", options=["A) a", "B) b"], order_index=i)
+        for i in range(3)
+    ])
+    db.add(quiz)
+    db.flush()
+    first, second, third = quiz.questions
+
+    record_served(db, owner.id, [first.id, second.id])
+    graded = record_answers(db, owner.id, document.id, {first.id: "b", second.id: "A", 999999: "A"})
+    db.flush()
+    assert [(q.id, correct) for q, correct in graded] == [(first.id, True), (second.id, False)]
+
+    rows = load_bank(db, document.id, owner.id)
+    stats = {q.id: s for q, s in rows}
+    assert stats[first.id].times_served == 1 and stats[first.id].times_correct == 1
+    assert stats[second.id].last_answer_correct is False and stats[second.id].times_wrong == 1
+    assert stats[third.id] is None
+    assert [q.id for q in sample_questions(rows, 3).questions] == [second.id, third.id, first.id]
+
+def test_streamed_quiz_generates_a_whole_batch_into_the_bank(engine, client, auth_headers, monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+    from app.api.api_v1.endpoints import learning_materials
+    from app.core.config import settings
+
+    sessions = sessionmaker(bind=engine)
+    monkeypatch.setattr(learning_materials, "SessionLocal", sessions)
+    requested = []
+
+    async def fake_stream(content, title, num_questions, user_id=None, avoid=None):
+        requested.append(num_questions)
+        topics = ["mitochondria", "ribosomes", "chloroplasts", "lysosomes", "vacuoles", "nucleus", "membrane",
+                  "cytoskeleton", "golgi", "centrioles", "peroxisomes", "flagella"]
+        for topic in topics[:num_questions]:
+            yield {"question": f"What is the role of the {topic}?", "options": ["A) this", "B) that"],
+                   "correct_answer": "A", "explanation": ""}
+    monkeypatch.setattr(learning_materials.llm_service, "stream_quiz", fake_stream)
+
+    headers = auth_headers("streamer")
+    db = sessions()
+    try:
+        owner = db.query(User).filter(User.username == "streamer").one()
+        document = Document(title="Cells", filename="cells.md", file_path="/tmp/cells.md",
+                            document_type=DocumentType.MARKDOWN, content="Cells", user_id=owner.id)
+        db.add(document)
+        db.commit()
+        owner_id, document_id = owner.id, document.id
+    finally:
+        db.close()
+
+    response = client.post(f"/api/v1/learning-materials/quizzes/{document_id}/stream?num_questions=3", headers=headers)
+    assert response.status_code == 200
+    assert response.text.count("event: question") == 3
+    assert requested == [settings.QUESTION_BANK_BATCH_SIZE]
+    db = sessions()
+    try:
+        rows = load_bank(db, document_id, owner_id)
+        assert len(rows) == settings.QUESTION_BANK_BATCH_SIZE
+        assert sum(1 for _, stat in rows if stat is not None) == 3
+    finally:
+        db.close()
+
+def test_concurrent_requests_add_up_instead_of_conflicting(engine):
+    from sqlalchemy.orm import sessionmaker
+    sessions = sessionmaker(bind=engine)
+    setup = sessions()
+    try:
+        owner = User(username="two-tabs", email="two-tabs@example.com", hashed_password="x")
+        setup.add(owner)
+        setup.flush()
+        document = Document(title="Tabs", filename="tabs.md", file_path="/tmp/tabs.md",
+                            document_type=DocumentType.MARKDOWN, content="Tabs", user_id=owner.id)
+        setup.add(document)
+        setup.flush()
+        quiz = Quiz(document_id=document.id, title="Quiz", questions=[
+            QuizQuestion(question="Question 001?", correct_answer="A", options=["A) a", "B) b"], order_index=0)
+        ])
+        setup.add(quiz)
+        setup.commit()
+        user_id, document_id, question_id = owner.id, document.id, quiz.questions[0].id
+    finally:
+        setup.close()
+
+    # Both requests sampled the question before either recorded it
+    first, second = sessions(), sessions()
+    try:
+        assert load_bank(first, document_id, user_id)[0][1] is None
+        assert load_bank(second, document_id, user_id)[0][1] is None
+        record_served(first, user_id, [question_id])
+        first.commit()
+        record_served(second, user_id, [question_id])
+        record_answers(second, user_id, document_id, {question_id: "B"})
+        second.commit()
+        stat = first.query(QuestionStat).filter(QuestionStat.user_id == user_id).one()
+        assert (stat.times_served, stat.times_wrong, stat.last_answer_correct) == (2, 1, False)
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,53 @@
+"""Full-text search endpoint: FTS5 snippets, and the triggers keeping the index in sync."""
+from sqlalchemy.orm import sessionmaker
+from app.models.learning_material import Summary
+
+def upload(client, headers, text):
+    response = client.post("/api/v1/documents/upload", headers=headers,
+                           files={"file": ("biology.md", text.encode(), "text/markdown")})
+    assert response.status_code == 200, response.text
+    return response.json()["document_id"]
+
+def search(client, headers, q, **params):
+    response = client.get("/api/v1/search/text", headers=headers, params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()["results"]
+
+def test_match_has_a_highlighted_snippet_and_stays_private(client, auth_headers, engine):
+    headers = auth_headers()
+    document_id = upload(client, headers, "# Biology\n\nThe mitochondria produce the energy of the cell. Écologie des forêts.")
+    session = sessionmaker(bind=engine)()
+    try:
+        session.add(Summary(document_id=document_id, title="Summary", content="Mitochondria are organelles."))
+        session.commit()
+    finally:
+        session.close()
+
+    results = search(client, headers, "mitochond")  # The last term is a prefix
+    assert {(result["type"], result["document_id"]) for result in results} == {
+        ("document", document_id), ("summary", document_id)
+    }
+    document = next(result for result in results if result["type"] == "document")
+    assert "<mark>mitochondria</mark>" in document["snippet"] and document["document_title"] == "biology"
+    assert [result["type"] for result in search(client, headers, "mitochondria", types=["summary"])] == ["summary"]
+    assert search(client, headers, "ecologie forets")[0]["document_id"] == document_id  # Diacritics ignored
+    assert search(client, headers, "mitochondria chloroplast") == []  # Every term is required
+
+    assert search(client, auth_headers(), "mitochondria") == []  # Other users' documents
+    unknown = client.get("/api/v1/search/text", headers=headers, params={"q": "cell", "types": "video"})
+    assert unknown.status_code == 400
+
+def test_index_follows_reupload_and_delete(client, auth_headers):
+    headers = auth_headers()
+    document_id = upload(client, headers, "# Plants\n\nChloroplasts capture sunlight.")
+    assert [result["document_id"] for result in search(client, headers, "chloroplasts")] == [document_id]
+
+    reuploaded = client.put(f"/api/v1/documents/{document_id}/file", headers=headers,
+                            files={"file": ("biology.md", b"# Plants\n\nStomata exchange gases.", "text/markdown")})
+    assert reuploaded.status_code == 200, reuploaded.text
+    assert search(client, headers, "chloroplasts") == []
+    assert [result["document_id"] for result in search(client, headers, "stomata")] == [document_id]
+
+    assert client.delete(f"/api/v1/documents/{document_id}", headers=headers).status_code == 200
+    assert search(client, headers, "stomata") == []
+    assert search(client, headers, "plants") == []
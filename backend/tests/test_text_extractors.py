@@ -0,0 +1,86 @@
+"""Markdown and DOCX extractors: document order, tables, headings and inline markup."""
+from docx import Document as DocxDocument
+from app.services.chunking import chunk_text
+from app.services.text_extractors import docx_to_text, inline_text, markdown_to_text
+
+MARKDOWN = """Cell biology
+============
+
+Cells make **ATP** in the [mitochondria](https://example.com/mito), see ![the figure](fig.png).
+AT&amp;T, 3 &lt; 4, snake_case_name and \\*not emphasis\\*.
+
+| Molecule | Role |
+|:---------|-----:|
+| *ATP* | energy \\| currency |
+| DNA | `<gene>` |
+
+## Organelles ##
+
+- nucleus
+  holds the DNA
+- ribosome
+
+> Quoted *note*
+
+```python
+if a < b:
+    print("&amp;")
+```
+"""
+
+def test_markdown_keeps_structure_and_order():
+    assert markdown_to_text(MARKDOWN.splitlines(True)).split("\n\n") == [
+        "# Cell biology",
+        "Cells make ATP in the mitochondria, see the figure.\nAT&T, 3 < 4, snake_case_name and *not emphasis*.",
+        "Molecule | Role\nATP | energy | currency\nDNA | <gene>",
+        "## Organelles",
+        "- nucleus holds the DNA\n- ribosome",
+        "Quoted note",
+        'if a < b:\n    print("&amp;")',
+    ]
+
+def test_inline_code_is_verbatim():
+    assert inline_text("Use `a_b * c &amp; d` here") == "Use a_b * c &amp; d here"
+
+def test_docx_keeps_tables_in_document_order(tmp_path):
+    doc = DocxDocument()
+    doc.add_heading("Cell biology", 0)
+    doc.add_heading("Organelles", level=1)
+    doc.add_paragraph("Before the table.")
+    table = doc.add_table(rows=2, cols=2)
+    for r, row in enumerate([["Molecule", "Role"], ["ATP", "energy"]]):
+        for c, text in enumerate(row):
+            table.cell(r, c).text = text
+    doc.add_paragraph("First item", style="List Bullet")
+    doc.add_paragraph("Second item", style="List Bullet")
+    doc.add_heading("Membranes", level=2)
+    doc.add_paragraph("After the table.")
+    path = str(tmp_path / "notes.docx")
+    doc.save(path)
+
+    assert docx_to_text(path).split("\n\n") == [
+        "# Cell biology",
+        "# Organelles",
+        "Before the table.",
+        "Molecule | Role\nATP | energy",
+        "- First item\n- Second item",
+        "## Membranes",
+        "After the table.",
+    ]
+
+def test_docx_merged_cells_are_written_once(tmp_path):
+    doc = DocxDocument()
+    table = doc.add_table(rows=2, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 2)).text = "Header"
+    for c in range(3):
+        table.cell(1, c).text = f"v{c}"
+    path = str(tmp_path / "merged.docx")
+    doc.save(path)
+    assert docx_to_text(path) == "Header\nv0 | v1 | v2"
+
+def test_headings_start_a_new_chunk():
+    text = "# Part one\n\nShort intro.\n\n## Part two\n\nMore text."
+    assert [chunk.text for chunk in chunk_text(text, max_chars=1000)] == [
+        "# Part one\n\nShort intro.",
+        "## Part two\n\nMore text.",
+    ]
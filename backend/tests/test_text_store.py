@@ -0,0 +1,69 @@
+"""Text store: slices read through the block index, and never a stale version."""
+import pytest
+from app.services import text_store as text_store_module
+from app.services.text_store import TextStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.BLOCK_CHARS = 8  # Small blocks: slices cross block boundaries
+    return store
+
+TEXT = "Cellule é\r\n" * 5 + "𝛼 and 𝛽 are greek letters"
+
+def test_read_any_slice_across_blocks(store):
+    store.write(1, TEXT)
+    assert store.exists(1) and store.length(1) == len(TEXT)
+    for start in range(len(TEXT)):
+        for length in (1, 7, 8, 9, 17):
+            assert store.read(1, start, length) == TEXT[start:start + length], (start, length)
+
+def test_read_at_block_boundaries_and_past_the_end(store):
+    store.write(1, TEXT)
+    assert store.read(1, 8, 8) == TEXT[8:16]
+    assert store.read(1, 0, len(TEXT) + 100) == TEXT
+    assert store.read(1, len(TEXT) - 3, 50) == TEXT[-3:]
+    assert store.read(1, len(TEXT), 5) == ""
+    assert store.read(1, 3, 0) == ""
+
+def test_empty_text_and_rewrite(store):
+    store.write(2, "")
+    assert store.length(2) == 0 and store.read(2, 0, 10) == ""
+    store.write(2, "new version")
+    assert store.read(2, 4, 100) == "version"
+    store.delete(2)
+    assert not store.exists(2)
+
+def test_failed_write_leaves_no_entry_instead_of_the_old_one(store, monkeypatch):
+    store.write(3, "old version")
+    real_replace = text_store_module.os.replace
+
+    def replace(source, destination):
+        if destination.endswith(".idx"):
+            raise OSError("disk full")
+        real_replace(source, destination)
+    monkeypatch.setattr(text_store_module.os, "replace", replace)
+    with pytest.raises(OSError):
+        store.write(3, "new version")
+    assert not store.exists(3)
+
+def test_reupload_with_a_failed_write_doesnt_serve_the_old_text(client, auth_headers, monkeypatch):
+    from app.services.text_store import text_store
+    headers = auth_headers()
+    uploaded = client.post("/api/v1/documents/upload", headers=headers,
+                           files={"file": ("notes.md", b"# Notes\n\nOld text.\n", "text/markdown")})
+    assert uploaded.status_code == 200, uploaded.text
+    document_id = uploaded.json()["document_id"]
+    assert "Old text." in client.get(f"/api/v1/documents/{document_id}/content", headers=headers).json()["content"]
+
+    def broken_write(document_id, text):
+        raise OSError("disk full")
+    with monkeypatch.context() as patch:
+        patch.setattr(text_store, "write", broken_write)
+        reuploaded = client.put(f"/api/v1/documents/{document_id}/file", headers=headers,
+                                files={"file": ("notes.md", b"# Notes\n\nNew text.\n", "text/markdown")})
+    assert reuploaded.status_code == 200, reuploaded.text
+    assert not text_store.exists(document_id)
+
+    content = client.get(f"/api/v1/documents/{document_id}/content", headers=headers).json()["content"]
+    assert "New text." in content and "Old text." not in content
@@ -0,0 +1,30 @@
+"""Request stage timings: nested stages aren't counted twice."""
+import pytest
+from app.core import timing
+from app.core.timing import RequestTimer, record_stage, stage
+
+def test_outer_stage_records_only_its_own_time(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(timing.time, "perf_counter", lambda: now[0])
+    timer = RequestTimer()
+    token = timing._current_timer.set(timer)
+    try:
+        with stage("auth"):
+            now[0] += 0.002  # Token check
+            record_stage("db", 0.010)  # User lookup, timed by the engine hooks
+            now[0] += 0.010
+            with stage("extract"):
+                now[0] += 0.005
+        with stage("llm"):
+            now[0] += 0.020
+    finally:
+        timing._current_timer.reset(token)
+
+    assert timer.stages == pytest.approx({"auth": 0.002, "db": 0.010, "extract": 0.005, "llm": 0.020})
+    assert sum(timer.stages.values()) == pytest.approx(timer.elapsed())
+    assert "auth;dur=2.0" in timer.server_timing(timer.elapsed())
+
+def test_stages_outside_a_request_are_ignored():
+    with stage("auth"):
+        record_stage("db", 1.0)
+    assert timing.current_timer() is None
@@ -0,0 +1,75 @@
+"""Resumable uploads: offsets, resuming, checksums, cancelling and ownership."""
+import hashlib
+import os
+from app.core.config import settings
+
+CONTENT = b"# Cells\n\nThe mitochondria produce ATP for the cell.\n"
+
+def create(client, headers, content=CONTENT, **extra):
+    response = client.post("/api/v1/uploads/", json={"filename": "cells.md", "size": len(content), **extra}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def patch(client, headers, upload_id, offset, body):
+    return client.patch(f"/api/v1/uploads/{upload_id}", content=body, headers={**headers, "Upload-Offset": str(offset)})
+
+def test_create_starts_at_offset_zero(client, auth_headers):
+    upload = create(client, auth_headers())
+    assert upload["offset"] == 0 and upload["size"] == len(CONTENT) and not upload["completed"]
+    bad = client.post("/api/v1/uploads/", json={"filename": "cells.exe", "size": 10}, headers=auth_headers())
+    assert bad.status_code == 400
+
+def test_chunk_at_the_wrong_offset_is_rejected_with_the_current_offset(client, auth_headers):
+    headers = auth_headers()
+    upload = create(client, headers)
+    assert patch(client, headers, upload["upload_id"], 0, CONTENT[:10]).json()["offset"] == 10
+    response = patch(client, headers, upload["upload_id"], 0, CONTENT[10:])
+    assert response.status_code == 409
+    assert "current offset 10" in response.json()["detail"]
+
+def test_resume_after_a_partial_chunk_and_complete(client, auth_headers):
+    headers = auth_headers()
+    upload = create(client, headers, sha256=hashlib.sha256(CONTENT).hexdigest())
+    patch(client, headers, upload["upload_id"], 0, CONTENT[:20])
+    incomplete = client.post(f"/api/v1/uploads/{upload['upload_id']}/complete", headers=headers)
+    assert incomplete.status_code == 409
+
+    # The client lost track: it asks for the offset and sends the rest from there
+    offset = client.get(f"/api/v1/uploads/{upload['upload_id']}", headers=headers).json()["offset"]
+    assert offset == 20
+    assert patch(client, headers, upload["upload_id"], offset, CONTENT[offset:]).json()["offset"] == len(CONTENT)
+
+    first = client.post(f"/api/v1/uploads/{upload['upload_id']}/complete", headers=headers)
+    assert first.status_code == 200, first.text
+    assert first.json()["content_length"] > 0
+    # A second upload of the same name doesn't overwrite the first one's file
+    second_upload = create(client, headers)
+    patch(client, headers, second_upload["upload_id"], 0, CONTENT)
+    second = client.post(f"/api/v1/uploads/{second_upload['upload_id']}/complete", headers=headers)
+    assert second.status_code == 200, second.text
+    assert sorted(os.listdir(settings.UPLOAD_DIR)) == ["cells-1.md", "cells.md"]
+
+def test_checksum_mismatch_on_complete_starts_over(client, auth_headers):
+    headers = auth_headers()
+    upload = create(client, headers, sha256=hashlib.sha256(b"something else").hexdigest())
+    patch(client, headers, upload["upload_id"], 0, CONTENT)
+    response = client.post(f"/api/v1/uploads/{upload['upload_id']}/complete", headers=headers)
+    assert response.status_code == 400
+    assert client.get(f"/api/v1/uploads/{upload['upload_id']}", headers=headers).json()["offset"] == 0
+
+def test_cancel_removes_the_upload(client, auth_headers):
+    headers = auth_headers()
+    upload = create(client, headers)
+    patch(client, headers, upload["upload_id"], 0, CONTENT[:10])
+    assert client.delete(f"/api/v1/uploads/{upload['upload_id']}", headers=headers).status_code == 200
+    assert client.get(f"/api/v1/uploads/{upload['upload_id']}", headers=headers).status_code == 404
+    assert all(item["upload_id"] != upload["upload_id"] for item in client.get("/api/v1/uploads/", headers=headers).json())
+
+def test_another_users_upload_is_not_found(client, auth_headers):
+    owner, other = auth_headers(), auth_headers()
+    upload_id = create(client, owner)["upload_id"]
+    assert client.get(f"/api/v1/uploads/{upload_id}", headers=other).status_code == 404
+    assert patch(client, other, upload_id, 0, CONTENT).status_code == 404
+    assert client.post(f"/api/v1/uploads/{upload_id}/complete", headers=other).status_code == 404
+    assert client.delete(f"/api/v1/uploads/{upload_id}", headers=other).status_code == 404
+    assert client.get(f"/api/v1/uploads/{upload_id}", headers=owner).status_code == 200
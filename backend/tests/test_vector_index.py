@@ -0,0 +1,79 @@
+"""Semantic search: chunking, hashing embedder, per-user indexes and their cache."""
+import numpy as np
+from app.models import chat, learning_material  # noqa: F401 (mappers of the Document relationships)
+from app.models.document import Document, DocumentType
+from app.models.user import User
+from app.services.chunking import chunk_text
+from app.services.vector_index import HashingEmbedder, UserVectorIndex, VectorIndexManager
+
+def test_chunks_are_whole_paragraphs_split_at_headings():
+    text = "# Cells\n\nCells are small.\n\nThey divide.\n\n## Atoms\n\nAtoms are smaller."
+    chunks = chunk_text(text, max_chars=100)
+    assert [chunk.text for chunk in chunks] == [
+        "# Cells\n\nCells are small.\n\nThey divide.", "## Atoms\n\nAtoms are smaller."
+    ]
+    assert [chunk.index for chunk in chunks] == [0, 1]
+    assert all(text[chunk.start:].startswith(chunk.text.split("\n\n")[0]) for chunk in chunks)
+    assert chunk_text("") == []
+
+def test_long_paragraphs_are_cut_at_whitespace_with_their_offsets():
+    text = "  " + " ".join(f"word{i}" for i in range(40))
+    chunks = chunk_text(text, max_chars=50)
+    assert all(len(chunk.text) <= 50 for chunk in chunks)
+    assert " ".join(chunk.text for chunk in chunks) == text.strip()
+    assert all(text[chunk.start:chunk.start + len(chunk.text)] == chunk.text for chunk in chunks)
+
+def test_an_edit_only_changes_its_own_chunk():
+    before = chunk_text("First part.\n\n# Second\n\nSecond part.\n\n# Third\n\nThird part.", max_chars=40)
+    after = chunk_text("First part.\n\n# Second\n\nSecond part, edited.\n\n# Third\n\nThird part.", max_chars=40)
+    assert before[0].text == after[0].text and before[2].text == after[2].text
+    assert before[1].text != after[1].text
+
+def test_embedder_is_deterministic_normalized_and_ignores_stop_words():
+    embedder = HashingEmbedder(dim=64)
+    vectors = embedder.embed(["The cell membrane", "cell membrane", "", "photosynthesis in plants"])
+    assert vectors.shape == (4, 64) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[[0, 1, 3]], axis=1), 1.0)
+    assert not vectors[2].any()
+    assert np.allclose(vectors[0], vectors[1])  # "the" is a stop word
+    assert np.array_equal(HashingEmbedder(dim=64).embed(["cell membrane"])[0], vectors[1])
+    assert float(vectors[1] @ vectors[3]) < 0.5
+
+def test_user_index_search_remove_and_reload(tmp_path):
+    embedder = HashingEmbedder(dim=128)
+    texts = ["mitochondria produce energy", "ribosomes build proteins", "chloroplasts capture light"]
+    for quantize in (True, False):
+        index = UserVectorIndex(128, quantize=quantize)
+        index.add(1, [10, 11], embedder.embed(texts[:2]))
+        index.add(2, [20], embedder.embed(texts[2:]))
+        query = embedder.embed(["which organelle builds proteins"])[0]
+        assert index.search(query, 1)[0][:2] == (11, 1)
+        assert [hit[0] for hit in index.search(embedder.embed(["light"])[0], 5, document_id=2)] == [20]
+        assert index.search(embedder.embed(["unrelated words entirely"])[0], 5) == []
+
+        path = str(tmp_path / f"index_{quantize}.npz")
+        index.save(path)
+        loaded = UserVectorIndex.load(path, 128, quantize)
+        assert loaded.search(query, 1) == index.search(query, 1)
+        assert UserVectorIndex.load(path, 64, quantize) is None  # Other settings: rebuilt
+
+        assert index.remove_chunks([10]) == 1 and index.remove(1) == 1 and len(index) == 1
+
+def test_index_saved_by_another_worker_is_reloaded(db, tmp_path):
+    owner = User(username="two-workers", email="two-workers@example.com", hashed_password="x")
+    db.add(owner)
+    db.flush()
+    first = Document(title="Cells", filename="cells.md", file_path="/tmp/cells.md",
+                     document_type=DocumentType.MARKDOWN, content="Mitochondria produce energy.", user_id=owner.id)
+    second = Document(title="Plants", filename="plants.md", file_path="/tmp/plants.md",
+                      document_type=DocumentType.MARKDOWN, content="Chloroplasts capture light.", user_id=owner.id)
+    db.add_all([first, second])
+    db.flush()
+
+    worker_a = VectorIndexManager(str(tmp_path), dim=128)
+    worker_b = VectorIndexManager(str(tmp_path), dim=128)
+    worker_a.index_document(db, first)
+    assert [hit[1] for hit in worker_b.search(db, owner.id, "mitochondria energy")] == [first.id]
+    worker_a.index_document(db, second)  # worker_b still has the index without it in its cache
+    assert [hit[1] for hit in worker_b.search(db, owner.id, "chloroplasts light")] == [second.id]
+    assert worker_b.get(db, owner.id) is worker_b.get(db, owner.id)  # Unchanged file: cached
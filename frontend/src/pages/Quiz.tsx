@@ -19,10 +19,10 @@ const Quiz: React.FC = () => {
 
   const fetchQuiz = async () => {
     try {
+      // Once the document has questions, each quiz is a new draw from them
       const response = await learningMaterialAPI.getQuizzes(Number(documentId));
       if (response.data.length > 0) {
-        setQuiz(response.data[0]);
-        setSelectedAnswers(new Array(response.data[0].questions.length).fill(''));
+        await generateQuiz();
       }
     } catch (error) {
       console.error('Error fetching quiz:', error);
@@ -36,7 +36,9 @@ const Quiz: React.FC = () => {
     try {
       const response = await learningMaterialAPI.generateQuiz(Number(documentId), 5);
       setQuiz(response.data);
+      setCurrentQuestion(0);
       setSelectedAnswers(new Array(response.data.questions.length).fill(''));
+      setShowResults(false);
     } catch (error) {
       console.error('Error generating quiz:', error);
       alert('Failed to generate quiz. Please try again.');
@@ -56,6 +58,22 @@ const Quiz: React.FC = () => {
       setCurrentQuestion(currentQuestion + 1);
     } else {
       setShowResults(true);
+      submitAnswers();
+    }
+  };
+
+  const submitAnswers = async () => {
+    // Questions answered wrong are asked again in the next quizzes
+    const answers: Record<number, string> = {};
+    quiz.questions.forEach((q: QuizQuestion, index: number) => {
+      if (selectedAnswers[index]) {
+        answers[q.id] = selectedAnswers[index];
+      }
+    });
+    try {
+      await learningMaterialAPI.submitQuizAnswers(Number(documentId), answers);
+    } catch (error) {
+      console.error('Error submitting answers:', error);
     }
   };
 
@@ -76,9 +94,7 @@ const Quiz: React.FC = () => {
   };
 
   const resetQuiz = () => {
-    setCurrentQuestion(0);
-    setSelectedAnswers(new Array(quiz.questions.length).fill(''));
-    setShowResults(false);
+    generateQuiz();
   };
 
   if (loading) {
@@ -148,7 +164,7 @@ const Quiz: React.FC = () => {
 
           <div style={actionsStyle}>
             <button onClick={resetQuiz} style={retryButtonStyle}>
-              🔄 Try Again
+              🔄 New Quiz
             </button>
             <Link to={`/document/${documentId}`} style={backButtonStyle}>
               ← Back to Document
@@ -33,6 +33,7 @@ export interface Quiz {
 }
 
 export interface QuizQuestion {
+  id: number;
   question: string;
   options: string[];
   correct_answer: string;
@@ -72,6 +73,8 @@ export const learningMaterialAPI = {
     api.post<Quiz>(`/api/v1/learning-materials/quizzes/${documentId}?num_questions=${numQuestions}`),
   getQuizzes: (documentId: number) =>
     api.get<Quiz[]>(`/api/v1/learning-materials/quizzes/${documentId}`),
+  submitQuizAnswers: (documentId: number, answers: Record<number, string>) =>
+    api.post(`/api/v1/learning-materials/quizzes/${documentId}/answers`, { answers }),
   generateFlashcards: (documentId: number, numCards: number = 10) =>
     api.post(`/api/v1/learning-materials/flashcards/${documentId}?num_cards=${numCards}`),
   getFlashcards: (documentId: number) =>